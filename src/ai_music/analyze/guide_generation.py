@@ -4,14 +4,12 @@ import json
 from typing import Any
 
 from ai_music.config import AppConfig
-from ai_music.llm.ollama_client import OllamaClient
-from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.router import build_llm_router
 
 
-def _select_llm(cfg: AppConfig) -> tuple[Any | None, str]:
-    if cfg.providers.openrouter_api_key:
-        return OpenRouterClient(cfg.providers.openrouter_api_key), "openrouter"
-    return OllamaClient(cfg.providers.ollama_base_url), "ollama"
+def _select_llm(cfg: AppConfig, use_cache: bool = True) -> tuple[Any | None, str]:
+    router = build_llm_router(cfg, use_cache=use_cache)
+    return router, router.provider_name
 
 
 def build_playlist_guide_markdown(
@@ -19,6 +17,7 @@ def build_playlist_guide_markdown(
     playlist_profile: dict[str, Any],
     sample_tracks: list[dict[str, Any]],
     use_llm: bool = True,
+    llm_cache: bool = True,
 ) -> str:
     playlist = playlist_profile["playlist_name"]
     genre_family = playlist_profile["genre_family"]
@@ -65,7 +64,7 @@ def build_playlist_guide_markdown(
     if not use_llm:
         return "\n".join(base_md)
 
-    llm, provider = _select_llm(cfg)
+    llm, provider = _select_llm(cfg, use_cache=llm_cache)
     if llm is None:
         return "\n".join(base_md)
     try:
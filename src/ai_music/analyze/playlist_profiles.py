@@ -4,15 +4,11 @@ from collections import Counter, defaultdict
 from typing import Any
 
 from ai_music.io.files import normalize_loose
+from ai_music.retrieval.keywords import keyword_tagger
 
 
 def infer_genre_family(playlist_name: str) -> str:
-    n = playlist_name.lower()
-    if any(k in n for k in ["dnb", "drum", "jungle"]):
-        return "dnb"
-    if any(k in n for k in ["edm", "house", "melodic", "progressive"]):
-        return "edm"
-    return "electronic"
+    return keyword_tagger("playlist_genre_family").first(playlist_name) or "electronic"
 
 
 def compute_playlist_stats(raw_rows: list[dict[str, Any]], normalized_rows: list[dict[str, Any]]) -> dict[str, Any]:
@@ -28,15 +24,17 @@ def compute_playlist_stats(raw_rows: list[dict[str, Any]], normalized_rows: list
         artists = [a for row in rows for a in row.get("parsed_artists", [])]
         artist_counts = Counter(artists)
         lex = " ".join(normalize_loose(row["track_name"]) for row in rows)
+        axes = set(keyword_tagger("playlist_style_axes").tags(playlist))
         style_axes = {
-            "energy": 0.8 if any(k in playlist.lower() for k in ["heavy", "beast", "aggressive"]) else 0.45,
-            "melodic": 0.8 if any(k in playlist.lower() for k in ["liquid", "chill", "melodic"]) else 0.5,
-            "club": 0.8 if any(k in playlist.lower() for k in ["hits", "afterparty", "epic"]) else 0.55,
+            "energy": 0.8 if "energy" in axes else 0.45,
+            "melodic": 0.8 if "melodic" in axes else 0.5,
+            "club": 0.8 if "club" in axes else 0.55,
         }
+        track_notes = set(keyword_tagger("playlist_track_notes").tags(lex))
         notes = []
-        if "remix" in lex:
+        if "remix" in track_notes:
             notes.append("High remix presence in track titles.")
-        if any(k in lex for k in ["vip", "extended"]):
+        if "vip-extended" in track_notes:
             notes.append("Contains VIP/extended mix references.")
         per_playlist[playlist] = {
             "playlist_name": playlist,
@@ -67,30 +65,5 @@ def compute_overlaps(normalized_rows: list[dict[str, Any]]) -> list[dict[str, An
 
 
 def _dominant_tags_from_name(playlist_name: str) -> list[str]:
-    n = playlist_name.lower()
-    tags = ["electronic"]
-    mapping = {
-        "dnb": ["drum-and-bass"],
-        "jungle": ["jungle", "breakbeats"],
-        "liquid": ["liquid", "melodic", "emotive"],
-        "heavy": ["heavy", "aggressive"],
-        "beast": ["heavy", "festival"],
-        "epic": ["cinematic", "anthemic"],
-        "afterparty": ["late-night", "club"],
-        "chill": ["chill", "deep", "melodic"],
-        "melodic": ["melodic"],
-        "house": ["house"],
-        "progressive": ["progressive"],
-        "hits": ["popular", "accessible"],
-        "slow": ["slower-groove"],
-    }
-    for key, vals in mapping.items():
-        if key in n:
-            tags.extend(vals)
-    deduped: list[str] = []
-    seen: set[str] = set()
-    for tag in tags:
-        if tag not in seen:
-            seen.add(tag)
-            deduped.append(tag)
-    return deduped
+    tags = ["electronic", *keyword_tagger("playlist_tags").tags(playlist_name)]
+    return list(dict.fromkeys(tags))
@@ -10,15 +10,33 @@ import typer
 
 from ai_music.analyze.playlist_profiles import compute_overlaps, compute_playlist_stats
 from ai_music.config import dump_summary_json, env_doctor_summary, get_app_config
-from ai_music.enrich.lastfm import LastFMClient
-from ai_music.enrich.musicbrainz import MusicBrainzClient
+from ai_music.enrich.acoustid import AcoustIDClient
+from ai_music.enrich.musicbrainz_local import build_musicbrainz_index
 from ai_music.io.csv_playlists import load_all_playlists
 from ai_music.io.files import read_json, slugify, write_csv, write_json, write_text
 from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.stub_server import StubLLMConfig, StubLLMServer
+from ai_music.media.fingerprint import fingerprint_media_files, resolve_fpcalc
 from ai_music.media.indexer import index_media_files
 from ai_music.media.matching import match_media_to_playlist
 from ai_music.normalize.tracks import dedupe_normalized_rows, fuzzy_candidates, normalize_rows
-from ai_music.workflows.docs_to_prompts import build_prompt_briefs_from_docs, index_docs, render_prompt_artifacts
+from ai_music.workflows.docs_to_prompts import (
+    DOCS_CHUNK_MAX_TOKENS,
+    DOCS_CHUNK_OVERLAP_TOKENS,
+    DOCS_DEDUPE_THRESHOLD,
+    build_prompt_briefs_from_docs,
+    build_vector_indexes,
+    index_docs,
+    render_prompt_artifacts,
+    search_docs,
+    search_similar,
+)
+from ai_music.workflows.llm_benchmark import (
+    run_json_extract_benchmark,
+    run_prompt_pipeline_benchmark,
+    run_suno_mine_benchmark,
+)
+from ai_music.workflows.metadata_enrich import MUSICBRAINZ_LOCAL_INDEX, enrich_track_metadata
 from ai_music.workflows.playlist_to_guide import build_guide_for_playlist
 from ai_music.workflows.stem_split_batch import run_stem_split_batch
 from ai_music.workflows.suno_song_analysis import (
@@ -40,6 +58,7 @@ guide_app = typer.Typer(help="Playlist-specific guide generation")
 media_app = typer.Typer(help="Media indexing and matching")
 stems_app = typer.Typer(help="Stem split workflows")
 suno_app = typer.Typer(help="Suno API mining and baseline adaptation workflows")
+bench_app = typer.Typer(help="Local benchmarks against a stub LLM server")
 
 app.add_typer(env_app, name="env")
 app.add_typer(provider_app, name="provider")
@@ -51,6 +70,7 @@ app.add_typer(guide_app, name="guide")
 app.add_typer(media_app, name="media")
 app.add_typer(stems_app, name="stems")
 app.add_typer(suno_app, name="suno")
+app.add_typer(bench_app, name="bench")
 
 
 def _cfg():
@@ -75,13 +95,6 @@ def _load_normalized_rows(cfg) -> list[dict[str, Any]]:
     return read_json(path)
 
 
-def _load_canonical_tracks(cfg) -> list[dict[str, Any]]:
-    path = cfg.data_dir / "normalized" / "tracks.canonical.json"
-    if not path.exists():
-        raise FileNotFoundError("Missing canonical tracks. Run `playlists normalize` first.")
-    return read_json(path)
-
-
 @env_app.command("doctor")
 def env_doctor() -> None:
     """Check Python/tooling/provider key presence without printing secrets."""
@@ -103,7 +116,9 @@ def provider_smoke_test(
             result["notes"].append("OPENROUTER_API_KEY missing.")
         elif online:
             try:
-                client = OpenRouterClient(cfg.providers.openrouter_api_key, timeout=15)
+                client = OpenRouterClient(
+                    cfg.providers.openrouter_api_key, base_url=cfg.providers.openrouter_base_url, timeout=15
+                )
                 data = client.list_models()
                 models = data.get("data", [])
                 result["ok"] = True
@@ -145,9 +160,72 @@ def provider_smoke_test(
 
 
 @docs_app.command("index")
-def docs_index() -> None:
+def docs_index(
+    force: bool = typer.Option(False, "--force", help="Re-chunk every doc, ignoring the file manifest."),
+    workers: int = typer.Option(1, "--workers", min=1, help="Processes used to chunk changed docs."),
+    max_tokens: int = typer.Option(
+        DOCS_CHUNK_MAX_TOKENS, "--max-tokens", min=0, help="Split longer sections into parts (0 disables)."
+    ),
+    overlap: int = typer.Option(
+        DOCS_CHUNK_OVERLAP_TOKENS, "--overlap", min=0, help="Tokens of trailing context repeated in the next part."
+    ),
+    dedupe_threshold: float = typer.Option(
+        DOCS_DEDUPE_THRESHOLD,
+        "--dedupe-threshold",
+        min=0.0,
+        max=1.0,
+        help="Shingle Jaccard similarity that flags a chunk as a near-duplicate (0 disables).",
+    ),
+    collapse_duplicates: bool = typer.Option(
+        False, "--collapse-duplicates", help="Leave flagged near-duplicates out of search and prompt context."
+    ),
+) -> None:
+    cfg = _cfg()
+    result = index_docs(
+        cfg,
+        force=force,
+        workers=workers,
+        max_tokens=max_tokens or None,
+        overlap_tokens=overlap,
+        dedupe_threshold=dedupe_threshold or None,
+        collapse_duplicates=collapse_duplicates,
+    )
+    _json_echo(result)
+
+
+@docs_app.command("search")
+def docs_search(
+    query: str = typer.Argument(..., help="Free-text query, e.g. \"drop arrangement bars\"."),
+    top_k: int = typer.Option(10, "--top-k", min=1),
+) -> None:
+    cfg = _cfg()
+    _json_echo(search_docs(cfg, query, top_k=top_k))
+
+
+@docs_app.command("vector-index")
+def docs_vector_index(
+    dim: int = typer.Option(2048, "--dim", min=64, help="Hashed feature width."),
+    lists: int | None = typer.Option(
+        None, "--lists", min=0, help="IVF clusters (default: sqrt(rows) for large indexes, 0 disables)."
+    ),
+) -> None:
+    cfg = _cfg()
+    _json_echo(build_vector_indexes(cfg, dim=dim, n_lists=lists))
+
+
+@docs_app.command("similar")
+def docs_similar(
+    text: str = typer.Argument(..., help="Style prompt or free text to match."),
+    kind: str = typer.Option("all", "--kind", help="docs|suno|all"),
+    top_k: int = typer.Option(5, "--top-k", min=1),
+    nprobe: int = typer.Option(8, "--nprobe", min=1, help="IVF clusters scanned per query."),
+    exact: bool = typer.Option(False, "--exact", help="Brute-force scan instead of IVF probing."),
+) -> None:
     cfg = _cfg()
-    result = index_docs(cfg)
+    try:
+        result = search_similar(cfg, text, kind=kind, top_k=top_k, nprobe=nprobe, exact=exact)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
     _json_echo(result)
 
 
@@ -161,6 +239,19 @@ def prompt_build_from_docs(
         help="Optional override for Suno style/lyrics fragment generation (e.g. a Gemini model via OpenRouter).",
     ),
     max_attempts: int = typer.Option(2, min=1, max=5),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Number of doc groups processed concurrently."),
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help="Bypass the persistent LLM response cache."),
+    stream: bool = typer.Option(False, "--stream", help="Stream LLM answers and abort early when they go off-schema."),
+    brief_concurrency: int | None = typer.Option(
+        None, "--brief-concurrency", min=1, help="Override --concurrency for the brief stage."
+    ),
+    fragments_concurrency: int | None = typer.Option(
+        None, "--fragments-concurrency", min=1, help="Override --concurrency for the Suno fragments stage."
+    ),
+    structure_concurrency: int | None = typer.Option(
+        None, "--structure-concurrency", min=1, help="Override --concurrency for the lyric structure stage."
+    ),
+    force: bool = typer.Option(False, "--force", help="Regenerate every brief even if its inputs are unchanged."),
 ) -> None:
     cfg = _cfg()
     result = build_prompt_briefs_from_docs(
@@ -169,6 +260,15 @@ def prompt_build_from_docs(
         model=model,
         suno_model=suno_model,
         max_attempts=max_attempts,
+        concurrency=concurrency,
+        llm_cache=not no_llm_cache,
+        stream=stream,
+        stage_concurrency={
+            "brief": brief_concurrency,
+            "fragments": fragments_concurrency,
+            "structure": structure_concurrency,
+        },
+        force=force,
     )
     _json_echo(result)
 
@@ -176,9 +276,10 @@ def prompt_build_from_docs(
 @prompt_app.command("render")
 def prompt_render(
     provider: str = typer.Option(..., "--provider", help="suno|fal|openrouter"),
+    force: bool = typer.Option(False, "--force", help="Re-render even when the brief is unchanged."),
 ) -> None:
     cfg = _cfg()
-    result = render_prompt_artifacts(cfg, provider=provider)
+    result = render_prompt_artifacts(cfg, provider=provider, force=force)
     _json_echo(result)
 
 
@@ -191,13 +292,39 @@ def prompt_pack(
         "--suno-model",
         help="Optional frontier/specialized model for Suno style+lyrics fragments.",
     ),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Number of doc groups processed concurrently."),
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help="Bypass the persistent LLM response cache."),
+    stream: bool = typer.Option(False, "--stream", help="Stream LLM answers and abort early when they go off-schema."),
+    brief_concurrency: int | None = typer.Option(
+        None, "--brief-concurrency", min=1, help="Override --concurrency for the brief stage."
+    ),
+    fragments_concurrency: int | None = typer.Option(
+        None, "--fragments-concurrency", min=1, help="Override --concurrency for the Suno fragments stage."
+    ),
+    structure_concurrency: int | None = typer.Option(
+        None, "--structure-concurrency", min=1, help="Override --concurrency for the lyric structure stage."
+    ),
+    force: bool = typer.Option(False, "--force", help="Regenerate every brief even if its inputs are unchanged."),
 ) -> None:
     if source != "docs":
         raise typer.BadParameter("Only `--source docs` is supported in MVP.")
     cfg = _cfg()
     idx = index_docs(cfg)
-    built = build_prompt_briefs_from_docs(cfg, use_llm=not no_llm, suno_model=suno_model)
-    rendered = render_prompt_artifacts(cfg, provider=None)
+    built = build_prompt_briefs_from_docs(
+        cfg,
+        use_llm=not no_llm,
+        suno_model=suno_model,
+        concurrency=concurrency,
+        llm_cache=not no_llm_cache,
+        stream=stream,
+        stage_concurrency={
+            "brief": brief_concurrency,
+            "fragments": fragments_concurrency,
+            "structure": structure_concurrency,
+        },
+        force=force,
+    )
+    rendered = render_prompt_artifacts(cfg, provider=None, force=force)
     _json_echo({"index": idx, "built": built, "rendered": rendered})
 
 
@@ -261,83 +388,85 @@ def playlists_normalize(
 @metadata_app.command("enrich")
 def metadata_enrich(
     online: bool = typer.Option(False, "--online", help="Perform API calls (MusicBrainz/Last.fm)."),
-    limit: int = typer.Option(50, "--limit", min=1),
+    offset: int = typer.Option(0, "--offset", min=0, help="Skip the first N canonical tracks (shard window start)."),
+    limit: int = typer.Option(50, "--limit", min=0, help="Window size after --offset; 0 means no limit."),
+    resume: bool = typer.Option(False, "--resume", help="Skip track_ids already present in the enrichment journal."),
     musicbrainz: bool = typer.Option(True, "--musicbrainz/--no-musicbrainz"),
+    musicbrainz_source: str = typer.Option(
+        "remote",
+        "--musicbrainz-source",
+        help="local|remote. `local` answers from the `metadata mb-index` mirror and uses the API only for misses (with --online).",
+    ),
     lastfm: bool = typer.Option(True, "--lastfm/--no-lastfm"),
 ) -> None:
+    source = musicbrainz_source.lower()
+    if source not in {"local", "remote"}:
+        raise typer.BadParameter("--musicbrainz-source must be `local` or `remote`.")
     cfg = _cfg()
-    tracks = _load_canonical_tracks(cfg)
-    if limit:
-        tracks = tracks[:limit]
-    mb_client = MusicBrainzClient(cfg.providers.musicbrainz_user_agent, cfg.cache_dir) if musicbrainz and online else None
-    lf_client = LastFMClient(cfg.providers.lastfm_api_key, cfg.cache_dir) if lastfm and online and cfg.providers.lastfm_api_key else None
+    try:
+        result = enrich_track_metadata(
+            cfg,
+            online=online,
+            offset=offset,
+            limit=limit or None,
+            musicbrainz=musicbrainz,
+            lastfm=lastfm,
+            resume=resume,
+            musicbrainz_source=source,
+        )
+    except FileNotFoundError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    _json_echo(result)
+
+
+@metadata_app.command("mb-index")
+def metadata_mb_index(
+    dump: Path = typer.Option(..., "--dump", help="MusicBrainz recording JSON dump (one document per line; .gz/.xz/.bz2 ok)."),
+) -> None:
+    cfg = _cfg()
+    if not dump.exists():
+        raise typer.BadParameter(f"Dump file not found: {dump}")
+    result = build_musicbrainz_index(dump, cfg.data_dir / MUSICBRAINZ_LOCAL_INDEX)
+    _json_echo(result)
+
 
-    enriched: list[dict[str, Any]] = []
+@metadata_app.command("acoustid")
+def metadata_acoustid(
+    batch_size: int = typer.Option(50, "--batch-size", min=1, max=200, help="Fingerprints per AcoustID request."),
+) -> None:
+    cfg = _cfg()
+    if not cfg.providers.acoustid_api_key:
+        raise typer.BadParameter("ACOUSTID_API_KEY is required for AcoustID lookups.")
+    fingerprints_path = cfg.data_dir / "analysis" / "media_fingerprints.json"
+    if not fingerprints_path.exists():
+        raise typer.BadParameter("Missing media fingerprints. Run `media fingerprint` first.")
+    rows = [r for r in read_json(fingerprints_path)["files"] if r.get("fingerprint") and r.get("duration")]
+    client = AcoustIDClient(cfg.providers.acoustid_api_key, cfg.cache_dir)
+    results = client.lookup_batch([(r["fingerprint"], int(r["duration"])) for r in rows], batch_size=batch_size)
+    matches: list[dict[str, Any]] = []
+    for row, result in zip(rows, results, strict=True):
+        candidates = result["data"].get("results") or []
+        top = max(candidates, key=lambda c: c.get("score", 0), default=None)
+        matches.append(
+            {
+                "media_id": row["media_id"],
+                "relative_path": row.get("relative_path"),
+                "cache_hit": result["cache_hit"],
+                "candidate_count": len(candidates),
+                "top_score": top.get("score") if top else None,
+                "top_recordings": (top or {}).get("recordings", [])[:3],
+            }
+        )
     stats = {
-        "track_count": len(tracks),
-        "musicbrainz_queries": 0,
-        "lastfm_queries": 0,
-        "musicbrainz_cache_hits": 0,
-        "lastfm_cache_hits": 0,
-        "lastfm_key_present": bool(cfg.providers.lastfm_api_key),
-        "online": online,
+        "fingerprint_count": len(rows),
+        "matched_count": sum(1 for m in matches if m["candidate_count"]),
+        "cache_hits": sum(1 for m in matches if m["cache_hit"]),
+        "batch_requests": client.batch_requests,
+        "fallback_requests": client.single_requests,
+        "rate_limit": client.limiter.stats(),
     }
-    for trk in tracks:
-        artist = (trk.get("canonical_artists") or [None])[0]
-        title = trk.get("canonical_title") or ""
-        record: dict[str, Any] = {"track_id": trk["track_id"], "canonical_title": title, "artist": artist, "providers": {}}
-        if mb_client is not None:
-            query = f'recording:"{title}"'
-            if artist:
-                query += f' AND artist:"{artist}"'
-            try:
-                mb = mb_client.search_recording(query)
-                stats["musicbrainz_queries"] += 1
-                if mb.get("cache_hit"):
-                    stats["musicbrainz_cache_hits"] += 1
-                data = mb["data"]
-                top = (data.get("recordings") or [None])[0]
-                record["providers"]["musicbrainz"] = {
-                    "cache_hit": mb.get("cache_hit", False),
-                    "top_match": top,
-                    "count": len(data.get("recordings", [])),
-                }
-            except Exception as exc:  # noqa: BLE001
-                record["providers"]["musicbrainz_error"] = str(exc)
-        if lf_client is not None and artist and title:
-            try:
-                lf = lf_client.track_info(artist, title)
-                stats["lastfm_queries"] += 1
-                if lf.get("cache_hit"):
-                    stats["lastfm_cache_hits"] += 1
-                top_tags = []
-                track_data = lf["data"].get("track", {})
-                tags = ((track_data.get("toptags") or {}).get("tag")) or []
-                for tag in tags[:10]:
-                    if isinstance(tag, dict) and tag.get("name"):
-                        top_tags.append(tag["name"])
-                record["providers"]["lastfm"] = {
-                    "cache_hit": lf.get("cache_hit", False),
-                    "name": track_data.get("name"),
-                    "artist": ((track_data.get("artist") or {}) if isinstance(track_data.get("artist"), dict) else {"name": track_data.get("artist")}).get("name"),
-                    "top_tags": top_tags,
-                }
-            except Exception as exc:  # noqa: BLE001
-                record["providers"]["lastfm_error"] = str(exc)
-        enriched.append(record)
-
-    out_path = cfg.data_dir / "enriched" / "track_enrichment.json"
-    write_json(out_path, {"records": enriched, "stats": stats})
-    coverage_lines = [
-        "# Metadata Coverage",
-        "",
-        f"- Tracks processed: {stats['track_count']}",
-        f"- Online mode: {stats['online']}",
-        f"- MusicBrainz queries: {stats['musicbrainz_queries']} (cache hits: {stats['musicbrainz_cache_hits']})",
-        f"- Last.fm queries: {stats['lastfm_queries']} (cache hits: {stats['lastfm_cache_hits']})",
-        f"- LASTFM_API_KEY present: {stats['lastfm_key_present']}",
-    ]
-    write_text(cfg.outputs_dir / "reports" / "metadata_coverage.md", "\n".join(coverage_lines))
+    out_path = cfg.data_dir / "enriched" / "acoustid_matches.json"
+    write_json(out_path, {"matches": matches, "stats": stats})
     _json_echo({"output_path": str(out_path.relative_to(cfg.root_dir)), "stats": stats})
 
 
@@ -377,9 +506,12 @@ def playlists_analyze() -> None:
 def guide_build_from_playlist(
     playlist: str = typer.Option(..., "--playlist"),
     no_llm: bool = typer.Option(False, "--no-llm"),
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help="Bypass the persistent LLM response cache."),
 ) -> None:
     cfg = _cfg()
-    result = build_guide_for_playlist(cfg, playlist_name=playlist, use_llm=not no_llm)
+    result = build_guide_for_playlist(
+        cfg, playlist_name=playlist, use_llm=not no_llm, llm_cache=not no_llm_cache
+    )
     _json_echo(result)
 
 
@@ -412,6 +544,33 @@ def media_index() -> None:
     _json_echo({"file_count": payload["file_count"], "output_path": str(out_path.relative_to(cfg.root_dir))})
 
 
+@media_app.command("fingerprint")
+def media_fingerprint(
+    workers: int | None = typer.Option(None, "--workers", min=1, help="Fingerprinting process pool size."),
+    max_length: int = typer.Option(120, "--max-length", min=10, help="Seconds of audio fed to fpcalc."),
+) -> None:
+    cfg = _cfg()
+    media_index_path = cfg.data_dir / "analysis" / "media_index.json"
+    if not media_index_path.exists():
+        raise typer.BadParameter("Missing media index. Run `media index` first.")
+    fpcalc = resolve_fpcalc(cfg.providers.fpcalc_path)
+    if not fpcalc:
+        raise typer.BadParameter("fpcalc (chromaprint) not found. Set FPCALC_PATH or install chromaprint.")
+    media_rows = read_json(media_index_path)["files"]
+    files = fingerprint_media_files(
+        media_rows, cfg.cache_dir, fpcalc, max_workers=workers, max_length_seconds=max_length
+    )
+    stats = {
+        "file_count": len(files),
+        "fingerprinted_count": sum(1 for f in files if f["fingerprint"]),
+        "cache_hits": sum(1 for f in files if f["cache_hit"]),
+        "error_count": sum(1 for f in files if f["error"]),
+    }
+    out_path = cfg.data_dir / "analysis" / "media_fingerprints.json"
+    write_json(out_path, {"files": files, "stats": stats})
+    _json_echo({"output_path": str(out_path.relative_to(cfg.root_dir)), "stats": stats})
+
+
 @media_app.command("match-to-playlist")
 def media_match_to_playlist(
     playlist: str | None = typer.Option(None, "--playlist"),
@@ -500,6 +659,9 @@ def suno_fetch(
     window_size: int = typer.Option(500, "--window-size", min=1, max=5000),
     page_size: int | None = typer.Option(None, "--page-size", min=1, max=500),
     max_pages: int = typer.Option(100, "--max-pages", min=1, max=1000),
+    prefetch: int = typer.Option(
+        2, "--prefetch", min=1, max=16, help="Live mode: pages fetched ahead while earlier ones normalize."
+    ),
     fixture_page: list[Path] = typer.Option(
         [],
         "--fixture-page",
@@ -514,6 +676,7 @@ def suno_fetch(
         page_size=page_size,
         max_pages=max_pages,
         fixture_pages=fixture_page or None,
+        prefetch=prefetch,
     )
     _json_echo(result)
 
@@ -554,6 +717,7 @@ def suno_adapt(
         "--preserve-controls/--no-preserve-controls",
         help="Keep baseline excludes and sliders in adapted output.",
     ),
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help="Bypass the persistent LLM response cache."),
 ) -> None:
     cfg = _cfg()
     result = adapt_suno_prompt_baseline(
@@ -562,6 +726,7 @@ def suno_adapt(
         theme=theme,
         model=model,
         preserve_controls=preserve_controls,
+        llm_cache=not no_llm_cache,
     )
     _json_echo(result)
 
@@ -586,6 +751,7 @@ def suno_mine(
         help="Repeatable local JSON fixture page path (offline smoke mode).",
     ),
     model: str | None = typer.Option(None, "--model"),
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help="Bypass the persistent LLM response cache."),
 ) -> None:
     cfg = _cfg()
     result = mine_suno_prompt_pack(
@@ -598,10 +764,109 @@ def suno_mine(
         page_size=page_size,
         fixture_pages=fixture_page or None,
         model=model,
+        llm_cache=not no_llm_cache,
     )
     _json_echo(result)
 
 
+@bench_app.command("stub-server")
+def bench_stub_server(
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8765, "--port"),
+    latency: float = typer.Option(0.2, "--latency", min=0.0, help="Seconds before each answer."),
+    jitter: float = typer.Option(0.0, "--jitter", min=0.0, help="Extra random latency (seeded)."),
+    error_rate: float = typer.Option(0.0, "--error-rate", min=0.0, max=1.0),
+    seed: int = typer.Option(0, "--seed"),
+    canned: Path | None = typer.Option(None, "--canned", help="JSON file mapping task name -> canned answer."),
+) -> None:
+    config = StubLLMConfig(
+        latency_seconds=latency,
+        jitter_seconds=jitter,
+        error_rate=error_rate,
+        seed=seed,
+        canned=read_json(canned) if canned else {},
+    )
+    server = StubLLMServer(config, host=host, port=port)
+    typer.echo(f"OPENROUTER_BASE_URL={server.openrouter_base_url}")
+    typer.echo(f"OLLAMA_BASE_URL={server.ollama_base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _json_echo(server.stats())
+
+
+@bench_app.command("prompts")
+def bench_prompts(
+    concurrency: str = typer.Option("1,2,4,8", "--concurrency", help="Comma-separated concurrency levels."),
+    provider: str = typer.Option("openrouter", "--provider", help="openrouter|ollama API shape to exercise."),
+    latency: float = typer.Option(0.2, "--latency", min=0.0),
+    jitter: float = typer.Option(0.0, "--jitter", min=0.0),
+    error_rate: float = typer.Option(0.0, "--error-rate", min=0.0, max=1.0),
+    seed: int = typer.Option(0, "--seed"),
+    stream: bool = typer.Option(False, "--stream"),
+) -> None:
+    cfg = _cfg()
+    levels = [int(part) for part in concurrency.split(",") if part.strip()]
+    result = run_prompt_pipeline_benchmark(
+        cfg,
+        concurrency_levels=levels,
+        provider=provider,
+        latency_seconds=latency,
+        jitter_seconds=jitter,
+        error_rate=error_rate,
+        seed=seed,
+        stream=stream,
+    )
+    _json_echo(result)
+
+
+@bench_app.command("suno-mine")
+def bench_suno_mine(
+    concurrency: str = typer.Option("1,2,4,8", "--concurrency", help="Comma-separated concurrency levels."),
+    runs: int = typer.Option(8, "--runs", min=1, help="Mining runs (one theme each) per concurrency level."),
+    style_query: str = typer.Option("clinical dnb", "--style-query"),
+    fixture_page: list[Path] = typer.Option(
+        [Path("tests/fixtures/suno/api_created_page_01.synthetic.json")],
+        "--fixture-page",
+        help="Repeatable local JSON fixture page path; runs never call the Suno API.",
+    ),
+    mapping_config: Path = typer.Option(Path("configs/suno_api_mapping.template.json"), "--mapping-config"),
+    aliases_config: Path = typer.Option(Path("configs/suno_style_aliases.json"), "--aliases-config"),
+    latency: float = typer.Option(0.2, "--latency", min=0.0),
+    jitter: float = typer.Option(0.0, "--jitter", min=0.0),
+    error_rate: float = typer.Option(0.0, "--error-rate", min=0.0, max=1.0),
+    seed: int = typer.Option(0, "--seed"),
+) -> None:
+    cfg = _cfg()
+    levels = [int(part) for part in concurrency.split(",") if part.strip()]
+    result = run_suno_mine_benchmark(
+        cfg,
+        fixture_pages=fixture_page,
+        concurrency_levels=levels,
+        runs=runs,
+        style_query=style_query,
+        mapping_config_path=mapping_config,
+        aliases_config_path=aliases_config,
+        latency_seconds=latency,
+        jitter_seconds=jitter,
+        error_rate=error_rate,
+        seed=seed,
+    )
+    _json_echo(result)
+
+
+@bench_app.command("json-extract")
+def bench_json_extract(
+    sizes: str = typer.Option("100,1000,10000", "--sizes", help="Comma-separated lyric line counts."),
+    repeats: int = typer.Option(20, "--repeats", min=1),
+) -> None:
+    cfg = _cfg()
+    line_counts = [int(part) for part in sizes.split(",") if part.strip()]
+    _json_echo(run_json_extract_benchmark(cfg, sizes=line_counts, repeats=repeats))
+
+
 @app.command("version")
 def version() -> None:
     from ai_music import __version__
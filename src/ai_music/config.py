@@ -38,6 +38,14 @@ class ProviderConfig:
     ffmpeg_path: str | None
     uvr_executable_path: str | None
     uvr_workflow_path: str | None
+    fpcalc_path: str | None = None
+    llm_providers: tuple[str, ...] = ("openrouter", "ollama")
+    openrouter_timeout_seconds: float = 60.0
+    ollama_timeout_seconds: float = 120.0
+    llm_hedge_after_seconds: float | None = None
+    ollama_keep_alive: str | None = "30m"
+    ollama_num_ctx: int | None = 8192
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"
 
 
 @dataclass(slots=True)
@@ -60,6 +68,8 @@ class AppConfig:
             self.data_dir / "analysis",
             self.cache_dir,
             self.cache_dir / "http",
+            self.cache_dir / "fingerprints",
+            self.cache_dir / "llm",
             self.outputs_dir,
             self.outputs_dir / "reports",
             self.outputs_dir / "prompts",
@@ -70,6 +80,13 @@ class AppConfig:
             path.mkdir(parents=True, exist_ok=True)
 
 
+def _env_float(name: str, default: float | None) -> float | None:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return float(raw)
+
+
 def get_app_config() -> AppConfig:
     _load_env_files()
     providers = ProviderConfig(
@@ -88,6 +105,16 @@ def get_app_config() -> AppConfig:
         ffmpeg_path=os.getenv("FFMPEG_PATH"),
         uvr_executable_path=os.getenv("UVR_EXECUTABLE_PATH"),
         uvr_workflow_path=os.getenv("UVR_WORKFLOW_PATH"),
+        fpcalc_path=os.getenv("FPCALC_PATH"),
+        llm_providers=tuple(
+            p.strip().lower() for p in os.getenv("LLM_PROVIDERS", "openrouter,ollama").split(",") if p.strip()
+        ),
+        openrouter_timeout_seconds=_env_float("OPENROUTER_TIMEOUT_SECONDS", 60.0),
+        ollama_timeout_seconds=_env_float("OLLAMA_TIMEOUT_SECONDS", 120.0),
+        llm_hedge_after_seconds=_env_float("LLM_HEDGE_AFTER_SECONDS", None),
+        ollama_keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m") or None,
+        ollama_num_ctx=int(os.getenv("OLLAMA_NUM_CTX") or 8192) or None,
+        openrouter_base_url=os.getenv("OPENROUTER_BASE_URL") or "https://openrouter.ai/api/v1",
     )
     cfg = AppConfig(
         root_dir=ROOT_DIR,
@@ -113,6 +140,8 @@ def env_doctor_summary() -> dict[str, Any]:
         "ffmpeg_configured_path": providers.ffmpeg_path,
         "uvr_executable_on_path": shutil.which("UVR") is not None,
         "uvr_configured_path": providers.uvr_executable_path,
+        "fpcalc_on_path": shutil.which("fpcalc") is not None,
+        "fpcalc_configured_path": providers.fpcalc_path,
         "ollama_reachable": False,
         "providers": {
             "openrouter_key_present": bool(providers.openrouter_api_key),
@@ -1,33 +1,121 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Any
 
 import httpx
 
 from ai_music.enrich.cache import cache_get, cache_set
+from ai_music.io.ratelimit import AdaptiveRateLimiter, request_with_retry
+
+
+ACOUSTID_LOOKUP_URL = "https://api.acoustid.org/v2/lookup"
+ACOUSTID_META = "recordings releasegroups releases tracks compress usermeta sources"
+
+
+def split_batch_response(data: dict[str, Any], indexes: list[int]) -> dict[int, dict[str, Any]]:
+    """Map a multi-fingerprint lookup response back to the request indexes."""
+    if data.get("status") != "ok":
+        error = data.get("error") or {}
+        raise RuntimeError(f"AcoustID batch lookup failed: {error.get('message') or data}")
+    out: dict[int, dict[str, Any]] = {}
+    for position, entry in enumerate(data.get("fingerprints") or []):
+        if not isinstance(entry, dict):
+            continue
+        raw_index = entry.get("index")
+        try:
+            index = int(raw_index) if raw_index is not None else indexes[position]
+        except (TypeError, ValueError, IndexError):
+            continue
+        out[index] = {"status": "ok", "results": entry.get("results") or []}
+    return out
 
 
 class AcoustIDClient:
-    def __init__(self, api_key: str, cache_dir, timeout: float = 30.0):
+    def __init__(
+        self,
+        api_key: str,
+        cache_dir,
+        timeout: float = 30.0,
+        limiter: AdaptiveRateLimiter | None = None,
+        max_retries: int = 4,
+    ):
         self.api_key = api_key
         self.cache_dir = cache_dir
         self.timeout = timeout
+        # AcoustID allows up to 3 requests/second per application key.
+        self.limiter = limiter or AdaptiveRateLimiter(rate_per_second=3.0)
+        self.max_retries = max_retries
+        # HTTP lookups actually sent (retries excluded): multi-fingerprint POSTs and single GETs.
+        self.batch_requests = 0
+        self.single_requests = 0
+
+    @staticmethod
+    def _cache_key(fingerprint: str, duration_seconds: int) -> str:
+        return f"lookup:{duration_seconds}:{fingerprint}"
 
     def lookup(self, fingerprint: str, duration_seconds: int) -> dict[str, Any]:
-        cache_key = f"lookup:{duration_seconds}:{fingerprint}"
+        cache_key = self._cache_key(fingerprint, duration_seconds)
         cached = cache_get(self.cache_dir, "acoustid", cache_key)
         if cached is not None:
             return {"cache_hit": True, "data": cached}
         params = {
             "client": self.api_key,
-            "meta": "recordings releasegroups releases tracks compress usermeta sources",
+            "meta": ACOUSTID_META,
             "fingerprint": fingerprint,
             "duration": duration_seconds,
             "format": "json",
         }
+        self.single_requests += 1
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.get("https://api.acoustid.org/v2/lookup", params=params)
+            r = request_with_retry(
+                self.limiter,
+                lambda: client.get(ACOUSTID_LOOKUP_URL, params=params),
+                max_retries=self.max_retries,
+            )
             r.raise_for_status()
             data = r.json()
         cache_set(self.cache_dir, "acoustid", cache_key, data)
         return {"cache_hit": False, "data": data}
+
+    def lookup_batch(self, items: list[tuple[str, int]], batch_size: int = 50) -> list[dict[str, Any]]:
+        """Look up many (fingerprint, duration) pairs using AcoustID's multi-fingerprint POST form.
+
+        Results are returned in input order and share the per-fingerprint cache with `lookup`.
+        Only slots present in a batch response are cached; a slot the response left out is looked
+        up on its own rather than recorded as a permanent "no match".
+        """
+        results: list[dict[str, Any] | None] = [None] * len(items)
+        pending: list[int] = []
+        for idx, (fingerprint, duration) in enumerate(items):
+            cached = cache_get(self.cache_dir, "acoustid", self._cache_key(fingerprint, duration))
+            if cached is not None:
+                results[idx] = {"cache_hit": True, "data": cached}
+            else:
+                pending.append(idx)
+
+        with httpx.Client(timeout=self.timeout) as client:
+            for start in range(0, len(pending), max(1, batch_size)):
+                batch = pending[start : start + max(1, batch_size)]
+                form: dict[str, Any] = {"client": self.api_key, "meta": ACOUSTID_META, "format": "json"}
+                for slot, idx in enumerate(batch):
+                    fingerprint, duration = items[idx]
+                    form[f"duration.{slot}"] = str(duration)
+                    form[f"fingerprint.{slot}"] = fingerprint
+                self.batch_requests += 1
+                r = request_with_retry(
+                    self.limiter,
+                    partial(client.post, ACOUSTID_LOOKUP_URL, data=form),
+                    max_retries=self.max_retries,
+                )
+                r.raise_for_status()
+                by_slot = split_batch_response(r.json(), list(range(len(batch))))
+                for slot, idx in enumerate(batch):
+                    fingerprint, duration = items[idx]
+                    data = by_slot.get(slot)
+                    if data is None:
+                        results[idx] = self.lookup(fingerprint, duration)
+                        continue
+                    cache_set(self.cache_dir, "acoustid", self._cache_key(fingerprint, duration), data)
+                    results[idx] = {"cache_hit": False, "data": data}
+        return [r for r in results if r is not None]
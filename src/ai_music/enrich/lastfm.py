@@ -5,30 +5,47 @@ from typing import Any
 import httpx
 
 from ai_music.enrich.cache import cache_get, cache_set
+from ai_music.io.ratelimit import AdaptiveRateLimiter, request_with_retry
 
 
 class LastFMClient:
-    def __init__(self, api_key: str, cache_dir, timeout: float = 20.0):
+    def __init__(
+        self,
+        api_key: str,
+        cache_dir,
+        timeout: float = 20.0,
+        limiter: AdaptiveRateLimiter | None = None,
+        max_retries: int = 4,
+    ):
         self.api_key = api_key
         self.cache_dir = cache_dir
         self.timeout = timeout
+        # Last.fm asks clients to stay at or below ~5 requests/second.
+        self.limiter = limiter or AdaptiveRateLimiter(rate_per_second=5.0, burst=2)
+        self.max_retries = max_retries
 
-    def track_info(self, artist: str, track: str) -> dict[str, Any]:
-        cache_key = f"track_info:{artist}:{track}"
+    def _get(self, cache_key: str, params: dict[str, Any]) -> dict[str, Any]:
         cached = cache_get(self.cache_dir, "lastfm", cache_key)
         if cached is not None:
             return {"cache_hit": True, "data": cached}
-        params = {
-            "method": "track.getInfo",
-            "api_key": self.api_key,
-            "artist": artist,
-            "track": track,
-            "format": "json",
-            "autocorrect": 1,
-        }
+        params = {**params, "api_key": self.api_key, "format": "json"}
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.get("https://ws.audioscrobbler.com/2.0/", params=params)
+            r = request_with_retry(
+                self.limiter,
+                lambda: client.get("https://ws.audioscrobbler.com/2.0/", params=params),
+                max_retries=self.max_retries,
+            )
             r.raise_for_status()
             data = r.json()
         cache_set(self.cache_dir, "lastfm", cache_key, data)
         return {"cache_hit": False, "data": data}
+
+    def track_info(self, artist: str, track: str) -> dict[str, Any]:
+        return self._get(
+            f"track_info:{artist}:{track}",
+            {"method": "track.getInfo", "artist": artist, "track": track, "autocorrect": 1},
+        )
+
+    def track_info_by_mbid(self, mbid: str) -> dict[str, Any]:
+        """Exact-key lookup; Last.fm answers unknown MBIDs with an `error` payload (code 6)."""
+        return self._get(f"track_info_mbid:{mbid}", {"method": "track.getInfo", "mbid": mbid})
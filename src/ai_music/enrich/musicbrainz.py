@@ -1,38 +1,67 @@
 from __future__ import annotations
 
-import time
 from typing import Any
 
 import httpx
 
 from ai_music.enrich.cache import cache_get, cache_set
+from ai_music.io.ratelimit import AdaptiveRateLimiter, request_with_retry
 
 
 class MusicBrainzClient:
-    def __init__(self, user_agent: str, cache_dir, timeout: float = 30.0, min_interval: float = 1.1):
+    def __init__(
+        self,
+        user_agent: str,
+        cache_dir,
+        timeout: float = 30.0,
+        min_interval: float = 1.1,
+        limiter: AdaptiveRateLimiter | None = None,
+        max_retries: int = 4,
+    ):
         self.user_agent = user_agent
         self.cache_dir = cache_dir
         self.timeout = timeout
         self.min_interval = min_interval
-        self._last_call = 0.0
-
-    def _throttle(self) -> None:
-        wait = self.min_interval - (time.time() - self._last_call)
-        if wait > 0:
-            time.sleep(wait)
-        self._last_call = time.time()
+        self.limiter = limiter or AdaptiveRateLimiter(rate_per_second=1.0 / min_interval)
+        self.max_retries = max_retries
 
     def search_recording(self, query: str) -> dict[str, Any]:
         cache_key = f"search_recording:{query}"
         cached = cache_get(self.cache_dir, "musicbrainz", cache_key)
         if cached is not None:
             return {"cache_hit": True, "data": cached}
-        self._throttle()
         headers = {"User-Agent": self.user_agent}
         params = {"query": query, "fmt": "json", "limit": 5}
         with httpx.Client(timeout=self.timeout, headers=headers) as client:
-            r = client.get("https://musicbrainz.org/ws/2/recording", params=params)
+            r = request_with_retry(
+                self.limiter,
+                lambda: client.get("https://musicbrainz.org/ws/2/recording", params=params),
+                max_retries=self.max_retries,
+            )
             r.raise_for_status()
             data = r.json()
         cache_set(self.cache_dir, "musicbrainz", cache_key, data)
         return {"cache_hit": False, "data": data}
+
+    def lookup_isrc(self, isrc: str) -> dict[str, Any]:
+        """Resolve recordings by ISRC; unknown ISRCs return (and cache) an empty recording list."""
+        isrc = isrc.strip().upper()
+        cache_key = f"isrc:{isrc}"
+        cached = cache_get(self.cache_dir, "musicbrainz", cache_key)
+        if cached is not None:
+            return {"cache_hit": True, "data": cached}
+        headers = {"User-Agent": self.user_agent}
+        params = {"fmt": "json", "inc": "artist-credits"}
+        with httpx.Client(timeout=self.timeout, headers=headers) as client:
+            r = request_with_retry(
+                self.limiter,
+                lambda: client.get(f"https://musicbrainz.org/ws/2/isrc/{isrc}", params=params),
+                max_retries=self.max_retries,
+            )
+            if r.status_code == 404:
+                data: dict[str, Any] = {"isrc": isrc, "recordings": []}
+            else:
+                r.raise_for_status()
+                data = r.json()
+        cache_set(self.cache_dir, "musicbrainz", cache_key, data)
+        return {"cache_hit": False, "data": data}
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import json
+import lzma
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from ai_music.io.files import ensure_parent, normalize_loose
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    mbid TEXT PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recording_keys (
+    title_key TEXT NOT NULL,
+    artist_key TEXT NOT NULL,
+    mbid TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recording_isrcs (
+    isrc TEXT NOT NULL,
+    mbid TEXT NOT NULL
+);
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_recording_keys_title_artist ON recording_keys (title_key, artist_key);
+CREATE INDEX IF NOT EXISTS idx_recording_isrcs ON recording_isrcs (isrc);
+"""
+
+
+def _open_dump(path: Path):
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if suffix == ".xz":
+        return lzma.open(path, "rt", encoding="utf-8")
+    if suffix == ".bz2":
+        return bz2.open(path, "rt", encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def iter_dump_recordings(dump_path: Path) -> Iterator[dict[str, Any]]:
+    """Yield recording documents from a MusicBrainz JSON dump (one JSON document per line)."""
+    with _open_dump(dump_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                doc = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(doc, dict) and doc.get("id") and doc.get("title"):
+                yield doc
+
+
+def compact_recording(doc: dict[str, Any]) -> dict[str, Any]:
+    """Reduce a dump document to the fields the web service search returns and enrichment uses."""
+    credits = []
+    for credit in doc.get("artist-credit") or []:
+        if not isinstance(credit, dict):
+            continue
+        artist = credit.get("artist") or {}
+        credits.append(
+            {
+                "name": credit.get("name") or artist.get("name"),
+                "joinphrase": credit.get("joinphrase", ""),
+                "artist": {"id": artist.get("id"), "name": artist.get("name")},
+            }
+        )
+    return {
+        "id": doc["id"],
+        "title": doc["title"],
+        "length": doc.get("length"),
+        "disambiguation": doc.get("disambiguation") or "",
+        "artist-credit": credits,
+        "isrcs": list(doc.get("isrcs") or []),
+    }
+
+
+def _artist_keys(recording: dict[str, Any]) -> set[str]:
+    keys: set[str] = set()
+    phrase = ""
+    for credit in recording.get("artist-credit") or []:
+        for name in (credit.get("name"), (credit.get("artist") or {}).get("name")):
+            if name:
+                keys.add(normalize_loose(name))
+        phrase += f"{credit.get('name') or ''}{credit.get('joinphrase') or ''}"
+    if phrase:
+        keys.add(normalize_loose(phrase))
+    keys.discard("")
+    return keys
+
+
+def build_musicbrainz_index(dump_path: Path, index_path: Path, batch_size: int = 5000) -> dict[str, Any]:
+    ensure_parent(index_path)
+    tmp_path = index_path.with_suffix(index_path.suffix + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(_SCHEMA)
+    recording_count = 0
+    key_count = 0
+    isrc_count = 0
+    recordings: list[tuple[str, str]] = []
+    keys: list[tuple[str, str, str]] = []
+    isrcs: list[tuple[str, str]] = []
+
+    def flush() -> None:
+        conn.executemany("INSERT OR REPLACE INTO recordings (mbid, payload) VALUES (?, ?)", recordings)
+        conn.executemany("INSERT INTO recording_keys (title_key, artist_key, mbid) VALUES (?, ?, ?)", keys)
+        conn.executemany("INSERT INTO recording_isrcs (isrc, mbid) VALUES (?, ?)", isrcs)
+        recordings.clear()
+        keys.clear()
+        isrcs.clear()
+
+    for doc in iter_dump_recordings(dump_path):
+        recording = compact_recording(doc)
+        title_key = normalize_loose(recording["title"])
+        if not title_key:
+            continue
+        recordings.append((recording["id"], json.dumps(recording, ensure_ascii=False)))
+        # The empty artist key supports title-only lookups for rows without a parsed artist.
+        for artist_key in _artist_keys(recording) | {""}:
+            keys.append((title_key, artist_key, recording["id"]))
+            key_count += 1
+        for isrc in recording["isrcs"]:
+            isrcs.append((str(isrc).strip().upper(), recording["id"]))
+            isrc_count += 1
+        recording_count += 1
+        if len(recordings) >= batch_size:
+            flush()
+    flush()
+    conn.executescript(_INDEXES)
+    conn.commit()
+    conn.close()
+    tmp_path.replace(index_path)
+    return {
+        "dump_path": str(dump_path),
+        "index_path": str(index_path),
+        "recording_count": recording_count,
+        "key_count": key_count,
+        "isrc_count": isrc_count,
+    }
+
+
+class LocalMusicBrainzIndex:
+    def __init__(self, index_path: Path):
+        if not index_path.exists():
+            raise FileNotFoundError(f"Missing local MusicBrainz index: {index_path}. Run `metadata mb-index` first.")
+        self.index_path = index_path
+        self._conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def search(self, title: str, artist: str | None = None, limit: int = 5) -> list[dict[str, Any]]:
+        title_key = normalize_loose(title)
+        if not title_key:
+            return []
+        artist_key = normalize_loose(artist) if artist else ""
+        rows = self._conn.execute(
+            "SELECT DISTINCT r.payload FROM recording_keys k JOIN recordings r ON r.mbid = k.mbid "
+            "WHERE k.title_key = ? AND k.artist_key = ? LIMIT ?",
+            (title_key, artist_key, limit),
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def search_recording(self, title: str, artist: str | None = None, limit: int = 5) -> dict[str, Any] | None:
+        """Answer like `MusicBrainzClient.search_recording`, or return None on a miss."""
+        recordings = self.search(title, artist, limit=limit)
+        if not recordings:
+            return None
+        return {"cache_hit": False, "source": "local", "data": {"recordings": recordings}}
+
+    def lookup_isrc(self, isrc: str) -> dict[str, Any] | None:
+        rows = self._conn.execute(
+            "SELECT DISTINCT r.payload FROM recording_isrcs i JOIN recordings r ON r.mbid = i.mbid WHERE i.isrc = ?",
+            (isrc.strip().upper(),),
+        ).fetchall()
+        if not rows:
+            return None
+        return {"cache_hit": False, "source": "local", "data": {"recordings": [json.loads(p) for (p,) in rows]}}
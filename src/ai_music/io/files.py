@@ -3,6 +3,7 @@ from __future__ import annotations
 import csv
 import hashlib
 import json
+import os
 import re
 from pathlib import Path
 from typing import Any, Iterable
@@ -51,6 +52,41 @@ def write_jsonl(path: Path, rows: Iterable[Any]) -> None:
             f.write("\n")
 
 
+def append_jsonl(path: Path, row: Any) -> None:
+    ensure_parent(path)
+    if orjson is not None:
+        line = orjson.dumps(row) + b"\n"
+    else:
+        line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+    with path.open("a+b") as f:
+        # A crash mid-write can leave the last line unterminated; start a fresh line so the new
+        # row is not glued onto the partial one (which `read_jsonl(skip_invalid=True)` drops).
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+
+
+def read_jsonl(path: Path, skip_invalid: bool = False) -> list[Any]:
+    rows: list[Any] = []
+    if not path.exists():
+        return rows
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a truncated trailing line in append-only journals.
+                if not skip_invalid:
+                    raise
+    return rows
+
+
 def write_csv(path: Path, rows: list[dict[str, Any]], fieldnames: list[str]) -> None:
     ensure_parent(path)
     with path.open("w", encoding="utf-8", newline="") as f:
@@ -1,79 +1,229 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable
 
 from ai_music.io.files import read_text, stable_hash
+from ai_music.llm.tokens import TokenCounter, count_tokens, get_token_counter
 from ai_music.models.types import GuideChunk
+from ai_music.retrieval.keywords import keyword_tagger
 
 
 HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+# Split points for oversized sections, coarsest first: blank lines, line breaks, sentence ends.
+_SPLIT_LEVELS = (
+    (re.compile(r"\n\s*\n"), "\n\n"),
+    (re.compile(r"\n"), "\n"),
+    (re.compile(r"(?<=[.!?])\s+"), " "),
+)
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+|\n+")
 
 
 def _tag_chunk(text: str, heading_path: list[str]) -> list[str]:
-    corpus = " ".join(heading_path + [text[:600]]).lower()
-    tags: set[str] = set()
-    if any(k in corpus for k in ["prompt", "suno", "meta tag", "gmiv"]):
-        tags.add("prompting")
-    if any(k in corpus for k in ["lyric", "chorus", "verse", "vocal"]):
-        tags.add("lyrics")
-    if any(k in corpus for k in ["arrangement", "structure", "drop", "breakdown", "build"]):
-        tags.add("arrangement")
-    if any(k in corpus for k in ["mix", "master", "eq", "compression"]):
-        tags.add("mixing-mastering")
-    if any(k in corpus for k in ["bass", "drum", "sound design", "instrument"]):
-        tags.add("production-technique")
-    if any(k in corpus for k in ["workflow", "process", "testing methodology"]):
-        tags.add("workflow")
-    return sorted(tags) or ["general"]
-
-
-def chunk_markdown(path: Path) -> list[GuideChunk]:
-    text = read_text(path)
-    lines = text.splitlines()
-    heading_stack: list[str] = []
-    chunk_lines: list[str] = []
-    current_heading_path: list[str] = [path.stem]
-    chunks: list[GuideChunk] = []
+    corpus = " ".join(heading_path + [text[:600]])
+    return sorted(keyword_tagger("doc_tags").tags(corpus)) or ["general"]
 
-    def flush() -> None:
-        nonlocal chunk_lines, current_heading_path
-        body = "\n".join(chunk_lines).strip()
-        if not body:
-            chunk_lines = []
-            return
-        chunk_id = f"gc_{stable_hash(path.name, ' > '.join(current_heading_path), body[:500])}"
-        chunks.append(
-            GuideChunk(
-                chunk_id=chunk_id,
-                source_file=path.name,
-                heading_path=current_heading_path.copy(),
-                text=body,
-                tags=_tag_chunk(body, current_heading_path),
-                token_estimate=max(1, len(body.split())),
-            )
-        )
-        chunk_lines = []
 
+def _split_units(text: str, max_tokens: int, counter: TokenCounter, level: int = 0) -> list[tuple[str, str, int]]:
+    """Break `text` into `(joiner, piece, tokens)` units of at most `max_tokens`.
+
+    Paragraphs are kept whole when they fit, then lines, then sentences; a sentence that is still
+    too long is cut at token boundaries. `joiner` is the separator that preceded the piece.
+    """
+    tokens = counter.count(text)
+    if tokens <= max_tokens:
+        return [("", text, tokens)]
+    if level == len(_SPLIT_LEVELS):
+        slices: list[tuple[str, str, int]] = []
+        joiner = ""
+        rest = text
+        while rest:
+            # Truncating a bounded window keeps each cut cheap on a huge unpunctuated run.
+            window = rest[: max_tokens * 16]
+            piece = counter.truncate(window, max_tokens)
+            if len(piece) < len(rest) and not rest[len(piece)].isspace():
+                # Back off to the last space rather than cut a word in half.
+                words = piece.rsplit(None, 1)
+                if len(words) == 2:
+                    piece = words[0]
+            piece = piece.rstrip() or window[:1]
+            slices.append((joiner, piece, counter.count(piece)))
+            tail = rest[len(piece) :]
+            rest = tail.lstrip()
+            joiner = " " if len(rest) < len(tail) else ""
+        return slices
+    pattern, joiner = _SPLIT_LEVELS[level]
+    units: list[tuple[str, str, int]] = []
+    for piece in (p.strip() for p in pattern.split(text)):
+        if piece:
+            sub = _split_units(piece, max_tokens, counter, level + 1)
+            units.append((joiner if units else "", sub[0][1], sub[0][2]))
+            units.extend(sub[1:])
+    return units
+
+
+def _overlap_tail(text: str, overlap_tokens: int, counter: TokenCounter) -> str:
+    """The longest suffix of `text` that starts at a sentence or line boundary and fits `overlap_tokens`."""
+    tail = ""
+    for match in reversed(list(_SENTENCE_BOUNDARY_RE.finditer(text))):
+        candidate = text[match.end() :]
+        if counter.count(candidate) > overlap_tokens:
+            break
+        tail = candidate
+    return tail
+
+
+def split_section(text: str, max_tokens: int, overlap_tokens: int = 0) -> list[str]:
+    """Split a section body into parts of at most `max_tokens`, preferring paragraph boundaries.
+
+    Each part after the first starts with up to `overlap_tokens` of the previous part's closing
+    sentences, so a retrieval hit or packed chunk keeps the context it continues from.
+    """
+    counter = get_token_counter()
+    if counter.count(text) <= max_tokens:
+        return [text]
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    parts: list[str] = []
+    current = ""
+    used = 0
+    for joiner, piece, tokens in _split_units(text, max_tokens, counter):
+        # One token per joiner keeps the running total an upper bound on the joined count.
+        if current and used + tokens + 1 > max_tokens:
+            parts.append(current)
+            current = _overlap_tail(current, overlap_tokens, counter) if overlap_tokens else ""
+            used = counter.count(current) + 1 if current else 0
+            if used + tokens > max_tokens:
+                current, used = "", 0
+        if current:
+            current = f"{current}{joiner}{piece}"
+            used += tokens + 1
+        else:
+            current, used = piece, tokens
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _make_chunks(
+    source_file: str,
+    heading_path: list[str],
+    chunk_lines: list[str],
+    max_tokens: int | None = None,
+    overlap_tokens: int = 0,
+) -> list[GuideChunk]:
+    body = "\n".join(chunk_lines).strip()
+    if not body:
+        return []
+    section_id = f"gc_{stable_hash(source_file, ' > '.join(heading_path), body[:500])}"
+    parts = split_section(body, max_tokens, overlap_tokens) if max_tokens else [body]
+    if len(parts) == 1:
+        # A section that fits keeps its historical ID.
+        return [_chunk(section_id, source_file, heading_path, body)]
+    return [
+        _chunk(f"{section_id}_{stable_hash(str(i), part, length=8)}", source_file, heading_path, part, section_id)
+        for i, part in enumerate(parts)
+    ]
+
+
+def _chunk(
+    chunk_id: str, source_file: str, heading_path: list[str], text: str, parent_chunk_id: str | None = None
+) -> GuideChunk:
+    return GuideChunk(
+        chunk_id=chunk_id,
+        source_file=source_file,
+        heading_path=heading_path.copy(),
+        text=text,
+        tags=_tag_chunk(text, heading_path),
+        token_estimate=max(1, count_tokens(text)),
+        parent_chunk_id=parent_chunk_id,
+    )
+
+
+def _chunks_from_lines(
+    lines: Iterable[str], stem: str, source_file: str, max_tokens: int | None = None, overlap_tokens: int = 0
+) -> Iterator[GuideChunk]:
+    """Heading-scoped chunking over a line stream; only the current section is held in memory."""
+    heading_stack: list[str] = []
+    chunk_lines: list[str] = []
+    current_heading_path: list[str] = [stem]
     for line in lines:
         m = HEADING_RE.match(line)
         if m:
-            flush()
+            yield from _make_chunks(source_file, current_heading_path, chunk_lines, max_tokens, overlap_tokens)
+            chunk_lines = []
             level = len(m.group(1))
             title = m.group(2).strip()
             while len(heading_stack) >= level:
                 heading_stack.pop()
             heading_stack.append(title)
-            current_heading_path = [path.stem] + heading_stack.copy()
+            current_heading_path = [stem] + heading_stack.copy()
             continue
         chunk_lines.append(line)
-    flush()
-    return chunks
+    yield from _make_chunks(source_file, current_heading_path, chunk_lines, max_tokens, overlap_tokens)
+
+
+def _stream_lines(path: Path) -> Iterator[str]:
+    # Same decoding and newline translation as `read_text`; re-splitting each physical line
+    # matches `str.splitlines`, which also breaks on form feeds and Unicode separators.
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            yield from line.splitlines()
+
+
+def chunk_markdown(
+    path: Path, source_file: str | None = None, max_tokens: int | None = None, overlap_tokens: int = 0
+) -> list[GuideChunk]:
+    """Split a markdown file into heading-scoped chunks.
+
+    `source_file` names the doc in chunk IDs and provenance; it defaults to the file name, and
+    nested docs pass their path relative to the docs root so same-named files stay distinct.
+    With `max_tokens`, longer sections are split into overlapping parts (see `split_section`)
+    whose IDs derive from the section's ID, which they record as `parent_chunk_id`.
+    """
+    lines = read_text(path).splitlines()
+    return list(_chunks_from_lines(lines, path.stem, source_file or path.name, max_tokens, overlap_tokens))
+
+
+def iter_markdown_chunks(
+    path: Path, source_file: str | None = None, max_tokens: int | None = None, overlap_tokens: int = 0
+) -> Iterator[GuideChunk]:
+    """Streaming variant of `chunk_markdown` for very large exports: reads the file line by line
+    and yields each chunk as its section ends. Produces exactly the same chunks."""
+    return _chunks_from_lines(_stream_lines(path), path.stem, source_file or path.name, max_tokens, overlap_tokens)
+
+
+def _chunk_job(job: tuple[Path, str | None, bool, int | None, int]) -> list[GuideChunk]:
+    path, source_file, stream, max_tokens, overlap_tokens = job
+    if stream:
+        return list(iter_markdown_chunks(path, source_file, max_tokens, overlap_tokens))
+    return chunk_markdown(path, source_file, max_tokens, overlap_tokens)
+
 
+def iter_doc_chunks(
+    doc_paths: Iterable[Path],
+    source_files: Iterable[str | None] | None = None,
+    workers: int = 1,
+    stream_min_bytes: int | None = None,
+    max_tokens: int | None = None,
+    overlap_tokens: int = 0,
+) -> list[GuideChunk]:
+    """Chunk several docs, optionally one document per worker process.
 
-def iter_doc_chunks(doc_paths: Iterable[Path]) -> list[GuideChunk]:
-    chunks: list[GuideChunk] = []
-    for path in doc_paths:
-        chunks.extend(chunk_markdown(path))
-    return chunks
+    Results keep `doc_paths` order, so parallel output is identical to serial output. Files of
+    at least `stream_min_bytes` are chunked with the streaming reader. `max_tokens` and
+    `overlap_tokens` are passed through to `chunk_markdown`.
+    """
+    paths = list(doc_paths)
+    names = list(source_files) if source_files is not None else [None] * len(paths)
+    jobs: list[tuple[Path, str | None, bool, int | None, int]] = []
+    for path, name in zip(paths, names, strict=True):
+        stream = stream_min_bytes is not None and path.stat().st_size >= stream_min_bytes
+        jobs.append((path, name, stream, max_tokens, overlap_tokens))
+    if workers <= 1 or len(jobs) <= 1:
+        per_doc = [_chunk_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            per_doc = list(pool.map(_chunk_job, jobs))
+    return [chunk for chunks in per_doc for chunk in chunks]
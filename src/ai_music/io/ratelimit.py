@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """Parse a Retry-After header given either as delta-seconds or as an HTTP date."""
+    if value is None:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    current = now or datetime.now(timezone.utc)
+    return max(0.0, (when - current).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket on the monotonic clock with AIMD backoff on throttling responses.
+
+    The bucket is implemented as a GCRA schedule: each call reserves the next slot, so concurrent
+    callers are spread out instead of bursting after a shared sleep. Throttling halves the rate and
+    blocks all callers until the backoff (or Retry-After) elapses; successes recover the rate additively.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int = 1,
+        min_rate_per_second: float | None = None,
+        base_backoff: float = 1.0,
+        max_backoff: float = 120.0,
+        jitter: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+    ):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive.")
+        self.max_rate = rate_per_second
+        self.min_rate = min_rate_per_second or rate_per_second / 16
+        self.rate = rate_per_second
+        self.burst = max(1, burst)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._tat = 0.0
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+        self.calls = 0
+        self.throttled = 0
+        self.retried = 0
+        self.waited_seconds = 0.0
+
+    def acquire(self) -> float:
+        with self._lock:
+            now = self._clock()
+            interval = 1.0 / self.rate
+            tat = max(self._tat, now)
+            start = max(now, tat - (self.burst - 1) * interval, self._blocked_until)
+            self._tat = max(tat, start) + interval
+            self.calls += 1
+            wait = start - now
+            self.waited_seconds += wait
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def on_throttled(self, retry_after: float | None = None) -> float:
+        with self._lock:
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** (self._consecutive_throttles - 1)))
+            backoff *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+            delay = max(retry_after or 0.0, backoff)
+            self._blocked_until = max(self._blocked_until, self._clock() + delay)
+            return delay
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retried += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "retried": self.retried,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "current_rate_per_second": round(self.rate, 4),
+                "max_rate_per_second": round(self.max_rate, 4),
+            }
+
+
+def request_with_retry(
+    limiter: AdaptiveRateLimiter,
+    send: Callable[[], httpx.Response],
+    max_retries: int = 4,
+    retry_statuses: frozenset[int] = THROTTLE_STATUSES,
+) -> httpx.Response:
+    """Send a request through the limiter, backing off and retrying throttled or failed transports.
+
+    Returns the final response; callers still decide how to handle non-retryable statuses.
+    """
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            response = send()
+        except httpx.TransportError:
+            if attempt >= max_retries:
+                raise
+            limiter.on_throttled()
+        else:
+            if response.status_code not in retry_statuses:
+                limiter.on_success()
+                return response
+            limiter.on_throttled(parse_retry_after(response.headers.get("Retry-After")))
+            if attempt >= max_retries:
+                return response
+        attempt += 1
+        limiter.record_retry()
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import re
+import threading
+from collections.abc import Iterator
 from typing import Any, Protocol
 
 
-JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+# Inside an object, a whole JSON string (escapes included) or a brace is one token, so the
+# Python loop only runs per string/brace and never per character.
+_JSON_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]', re.DOTALL)
+# A `{` that starts a JSON object is followed by a key or closes at once.
+_OBJECT_START_RE = re.compile(r'\{\s*["}]')
+_FENCE = "```"
 
 
 class LLMClient(Protocol):
@@ -23,13 +31,149 @@ class LLMClient(Protocol):
     ) -> dict[str, Any]: ...
 
 
+class AsyncLLMClient(LLMClient, Protocol):
+    async def agenerate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str: ...
+
+    async def agenerate_structured(
+        self,
+        task_name: str,
+        inputs: dict[str, Any],
+        schema: dict[str, Any],
+        model: str | None = None,
+        max_attempts: int = 2,
+    ) -> dict[str, Any]: ...
+
+
+class StructuredCallStats:
+    """Thread-safe per-task counters for structured generation (calls, repairs, native fallbacks)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_task: dict[str, dict[str, int]] = {}
+
+    def record(self, task_name: str, field: str, amount: int = 1) -> None:
+        with self._lock:
+            row = self._by_task.setdefault(task_name, {"calls": 0, "repairs": 0, "native": 0, "native_fallbacks": 0})
+            row[field] = row.get(field, 0) + amount
+
+    def as_dict(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {task: dict(row) for task, row in sorted(self._by_task.items())}
+
+    @classmethod
+    def merged(cls, parts: list[StructuredCallStats]) -> StructuredCallStats:
+        out = cls()
+        for part in parts:
+            for task, row in part.as_dict().items():
+                for field, amount in row.items():
+                    out.record(task, field, amount)
+        return out
+
+
+async def agenerate(llm: Any, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+    """Await the client's native async `agenerate`, or run the sync `generate` in a worker thread."""
+    method = getattr(llm, "agenerate", None)
+    if method is not None:
+        return await method(system, user, model=model, **kwargs)
+    return await asyncio.to_thread(llm.generate, system, user, model, **kwargs)
+
+
+async def agenerate_structured(
+    llm: Any,
+    task_name: str,
+    inputs: dict[str, Any],
+    schema: dict[str, Any],
+    model: str | None = None,
+    max_attempts: int = 2,
+) -> dict[str, Any]:
+    """Async counterpart of `generate_structured` that also accepts sync-only clients."""
+    method = getattr(llm, "agenerate_structured", None)
+    if method is not None:
+        return await method(task_name=task_name, inputs=inputs, schema=schema, model=model, max_attempts=max_attempts)
+    return await asyncio.to_thread(
+        llm.generate_structured,
+        task_name=task_name,
+        inputs=inputs,
+        schema=schema,
+        model=model,
+        max_attempts=max_attempts,
+    )
+
+
+def iter_json_object_spans(text: str, start: int = 0, end: int | None = None) -> Iterator[tuple[int, int]]:
+    """Yield `(start, end)` of each balanced top-level `{...}` in one pass over `text[start:end]`.
+
+    Braces inside JSON strings (and escaped quotes within them) are ignored, so lyric lines such
+    as `"{chorus}"` do not unbalance the scan. Prose between objects is skipped, including a
+    stray `{` that never closes: objects completed after it are still yielded, once the scan
+    reaches the end. Objects inside an unclosed `{` that opens like JSON (a truncated answer) are not.
+    """
+    end = len(text) if end is None else end
+    pos = start
+    while True:
+        obj_start = text.find("{", pos, end)
+        if obj_start == -1:
+            return
+        open_braces: list[int] = []
+        # Outermost objects completed while an earlier `{` is still open.
+        completed: list[tuple[int, int]] = []
+        for match in _JSON_TOKEN_RE.finditer(text, obj_start, end):
+            token = match.group()
+            if token == "{":
+                open_braces.append(match.start())
+            elif token == "}":
+                span = (open_braces.pop(), match.end())
+                if not open_braces:
+                    yield span
+                    pos = match.end()
+                    break
+                while completed and completed[-1][0] > span[0]:
+                    completed.pop()
+                completed.append(span)
+        else:
+            # Unbalanced tail. Everything inside the first unclosed `{` that opens like JSON is
+            # part of a truncated answer; objects before it sit after stray prose braces.
+            cutoff = next((p for p in open_braces if _OBJECT_START_RE.match(text, p, end)), end)
+            yield from (span for span in completed if span[0] < cutoff)
+            return
+
+
+def _fenced_region(text: str) -> tuple[int, int] | None:
+    opening = text.find(_FENCE)
+    if opening == -1:
+        return None
+    closing = text.find(_FENCE, opening + len(_FENCE))
+    if closing == -1:
+        return None
+    # Skip the info string (```json) when the fence opens on its own line.
+    newline = text.find("\n", opening, closing)
+    return (newline + 1 if newline != -1 else opening + len(_FENCE)), closing
+
+
 def extract_json_object(text: str) -> dict[str, Any]:
-    text = text.strip()
-    match = JSON_BLOCK_RE.search(text)
-    if match:
-        return json.loads(match.group(1))
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return json.loads(text[start : end + 1])
-    return json.loads(text)
+    """Return the first complete top-level JSON object in an LLM response.
+
+    A fenced code block is searched first, then the whole text. Candidates are parsed in order
+    until one is a JSON object, so leading prose and trailing commentary (braces included) are
+    tolerated. The scan and the parses are each linear in the response length.
+    """
+    regions = [(0, len(text))]
+    fenced = _fenced_region(text)
+    if fenced is not None:
+        regions.insert(0, fenced)
+    first_error: ValueError | None = None
+    for region_start, region_end in regions:
+        for start, end in iter_json_object_spans(text, region_start, region_end):
+            try:
+                value = json.loads(text[start:end])
+            except ValueError as exc:
+                first_error = first_error or exc
+                continue
+            if isinstance(value, dict):
+                return value
+    if first_error is not None:
+        raise first_error
+    value = json.loads(text)
+    if not isinstance(value, dict):
+        raise ValueError(f"Expected a JSON object, got {type(value).__name__}")
+    return value
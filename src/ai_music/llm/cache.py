@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from ai_music.io.files import ensure_parent
+
+
+DEFAULT_LLM_CACHE_TTL_SECONDS = 30 * 24 * 3600.0
+DEFAULT_LLM_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def schema_hash(schema: dict[str, Any] | None) -> str:
+    if not schema:
+        return ""
+    return hashlib.sha1(json.dumps(schema, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Content-addressed store of raw LLM completions under `cache/llm/`.
+
+    Entries expire after `ttl_seconds`. Hits refresh the file mtime, so size-based eviction
+    removes the least recently used entries first once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl_seconds: float | None = DEFAULT_LLM_CACHE_TTL_SECONDS,
+        max_bytes: int = DEFAULT_LLM_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root = cache_dir / "llm"
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._size_bytes: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str | None,
+        system: str,
+        user: str,
+        temperature: float | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> str:
+        material = json.dumps(
+            [provider, model or "", system, user, temperature, schema_hash(schema)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        path = self.path_for(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        now = self._clock()
+        if self.ttl_seconds is not None and now - float(entry.get("created_at", 0)) > self.ttl_seconds:
+            self.delete(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry.get("response")
+
+    def set(self, key: str, response: str, meta: dict[str, Any] | None = None) -> Path:
+        path = self.path_for(key)
+        ensure_parent(path)
+        now = self._clock()
+        payload = json.dumps(
+            {"created_at": now, "response": response, "meta": meta or {}},
+            ensure_ascii=False,
+        )
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(payload, encoding="utf-8")
+        with self._lock:
+            # Rewriting a key replaces its file, so only the size difference counts.
+            try:
+                replaced_size = path.stat().st_size
+            except OSError:
+                replaced_size = 0
+            tmp_path.replace(path)
+            os.utime(path, (now, now))
+            if self._size_bytes is None:
+                self._current_size()
+            else:
+                self._size_bytes += len(payload.encode("utf-8")) - replaced_size
+            over_limit = self._size_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return path
+
+    def delete(self, key: str) -> None:
+        path = self.path_for(key)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._size_bytes is not None:
+                self._size_bytes = max(0, self._size_bytes - size)
+
+    def _current_size(self) -> int:
+        if self._size_bytes is None:
+            self._size_bytes = sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+        return self._size_bytes
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits in `max_bytes`."""
+        with self._lock:
+            entries = []
+            for p in self.root.glob("*/*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, p in sorted(entries, key=lambda e: (e[0], str(e[2]))):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._size_bytes = total
+            self.evictions += removed
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_bytes": self._size_bytes,
+            }
+
+
+def build_llm_cache(cache_dir: Path, enabled: bool = True) -> LLMResponseCache | None:
+    return LLMResponseCache(cache_dir) if enabled else None
@@ -1,32 +1,310 @@
 from __future__ import annotations
 
 import json
+import time
 from typing import Any
 
 import httpx
 
-from ai_music.llm.base import extract_json_object
+from ai_music.llm.base import StructuredCallStats, extract_json_object
+from ai_music.llm.cache import LLMResponseCache
+from ai_music.llm.streaming import (
+    IncrementalJSONValidator,
+    StreamConsumer,
+    StreamMetrics,
+    StreamValidationError,
+    ollama_delta,
+)
+from ai_music.llm.telemetry import (
+    LLMTelemetry,
+    llm_span,
+    note_attempt,
+    note_cache_hit,
+    note_estimated_usage,
+    note_ttft,
+    note_usage,
+)
+
+
+DEFAULT_MODEL = "llama3.1:8b"
+
+# Identical for every structured task so the chat template prefix (and its KV cache entries)
+# is shared by the brief, fragment and structure-enforcement passes of a docs group.
+STRUCTURED_SYSTEM_PROMPT = "Return only valid JSON. No markdown."
+# Inputs that carry retrieved guide text; the docs pipeline names them per task.
+GUIDE_CONTEXT_KEYS = ("guide_sections", "source_chunks", "guide_context")
+
+
+def _guide_context(sections: list[dict[str, Any]]) -> str:
+    # Only heading path and text, so a chunk renders the same bytes whichever task packed it.
+    return "\n\n".join(
+        f"## {' > '.join(section.get('heading_path') or [])}\n{section.get('text', '')}" for section in sections
+    )
 
 
 class OllamaClient:
+    """Ollama client using `/api/chat` by default.
+
+    `keep_alive` keeps the model resident between calls and `num_ctx` is pinned on every
+    request, because a request with a different context size makes Ollama reload the model
+    and discard its prompt cache. `use_chat=False` keeps the legacy `/api/generate` path.
+    """
+
     provider_name = "ollama"
+    default_model = DEFAULT_MODEL
 
-    def __init__(self, base_url: str = "http://localhost:11434", timeout: float = 120.0):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        timeout: float = 120.0,
+        cache: LLMResponseCache | None = None,
+        stream: bool = False,
+        native_structured: bool = True,
+        use_chat: bool = True,
+        keep_alive: str | None = "30m",
+        num_ctx: int | None = 8192,
+        telemetry: LLMTelemetry | None = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.use_chat = use_chat
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.cache = cache
+        self.stream = stream
+        self.stream_metrics: list[StreamMetrics] = []
+        self.native_structured = native_structured
+        # Models (or older servers) that rejected `format`; they fall back to schema-in-prompt mode.
+        self.native_unsupported: set[str] = set()
+        self.structured_stats = StructuredCallStats()
+        self.telemetry = telemetry
 
-    def generate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
-        payload = {
-            "model": model or "llama3.1:8b",
-            "prompt": f"{system}\n\n{user}",
-            "stream": False,
-            "options": {"temperature": kwargs.get("temperature", 0.2)},
+    @property
+    def _endpoint(self) -> str:
+        return f"{self.base_url}/api/chat" if self.use_chat else f"{self.base_url}/api/generate"
+
+    def _options(self, temperature: float | None = None) -> dict[str, Any]:
+        options: dict[str, Any] = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        return options
+
+    def _generate_payload(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> dict[str, Any]:
+        payload: dict[str, Any] = {"model": model or DEFAULT_MODEL, "stream": self.stream}
+        if self.use_chat:
+            payload["messages"] = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        else:
+            payload["prompt"] = f"{system}\n\n{user}"
+        payload["options"] = self._options(kwargs.get("temperature", 0.2))
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if kwargs.get("response_schema"):
+            payload["format"] = kwargs["response_schema"]
+        return payload
+
+    def _response_text(self, payload: dict[str, Any], data: dict[str, Any]) -> str:
+        if self.use_chat:
+            text = (data.get("message") or {}).get("content", "")
+        else:
+            text = data.get("response", "")
+        if "eval_count" in data:
+            note_usage(data.get("prompt_eval_count"), data.get("eval_count"), model=data.get("model"))
+        else:
+            note_estimated_usage(payload, text)
+        return text
+
+    def _warm_up_payload(self, model: str | None) -> dict[str, Any]:
+        # An empty chat/prompt only loads the model; options must match real calls to avoid a reload.
+        payload: dict[str, Any] = {"model": model or DEFAULT_MODEL, "stream": False, "options": self._options()}
+        if self.use_chat:
+            payload["messages"] = []
+        else:
+            payload["prompt"] = ""
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def warm_up(self, model: str | None = None) -> dict[str, Any]:
+        """Load `model` into memory before a pipeline run so the first real call is not a cold start."""
+        payload = self._warm_up_payload(model)
+        started = time.perf_counter()
+        try:
+            with httpx.Client(timeout=self.timeout) as client:
+                r = client.post(self._endpoint, json=payload)
+                r.raise_for_status()
+        except Exception as exc:  # noqa: BLE001
+            return {"provider": self.provider_name, "model": payload["model"], "loaded": False, "error": str(exc)}
+        return {
+            "provider": self.provider_name,
+            "model": payload["model"],
+            "loaded": True,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
         }
+
+    def _cache_key(
+        self, system: str, user: str, payload: dict[str, Any], schema: dict[str, Any] | None = None
+    ) -> str | None:
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            self.provider_name, payload["model"], system, user, payload["options"].get("temperature"), schema
+        )
+
+    def _forget_cached(self, system: str, user: str, model: str | None, schema: dict[str, Any]) -> None:
+        """Drop a cached answer that failed parsing so the next run asks the provider again."""
+        key = self._cache_key(system, user, self._generate_payload(system, user, model=model), schema)
+        if key is not None:
+            self.cache.delete(key)
+
+    def _validator(self, schema: dict[str, Any] | None) -> IncrementalJSONValidator | None:
+        return IncrementalJSONValidator(schema) if schema else None
+
+    def _complete(self, payload: dict[str, Any], schema: dict[str, Any] | None = None) -> str:
+        url = self._endpoint
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.post(f"{self.base_url}/api/generate", json=payload)
-            r.raise_for_status()
-            data = r.json()
-        return data.get("response", "")
+            if not payload["stream"]:
+                r = client.post(url, json=payload)
+                r.raise_for_status()
+                return self._response_text(payload, r.json())
+            consumer = StreamConsumer(self.provider_name, payload["model"], self._validator(schema))
+            aborted: str | None = None
+            try:
+                with client.stream("POST", url, json=payload) as r:
+                    r.raise_for_status()
+                    for line in r.iter_lines():
+                        if not line.strip():
+                            continue
+                        delta, done = ollama_delta(line)
+                        consumer.feed(delta)
+                        if done or consumer.complete:
+                            break
+            except StreamValidationError as exc:
+                aborted = str(exc)
+                raise
+            finally:
+                metrics = consumer.metrics(aborted)
+                self.stream_metrics.append(metrics)
+                note_ttft(metrics.ttft_seconds)
+                note_estimated_usage(payload, consumer.text)
+            return consumer.text
+
+    async def _acomplete(self, payload: dict[str, Any], schema: dict[str, Any] | None = None) -> str:
+        url = self._endpoint
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            if not payload["stream"]:
+                r = await client.post(url, json=payload)
+                r.raise_for_status()
+                return self._response_text(payload, r.json())
+            consumer = StreamConsumer(self.provider_name, payload["model"], self._validator(schema))
+            aborted: str | None = None
+            try:
+                async with client.stream("POST", url, json=payload) as r:
+                    r.raise_for_status()
+                    async for line in r.aiter_lines():
+                        if not line.strip():
+                            continue
+                        delta, done = ollama_delta(line)
+                        consumer.feed(delta)
+                        if done or consumer.complete:
+                            break
+            except StreamValidationError as exc:
+                aborted = str(exc)
+                raise
+            finally:
+                metrics = consumer.metrics(aborted)
+                self.stream_metrics.append(metrics)
+                note_ttft(metrics.ttft_seconds)
+                note_estimated_usage(payload, consumer.text)
+            return consumer.text
+
+    def generate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+        payload = self._generate_payload(system, user, model=model, **kwargs)
+        task_name = kwargs.get("task_name") or "generate"
+        with llm_span(self.telemetry, task_name, self.provider_name, payload["model"]) as span:
+            span.attempts = span.attempts or 1
+            key = self._cache_key(system, user, payload, kwargs.get("schema"))
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    note_cache_hit()
+                    return cached
+            text = self._complete(payload, kwargs.get("schema"))
+            if key is not None:
+                self.cache.set(key, text, {"provider": self.provider_name, "model": payload["model"]})
+            return text
+
+    async def agenerate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+        payload = self._generate_payload(system, user, model=model, **kwargs)
+        task_name = kwargs.get("task_name") or "generate"
+        with llm_span(self.telemetry, task_name, self.provider_name, payload["model"]) as span:
+            span.attempts = span.attempts or 1
+            key = self._cache_key(system, user, payload, kwargs.get("schema"))
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    note_cache_hit()
+                    return cached
+            text = await self._acomplete(payload, kwargs.get("schema"))
+            if key is not None:
+                self.cache.set(key, text, {"provider": self.provider_name, "model": payload["model"]})
+            return text
+
+    def _use_native(self, model: str | None) -> bool:
+        return self.native_structured and (model or DEFAULT_MODEL) not in self.native_unsupported
+
+    def _native_rejected(self, exc: httpx.HTTPStatusError, model: str | None, task_name: str) -> bool:
+        if exc.response.status_code != 400:
+            return False
+        self.native_unsupported.add(model or DEFAULT_MODEL)
+        self.structured_stats.record(task_name, "native_fallbacks")
+        return True
+
+    def _generate_json_text(
+        self, system: str, user: str, model: str | None, schema: dict[str, Any], task_name: str
+    ) -> str:
+        if self._use_native(model):
+            try:
+                text = self.generate(system, user, model=model, schema=schema, response_schema=schema)
+                self.structured_stats.record(task_name, "native")
+                return text
+            except httpx.HTTPStatusError as exc:
+                if not self._native_rejected(exc, model, task_name):
+                    raise
+        return self.generate(system, user, model=model, schema=schema)
+
+    async def _agenerate_json_text(
+        self, system: str, user: str, model: str | None, schema: dict[str, Any], task_name: str
+    ) -> str:
+        if self._use_native(model):
+            try:
+                text = await self.agenerate(system, user, model=model, schema=schema, response_schema=schema)
+                self.structured_stats.record(task_name, "native")
+                return text
+            except httpx.HTTPStatusError as exc:
+                if not self._native_rejected(exc, model, task_name):
+                    raise
+        return await self.agenerate(system, user, model=model, schema=schema)
+
+    @staticmethod
+    def _structured_prompts(task_name: str, inputs: dict[str, Any], schema: dict[str, Any]) -> tuple[str, str]:
+        """Put the guide text ahead of anything task-specific, in the system message.
+
+        A docs group's passes read largely the same guide chunks, so the prompt prefix Ollama can
+        reuse from its KV cache then covers that context, not just the one-line instruction. The
+        user message carries the task name, schema and remaining inputs.
+        """
+        sections = [section for key in GUIDE_CONTEXT_KEYS for section in inputs.get(key) or []]
+        system = STRUCTURED_SYSTEM_PROMPT
+        if sections:
+            system += f"\n\nGuide context for the task below:\n\n{_guide_context(sections)}"
+        rest = {key: value for key, value in inputs.items() if key not in GUIDE_CONTEXT_KEYS}
+        user = (
+            f"Task: {task_name}\nSchema: {json.dumps(schema, ensure_ascii=False)}\n"
+            f"Inputs: {json.dumps(rest, ensure_ascii=False)}"
+        )
+        return system, user
 
     def generate_structured(
         self,
@@ -36,18 +314,50 @@ class OllamaClient:
         model: str | None = None,
         max_attempts: int = 2,
     ) -> dict[str, Any]:
-        system = "Return only valid JSON. No markdown."
-        user = (
-            f"Task: {task_name}\nSchema: {json.dumps(schema, ensure_ascii=False)}\n"
-            f"Inputs: {json.dumps(inputs, ensure_ascii=False)}"
-        )
-        last_exc: Exception | None = None
-        text = ""
-        for _ in range(max_attempts):
-            try:
-                text = self.generate(system, user, model=model)
-                return extract_json_object(text)
-            except Exception as exc:  # noqa: BLE001
-                last_exc = exc
-                user = f"Fix this into valid JSON only: {text}"
-        raise RuntimeError(f"Ollama structured generation failed: {last_exc}") from last_exc
+        with llm_span(self.telemetry, task_name, self.provider_name, model or DEFAULT_MODEL):
+            system, user = self._structured_prompts(task_name, inputs, schema)
+            self.structured_stats.record(task_name, "calls")
+            last_exc: Exception | None = None
+            text = ""
+            for attempt in range(max_attempts):
+                note_attempt()
+                if attempt:
+                    self.structured_stats.record(task_name, "repairs")
+                try:
+                    text = self._generate_json_text(system, user, model, schema, task_name)
+                    return extract_json_object(text)
+                except Exception as exc:  # noqa: BLE001
+                    self._forget_cached(system, user, model, schema)
+                    if isinstance(exc, StreamValidationError):
+                        text = exc.partial
+                    last_exc = exc
+                    user = f"Fix this into valid JSON only: {text}"
+            raise RuntimeError(f"Ollama structured generation failed: {last_exc}") from last_exc
+
+    async def agenerate_structured(
+        self,
+        task_name: str,
+        inputs: dict[str, Any],
+        schema: dict[str, Any],
+        model: str | None = None,
+        max_attempts: int = 2,
+    ) -> dict[str, Any]:
+        with llm_span(self.telemetry, task_name, self.provider_name, model or DEFAULT_MODEL):
+            system, user = self._structured_prompts(task_name, inputs, schema)
+            self.structured_stats.record(task_name, "calls")
+            last_exc: Exception | None = None
+            text = ""
+            for attempt in range(max_attempts):
+                note_attempt()
+                if attempt:
+                    self.structured_stats.record(task_name, "repairs")
+                try:
+                    text = await self._agenerate_json_text(system, user, model, schema, task_name)
+                    return extract_json_object(text)
+                except Exception as exc:  # noqa: BLE001
+                    self._forget_cached(system, user, model, schema)
+                    if isinstance(exc, StreamValidationError):
+                        text = exc.partial
+                    last_exc = exc
+                    user = f"Fix this into valid JSON only: {text}"
+            raise RuntimeError(f"Ollama structured generation failed: {last_exc}") from last_exc
@@ -1,20 +1,67 @@
 from __future__ import annotations
 
 import json
+import re
 from typing import Any
 
 import httpx
 
-from ai_music.llm.base import extract_json_object
+from ai_music.llm.base import StructuredCallStats, extract_json_object
+from ai_music.llm.cache import LLMResponseCache
+from ai_music.llm.streaming import (
+    SSE_DONE,
+    IncrementalJSONValidator,
+    StreamConsumer,
+    StreamMetrics,
+    StreamValidationError,
+    openrouter_delta,
+    sse_data,
+)
+from ai_music.llm.telemetry import (
+    LLMTelemetry,
+    llm_span,
+    note_attempt,
+    note_cache_hit,
+    note_estimated_usage,
+    note_ttft,
+    note_usage,
+)
+
+
+DEFAULT_MODEL = "openai/gpt-4o-mini"
+# A 400 naming these is the model refusing native structured output, not a bad request.
+_NATIVE_REJECTION_RE = re.compile(r"response_format|json_schema", re.IGNORECASE)
+
+
+def _schema_name(task_name: str | None) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", task_name or "response")[:64]
 
 
 class OpenRouterClient:
     provider_name = "openrouter"
+    default_model = DEFAULT_MODEL
 
-    def __init__(self, api_key: str, base_url: str = "https://openrouter.ai/api/v1", timeout: float = 60.0):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://openrouter.ai/api/v1",
+        timeout: float = 60.0,
+        cache: LLMResponseCache | None = None,
+        stream: bool = False,
+        native_structured: bool = True,
+        telemetry: LLMTelemetry | None = None,
+    ):
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.cache = cache
+        self.stream = stream
+        self.stream_metrics: list[StreamMetrics] = []
+        self.native_structured = native_structured
+        # Models that rejected `response_format`; they fall back to schema-in-prompt mode.
+        self.native_unsupported: set[str] = set()
+        self.structured_stats = StructuredCallStats()
+        self.telemetry = telemetry
 
     def _headers(self) -> dict[str, str]:
         return {
@@ -30,20 +77,227 @@ class OpenRouterClient:
             r.raise_for_status()
             return r.json()
 
-    def generate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
-        payload = {
-            "model": model or "openai/gpt-4o-mini",
+    def _chat_payload(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "model": model or DEFAULT_MODEL,
             "messages": [
                 {"role": "system", "content": system},
                 {"role": "user", "content": user},
             ],
             "temperature": kwargs.get("temperature", 0.2),
+            # Ask OpenRouter to report token counts and cost for telemetry.
+            "usage": {"include": True},
         }
+        response_schema = kwargs.get("response_schema")
+        if response_schema:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": _schema_name(kwargs.get("task_name")), "strict": False, "schema": response_schema},
+            }
+        return payload
+
+    @staticmethod
+    def _response_text(payload: dict[str, Any], data: dict[str, Any]) -> str:
+        text = data["choices"][0]["message"]["content"]
+        usage = data.get("usage")
+        if usage:
+            note_usage(
+                usage.get("prompt_tokens"),
+                usage.get("completion_tokens"),
+                cost_usd=usage.get("cost"),
+                model=data.get("model"),
+            )
+        else:
+            note_estimated_usage(payload, text)
+        return text
+
+    def _cache_key(
+        self, system: str, user: str, payload: dict[str, Any], schema: dict[str, Any] | None = None
+    ) -> str | None:
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.provider_name, payload["model"], system, user, payload.get("temperature"), schema)
+
+    def _forget_cached(self, system: str, user: str, model: str | None, schema: dict[str, Any]) -> None:
+        """Drop a cached answer that failed parsing so the next run asks the provider again."""
+        key = self._cache_key(system, user, self._chat_payload(system, user, model=model), schema)
+        if key is not None:
+            self.cache.delete(key)
+
+    def _validator(self, schema: dict[str, Any] | None) -> IncrementalJSONValidator | None:
+        return IncrementalJSONValidator(schema) if schema else None
+
+    def _complete(self, payload: dict[str, Any], schema: dict[str, Any] | None = None) -> str:
+        url = f"{self.base_url}/chat/completions"
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.post(f"{self.base_url}/chat/completions", headers=self._headers(), json=payload)
-            r.raise_for_status()
-            data = r.json()
-        return data["choices"][0]["message"]["content"]
+            if not self.stream:
+                r = client.post(url, headers=self._headers(), json=payload)
+                r.raise_for_status()
+                return self._response_text(payload, r.json())
+            consumer = StreamConsumer(self.provider_name, payload["model"], self._validator(schema))
+            aborted: str | None = None
+            try:
+                with client.stream("POST", url, headers=self._headers(), json={**payload, "stream": True}) as r:
+                    if r.is_error:
+                        r.read()
+                    r.raise_for_status()
+                    for line in r.iter_lines():
+                        data = sse_data(line)
+                        if data is None:
+                            continue
+                        if data == SSE_DONE:
+                            break
+                        consumer.feed(openrouter_delta(data))
+                        if consumer.complete:
+                            break
+            except StreamValidationError as exc:
+                aborted = str(exc)
+                raise
+            finally:
+                metrics = consumer.metrics(aborted)
+                self.stream_metrics.append(metrics)
+                note_ttft(metrics.ttft_seconds)
+                note_estimated_usage(payload, consumer.text)
+            return consumer.text
+
+    async def _acomplete(self, payload: dict[str, Any], schema: dict[str, Any] | None = None) -> str:
+        url = f"{self.base_url}/chat/completions"
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            if not self.stream:
+                r = await client.post(url, headers=self._headers(), json=payload)
+                r.raise_for_status()
+                return self._response_text(payload, r.json())
+            consumer = StreamConsumer(self.provider_name, payload["model"], self._validator(schema))
+            aborted: str | None = None
+            try:
+                async with client.stream("POST", url, headers=self._headers(), json={**payload, "stream": True}) as r:
+                    if r.is_error:
+                        await r.aread()
+                    r.raise_for_status()
+                    async for line in r.aiter_lines():
+                        data = sse_data(line)
+                        if data is None:
+                            continue
+                        if data == SSE_DONE:
+                            break
+                        consumer.feed(openrouter_delta(data))
+                        if consumer.complete:
+                            break
+            except StreamValidationError as exc:
+                aborted = str(exc)
+                raise
+            finally:
+                metrics = consumer.metrics(aborted)
+                self.stream_metrics.append(metrics)
+                note_ttft(metrics.ttft_seconds)
+                note_estimated_usage(payload, consumer.text)
+            return consumer.text
+
+    def generate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+        payload = self._chat_payload(system, user, model=model, **kwargs)
+        task_name = kwargs.get("task_name") or "generate"
+        with llm_span(self.telemetry, task_name, self.provider_name, payload["model"]) as span:
+            span.attempts = span.attempts or 1
+            key = self._cache_key(system, user, payload, kwargs.get("schema"))
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    note_cache_hit()
+                    return cached
+            text = self._complete(payload, kwargs.get("schema"))
+            if key is not None:
+                self.cache.set(key, text, {"provider": self.provider_name, "model": payload["model"]})
+            return text
+
+    async def agenerate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+        payload = self._chat_payload(system, user, model=model, **kwargs)
+        task_name = kwargs.get("task_name") or "generate"
+        with llm_span(self.telemetry, task_name, self.provider_name, payload["model"]) as span:
+            span.attempts = span.attempts or 1
+            key = self._cache_key(system, user, payload, kwargs.get("schema"))
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    note_cache_hit()
+                    return cached
+            text = await self._acomplete(payload, kwargs.get("schema"))
+            if key is not None:
+                self.cache.set(key, text, {"provider": self.provider_name, "model": payload["model"]})
+            return text
+
+    def _use_native(self, model: str | None) -> bool:
+        return self.native_structured and (model or DEFAULT_MODEL) not in self.native_unsupported
+
+    def _native_rejected(self, exc: httpx.HTTPStatusError, model: str | None, task_name: str) -> bool:
+        """True when a 400 blames `response_format`; any other bad request is not about the mode."""
+        if exc.response.status_code != 400:
+            return False
+        try:
+            body = exc.response.text
+        except httpx.ResponseNotRead:
+            body = ""
+        if not _NATIVE_REJECTION_RE.search(body):
+            return False
+        self.native_unsupported.add(model or DEFAULT_MODEL)
+        self.structured_stats.record(task_name, "native_fallbacks")
+        return True
+
+    def _generate_json_text(
+        self, system: str, user: str, native_user: str, model: str | None, schema: dict[str, Any], task_name: str
+    ) -> str:
+        if self._use_native(model):
+            try:
+                text = self.generate(
+                    system, native_user, model=model, schema=schema, response_schema=schema, task_name=task_name
+                )
+                self.structured_stats.record(task_name, "native")
+                return text
+            except httpx.HTTPStatusError as exc:
+                if not self._native_rejected(exc, model, task_name):
+                    raise
+        return self.generate(system, user, model=model, schema=schema, task_name=task_name)
+
+    async def _agenerate_json_text(
+        self, system: str, user: str, native_user: str, model: str | None, schema: dict[str, Any], task_name: str
+    ) -> str:
+        if self._use_native(model):
+            try:
+                text = await self.agenerate(
+                    system, native_user, model=model, schema=schema, response_schema=schema, task_name=task_name
+                )
+                self.structured_stats.record(task_name, "native")
+                return text
+            except httpx.HTTPStatusError as exc:
+                if not self._native_rejected(exc, model, task_name):
+                    raise
+        return await self.agenerate(system, user, model=model, schema=schema, task_name=task_name)
+
+    @staticmethod
+    def _structured_prompts(
+        task_name: str, inputs: dict[str, Any], schema: dict[str, Any]
+    ) -> tuple[str, str, str]:
+        """System prompt plus the user prompt for schema-in-prompt mode and for native mode.
+
+        Native mode sends the schema as `response_format`, so repeating it in the prompt would
+        only spend input tokens.
+        """
+        system = (
+            "Return valid JSON only. Do not use markdown fences. "
+            "Match the requested schema shape as closely as possible."
+        )
+        task = f"Task: {task_name}\n\n"
+        body = f"Inputs:\n{json.dumps(inputs, indent=2, ensure_ascii=False)}"
+        user = f"{task}Schema (JSON Schema excerpt):\n{json.dumps(schema, indent=2)}\n\n{body}"
+        return system, user, task + body
+
+    @staticmethod
+    def _repair_prompt(exc: Exception, response_text: str) -> str:
+        return (
+            "The previous answer was invalid JSON or failed parsing.\n\n"
+            f"Error: {exc}\n\n"
+            f"Previous answer:\n{response_text}\n\n"
+            "Return corrected valid JSON only."
+        )
 
     def generate_structured(
         self,
@@ -53,29 +307,58 @@ class OpenRouterClient:
         model: str | None = None,
         max_attempts: int = 2,
     ) -> dict[str, Any]:
-        system = (
-            "Return valid JSON only. Do not use markdown fences. "
-            "Match the requested schema shape as closely as possible."
-        )
-        user = (
-            f"Task: {task_name}\n\n"
-            f"Schema (JSON Schema excerpt):\n{json.dumps(schema, indent=2)}\n\n"
-            f"Inputs:\n{json.dumps(inputs, indent=2, ensure_ascii=False)}"
-        )
-        last_error: Exception | None = None
-        response_text = ""
-        for attempt in range(1, max_attempts + 1):
-            try:
-                response_text = self.generate(system, user, model=model)
-                return extract_json_object(response_text)
-            except Exception as exc:  # noqa: BLE001
-                last_error = exc
-                if attempt == max_attempts:
-                    break
-                user = (
-                    "The previous answer was invalid JSON or failed parsing.\n\n"
-                    f"Error: {exc}\n\n"
-                    f"Previous answer:\n{response_text}\n\n"
-                    "Return corrected valid JSON only."
-                )
-        raise RuntimeError(f"OpenRouter structured generation failed: {last_error}") from last_error
+        with llm_span(self.telemetry, task_name, self.provider_name, model or DEFAULT_MODEL):
+            system, user, native_user = self._structured_prompts(task_name, inputs, schema)
+            self.structured_stats.record(task_name, "calls")
+            last_error: Exception | None = None
+            response_text = ""
+            for attempt in range(1, max_attempts + 1):
+                note_attempt()
+                try:
+                    response_text = self._generate_json_text(
+                        system, user, native_user, model, schema, task_name
+                    )
+                    return extract_json_object(response_text)
+                except Exception as exc:  # noqa: BLE001
+                    self._forget_cached(system, user, model, schema)
+                    self._forget_cached(system, native_user, model, schema)
+                    if isinstance(exc, StreamValidationError):
+                        response_text = exc.partial
+                    last_error = exc
+                    if attempt == max_attempts:
+                        break
+                    user = native_user = self._repair_prompt(exc, response_text)
+                    self.structured_stats.record(task_name, "repairs")
+            raise RuntimeError(f"OpenRouter structured generation failed: {last_error}") from last_error
+
+    async def agenerate_structured(
+        self,
+        task_name: str,
+        inputs: dict[str, Any],
+        schema: dict[str, Any],
+        model: str | None = None,
+        max_attempts: int = 2,
+    ) -> dict[str, Any]:
+        with llm_span(self.telemetry, task_name, self.provider_name, model or DEFAULT_MODEL):
+            system, user, native_user = self._structured_prompts(task_name, inputs, schema)
+            self.structured_stats.record(task_name, "calls")
+            last_error: Exception | None = None
+            response_text = ""
+            for attempt in range(1, max_attempts + 1):
+                note_attempt()
+                try:
+                    response_text = await self._agenerate_json_text(
+                        system, user, native_user, model, schema, task_name
+                    )
+                    return extract_json_object(response_text)
+                except Exception as exc:  # noqa: BLE001
+                    self._forget_cached(system, user, model, schema)
+                    self._forget_cached(system, native_user, model, schema)
+                    if isinstance(exc, StreamValidationError):
+                        response_text = exc.partial
+                    last_error = exc
+                    if attempt == max_attempts:
+                        break
+                    user = native_user = self._repair_prompt(exc, response_text)
+                    self.structured_stats.record(task_name, "repairs")
+            raise RuntimeError(f"OpenRouter structured generation failed: {last_error}") from last_error
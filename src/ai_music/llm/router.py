@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import httpx
+
+from ai_music.config import AppConfig
+from ai_music.llm.base import StructuredCallStats, agenerate, agenerate_structured
+from ai_music.llm.cache import build_llm_cache
+from ai_music.llm.ollama_client import OllamaClient
+from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.telemetry import LLMTelemetry, build_llm_telemetry
+
+
+T = TypeVar("T")
+
+_ROUTING_LOG: ContextVar[list[dict[str, Any]] | None] = ContextVar("llm_routing_log", default=None)
+
+
+@contextmanager
+def routing_scope() -> Iterator[list[dict[str, Any]]]:
+    """Collect routing decisions made by any `LLMRouter` call inside the block (per task/thread)."""
+    log: list[dict[str, Any]] = []
+    token = _ROUTING_LOG.set(log)
+    try:
+        yield log
+    finally:
+        _ROUTING_LOG.reset(token)
+
+
+def _record_route(entry: dict[str, Any]) -> None:
+    log = _ROUTING_LOG.get()
+    if log is not None:
+        log.append(entry)
+
+
+def answered_by(operation: str, log: list[dict[str, Any]] | None = None) -> str | None:
+    """Provider that answered the latest `operation` call in `log`, or in the current scope.
+
+    `LLMRouter.provider_name` only names the primary route; after a failover or a hedge the answer
+    came from another provider, and only the routing log knows which.
+    """
+    for entry in reversed(log if log is not None else _ROUTING_LOG.get() or []):
+        if entry["operation"] == operation and entry["outcome"] == "ok":
+            return entry["provider"]
+    return None
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """True for transport, HTTP and timeout errors (anywhere in the cause chain), not bad answers."""
+    seen: BaseException | None = exc
+    while seen is not None:
+        if isinstance(seen, (httpx.HTTPError, TimeoutError, ConnectionError)):
+            return True
+        seen = seen.__cause__
+    return False
+
+
+class CircuitBreaker:
+    """Classic closed -> open -> half-open breaker.
+
+    After `failure_threshold` consecutive provider failures the circuit opens and calls are
+    skipped for `reset_timeout` seconds; then a single probe call is let through.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self.opened_count += 1
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Give back a half-open probe slot when the call ended without a health verdict."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state_locked(),
+                "consecutive_failures": self._failures,
+                "opened_count": self.opened_count,
+            }
+
+
+@dataclass(slots=True)
+class ProviderRoute:
+    name: str
+    client: Any
+    timeout: float | None = None
+
+
+class LLMRouter:
+    """Route LLM calls across providers with circuit breaking, failover and optional hedging.
+
+    The requested model is only sent to the first route; fallbacks use their own default model
+    because model ids are provider-specific. Sync and async calls both enforce each route's
+    timeout budget and, when `hedge_after` is set, start the next healthy provider if the current
+    one is still running after that many seconds; the first successful answer wins.
+    """
+
+    def __init__(
+        self,
+        routes: list[ProviderRoute],
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        hedge_after: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not routes:
+            raise ValueError("LLMRouter needs at least one provider route.")
+        self.routes = routes
+        self.hedge_after = hedge_after
+        self._clock = clock
+        self.breakers = {r.name: CircuitBreaker(failure_threshold, reset_timeout, clock) for r in routes}
+        self.provider_name = routes[0].name
+
+    @property
+    def default_model(self) -> str | None:
+        """Model the primary route uses when the caller does not name one."""
+        return getattr(self.routes[0].client, "default_model", None)
+
+    @property
+    def cache(self) -> Any | None:
+        return getattr(self.routes[0].client, "cache", None)
+
+    @property
+    def stream_metrics(self) -> list[Any]:
+        return [m for r in self.routes for m in getattr(r.client, "stream_metrics", [])]
+
+    @property
+    def structured_stats(self) -> StructuredCallStats:
+        return StructuredCallStats.merged(
+            [r.client.structured_stats for r in self.routes if hasattr(r.client, "structured_stats")]
+        )
+
+    @property
+    def telemetry(self) -> LLMTelemetry | None:
+        return getattr(self.routes[0].client, "telemetry", None)
+
+    def stats(self) -> dict[str, Any]:
+        return {r.name: self.breakers[r.name].stats() for r in self.routes}
+
+    def warm_up(self, model: str | None = None) -> dict[str, Any] | None:
+        """Preload the primary provider's model when it supports it (local providers do)."""
+        route = self.routes[0]
+        warm = getattr(route.client, "warm_up", None)
+        if warm is None or self.breakers[route.name].state == "open":
+            return None
+        return warm(model)
+
+    def _model_for(self, index: int, model: str | None) -> str | None:
+        return model if index == 0 else None
+
+    def _log(self, route: ProviderRoute, operation: str, model: str | None, outcome: str, **extra: Any) -> None:
+        _record_route({"provider": route.name, "operation": operation, "model": model, "outcome": outcome, **extra})
+
+    def _settle_failure(self, route: ProviderRoute, exc: BaseException) -> None:
+        if is_provider_failure(exc):
+            self.breakers[route.name].record_failure()
+        else:
+            self.breakers[route.name].release()
+
+    def _route_sync(self, operation: str, model: str | None, call: Callable[[Any, str | None], T]) -> T:
+        """Blocking counterpart of `_route_async` with the same timeout budget and hedging.
+
+        Without either, attempts run inline one after another. Otherwise each attempt runs on a
+        worker thread so the caller can stop waiting for it; a thread cannot be interrupted, so a
+        timed-out or losing attempt finishes in the background and its answer is discarded.
+        """
+        if self.hedge_after is None and all(route.timeout is None for route in self.routes):
+            return self._route_sync_inline(operation, model, call)
+        errors: list[str] = []
+        candidates = iter(enumerate(self.routes))
+        pending: dict[Future, tuple[ProviderRoute, str | None, float, float | None]] = {}
+        exhausted = False
+        pool = ThreadPoolExecutor(max_workers=len(self.routes), thread_name_prefix="llm-route")
+
+        def launch_next() -> bool:
+            nonlocal exhausted
+            for index, route in candidates:
+                routed_model = self._model_for(index, model)
+                if not self.breakers[route.name].allow():
+                    self._log(route, operation, routed_model, "skipped_open_circuit")
+                    continue
+                # Each attempt gets its own copy, so routing logs and call spans still reach the caller.
+                future = pool.submit(contextvars.copy_context().run, call, route.client, routed_model)
+                deadline = None if route.timeout is None else time.monotonic() + route.timeout
+                pending[future] = (route, routed_model, self._clock(), deadline)
+                return True
+            exhausted = True
+            return False
+
+        launch_next()
+        try:
+            while pending:
+                now = time.monotonic()
+                waits = [deadline - now for *_, deadline in pending.values() if deadline is not None]
+                if not exhausted and self.hedge_after is not None:
+                    waits.append(self.hedge_after)
+                done, _ = wait(pending, timeout=max(0.0, min(waits)) if waits else None, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                expired = [
+                    future for future, (*_, deadline) in pending.items()
+                    if future not in done and deadline is not None and deadline <= now
+                ]
+                if not done and not expired:
+                    if launch_next():
+                        slow_route = next(iter(pending.values()))[0]
+                        self._log(slow_route, operation, None, "hedged", after_seconds=self.hedge_after)
+                    continue
+                for future in [*done, *expired]:
+                    route, routed_model, started, _ = pending.pop(future)
+                    elapsed = round(self._clock() - started, 3)
+                    exc = future.exception() if future in done else TimeoutError()
+                    if exc is None:
+                        self.breakers[route.name].record_success()
+                        self._log(route, operation, routed_model, "ok", elapsed_seconds=elapsed)
+                        return future.result()
+                    self._settle_failure(route, exc)
+                    message = str(exc) or type(exc).__name__
+                    self._log(route, operation, routed_model, "error", error=message[:300], elapsed_seconds=elapsed)
+                    errors.append(f"{route.name}: {message}")
+                if not pending:
+                    launch_next()
+        finally:
+            for future, (route, routed_model, _, _) in pending.items():
+                future.cancel()
+                self.breakers[route.name].release()
+                self._log(route, operation, routed_model, "cancelled")
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise RuntimeError(f"All LLM providers failed for {operation}: {'; '.join(errors) or 'circuits open'}")
+
+    def _route_sync_inline(self, operation: str, model: str | None, call: Callable[[Any, str | None], T]) -> T:
+        errors: list[str] = []
+        for index, route in enumerate(self.routes):
+            routed_model = self._model_for(index, model)
+            if not self.breakers[route.name].allow():
+                self._log(route, operation, routed_model, "skipped_open_circuit")
+                continue
+            started = self._clock()
+            try:
+                result = call(route.client, routed_model)
+            except Exception as exc:  # noqa: BLE001
+                self._settle_failure(route, exc)
+                self._log(route, operation, routed_model, "error", error=str(exc)[:300],
+                          elapsed_seconds=round(self._clock() - started, 3))
+                errors.append(f"{route.name}: {exc}")
+                continue
+            self.breakers[route.name].record_success()
+            self._log(route, operation, routed_model, "ok", elapsed_seconds=round(self._clock() - started, 3))
+            return result
+        raise RuntimeError(f"All LLM providers failed for {operation}: {'; '.join(errors) or 'circuits open'}")
+
+    async def _route_async(
+        self, operation: str, model: str | None, call: Callable[[Any, str | None], Awaitable[T]]
+    ) -> T:
+        errors: list[str] = []
+        candidates = iter(enumerate(self.routes))
+        pending: dict[asyncio.Task, tuple[ProviderRoute, str | None, float]] = {}
+        exhausted = False
+
+        def launch_next() -> bool:
+            nonlocal exhausted
+            for index, route in candidates:
+                routed_model = self._model_for(index, model)
+                if not self.breakers[route.name].allow():
+                    self._log(route, operation, routed_model, "skipped_open_circuit")
+                    continue
+                coro = call(route.client, routed_model)
+                if route.timeout is not None:
+                    coro = asyncio.wait_for(coro, timeout=route.timeout)
+                pending[asyncio.ensure_future(coro)] = (route, routed_model, self._clock())
+                return True
+            exhausted = True
+            return False
+
+        launch_next()
+        try:
+            while pending:
+                timeout = None if exhausted or self.hedge_after is None else self.hedge_after
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch_next():
+                        slow_route = next(iter(pending.values()))[0]
+                        self._log(slow_route, operation, None, "hedged", after_seconds=self.hedge_after)
+                    continue
+                for task in done:
+                    route, routed_model, started = pending.pop(task)
+                    elapsed = round(self._clock() - started, 3)
+                    exc = task.exception()
+                    if exc is None:
+                        self.breakers[route.name].record_success()
+                        self._log(route, operation, routed_model, "ok", elapsed_seconds=elapsed)
+                        return task.result()
+                    self._settle_failure(route, exc)
+                    message = str(exc) or type(exc).__name__
+                    self._log(route, operation, routed_model, "error", error=message[:300], elapsed_seconds=elapsed)
+                    errors.append(f"{route.name}: {message}")
+                if not pending:
+                    launch_next()
+        finally:
+            for task, (route, routed_model, _) in pending.items():
+                task.cancel()
+                self.breakers[route.name].release()
+                self._log(route, operation, routed_model, "cancelled")
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        raise RuntimeError(f"All LLM providers failed for {operation}: {'; '.join(errors) or 'circuits open'}")
+
+    def generate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+        return self._route_sync(
+            "generate", model, lambda client, m: client.generate(system, user, model=m, **kwargs)
+        )
+
+    async def agenerate(self, system: str, user: str, model: str | None = None, **kwargs: Any) -> str:
+        return await self._route_async(
+            "generate", model, lambda client, m: agenerate(client, system, user, model=m, **kwargs)
+        )
+
+    def generate_structured(
+        self,
+        task_name: str,
+        inputs: dict[str, Any],
+        schema: dict[str, Any],
+        model: str | None = None,
+        max_attempts: int = 2,
+    ) -> dict[str, Any]:
+        return self._route_sync(
+            task_name,
+            model,
+            lambda client, m: client.generate_structured(
+                task_name=task_name, inputs=inputs, schema=schema, model=m, max_attempts=max_attempts
+            ),
+        )
+
+    async def agenerate_structured(
+        self,
+        task_name: str,
+        inputs: dict[str, Any],
+        schema: dict[str, Any],
+        model: str | None = None,
+        max_attempts: int = 2,
+    ) -> dict[str, Any]:
+        return await self._route_async(
+            task_name,
+            model,
+            lambda client, m: agenerate_structured(
+                client, task_name=task_name, inputs=inputs, schema=schema, model=m, max_attempts=max_attempts
+            ),
+        )
+
+
+def build_llm_router(
+    cfg: AppConfig,
+    prefer: str = "openrouter",
+    use_cache: bool = True,
+    stream: bool = False,
+) -> LLMRouter:
+    """Build a router over the configured providers.
+
+    Routes follow `LLM_PROVIDERS` (`providers.llm_providers`) exactly, so it can reorder or leave
+    out any provider; `prefer` is only used when that list is empty.
+    """
+    providers = cfg.providers
+    cache = build_llm_cache(cfg.cache_dir, enabled=use_cache)
+    telemetry = build_llm_telemetry(cfg.outputs_dir)
+    available: dict[str, ProviderRoute] = {}
+    if providers.openrouter_api_key:
+        available["openrouter"] = ProviderRoute(
+            "openrouter",
+            OpenRouterClient(
+                providers.openrouter_api_key,
+                base_url=providers.openrouter_base_url,
+                timeout=providers.openrouter_timeout_seconds,
+                cache=cache,
+                stream=stream,
+                telemetry=telemetry,
+            ),
+            timeout=providers.openrouter_timeout_seconds,
+        )
+    available["ollama"] = ProviderRoute(
+        "ollama",
+        OllamaClient(
+            providers.ollama_base_url,
+            timeout=providers.ollama_timeout_seconds,
+            cache=cache,
+            stream=stream,
+            keep_alive=providers.ollama_keep_alive,
+            num_ctx=providers.ollama_num_ctx,
+            telemetry=telemetry,
+        ),
+        timeout=providers.ollama_timeout_seconds,
+    )
+    order = list(providers.llm_providers) or [prefer]
+    routes: list[ProviderRoute] = []
+    for name in order:
+        if name in available and available[name] not in routes:
+            routes.append(available[name])
+    if not routes:
+        routes.append(available["ollama"])
+    return LLMRouter(routes, hedge_after=providers.llm_hedge_after_seconds)
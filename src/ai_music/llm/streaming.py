@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+class StreamValidationError(ValueError):
+    """Raised while streaming when the partial answer can no longer satisfy the schema."""
+
+    def __init__(self, message: str, partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
+
+
+_FIRST_CHAR_TYPES = {
+    '"': {"string"},
+    "{": {"object"},
+    "[": {"array"},
+    "t": {"boolean"},
+    "f": {"boolean"},
+    "n": {"null"},
+}
+
+
+def _schema_types(prop: dict[str, Any]) -> set[str] | None:
+    """Return the JSON types a property accepts, or None when the schema does not say."""
+    raw = prop.get("type")
+    if isinstance(raw, str):
+        types = {raw}
+    elif isinstance(raw, list):
+        types = {str(t) for t in raw}
+    else:
+        variants = prop.get("anyOf") or prop.get("oneOf")
+        if not isinstance(variants, list):
+            return None
+        types = set()
+        for variant in variants:
+            sub = _schema_types(variant) if isinstance(variant, dict) else None
+            if sub is None:
+                return None
+            types |= sub
+    if "number" in types:
+        types.add("integer")
+    return types
+
+
+def _value_types(first_char: str) -> set[str]:
+    if first_char == "-" or first_char.isdigit():
+        return {"number", "integer"}
+    return _FIRST_CHAR_TYPES.get(first_char, set())
+
+
+class IncrementalJSONValidator:
+    """Validate a streamed JSON object against the top level of a JSON schema as text arrives.
+
+    Only cheap structural checks run here: the answer must open an object within
+    `max_preamble_chars`, brackets must balance, top-level keys must be known when the schema
+    sets `additionalProperties: false`, and each top-level value must start with a character
+    that its declared type allows. Full validation still happens on the final text.
+    """
+
+    def __init__(self, schema: dict[str, Any] | None = None, max_preamble_chars: int = 200):
+        schema = schema or {}
+        self.properties: dict[str, Any] = schema.get("properties") or {}
+        self.closed = schema.get("additionalProperties") is False
+        self.max_preamble_chars = max_preamble_chars
+        self.complete = False
+        self._text: list[str] = []
+        self._preamble = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._capturing_key = False
+        self._key: list[str] = []
+        self._current_key: str | None = None
+        self._state = "key"
+
+    def _fail(self, message: str) -> None:
+        raise StreamValidationError(message, partial="".join(self._text))
+
+    def feed(self, delta: str) -> None:
+        self._text.append(delta)
+        for ch in delta:
+            if self.complete:
+                continue
+            if not self._stack:
+                if ch == "{":
+                    self._stack.append("{")
+                    self._state = "key"
+                elif not ch.isspace():
+                    self._preamble += 1
+                    if self._preamble > self.max_preamble_chars:
+                        self._fail(f"No JSON object within the first {self.max_preamble_chars} characters")
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                    continue
+                elif ch == '"':
+                    self._in_string = False
+                    if self._capturing_key:
+                        self._capturing_key = False
+                        self._on_key("".join(self._key))
+                    continue
+                if self._capturing_key:
+                    self._key.append(ch)
+                continue
+            if ch.isspace():
+                continue
+            top_level = len(self._stack) == 1
+            if top_level:
+                self._check_top_level(ch)
+            if ch == '"':
+                self._in_string = True
+                self._capturing_key = top_level and self._state == "colon"
+                self._key = []
+            elif ch in "{[":
+                self._stack.append(ch)
+            elif ch in "}]":
+                opener = "{" if ch == "}" else "["
+                if self._stack[-1] != opener:
+                    self._fail(f"Mismatched {ch!r} in streamed JSON")
+                self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+
+    def _check_top_level(self, ch: str) -> None:
+        state = self._state
+        if state == "key":
+            if ch == '"':
+                self._state = "colon"
+            elif ch != "}":
+                self._fail(f"Expected an object key, got {ch!r}")
+        elif state == "colon":
+            # A key string just closed; only ':' may follow.
+            if ch != ":":
+                self._fail(f"Expected ':' after key {self._current_key!r}, got {ch!r}")
+            self._state = "value"
+        elif state == "value":
+            self._check_value_type(ch)
+            self._state = "after_value"
+        elif state == "after_value":
+            if ch == ",":
+                self._state = "key"
+            elif ch != "}" and ch not in "0123456789.eE+-" and not ch.isalpha():
+                self._fail(f"Unexpected {ch!r} after value of {self._current_key!r}")
+
+    def _on_key(self, key: str) -> None:
+        self._current_key = key
+        if self.closed and key not in self.properties:
+            self._fail(f"Unexpected key {key!r} (schema allows: {', '.join(sorted(self.properties))})")
+
+    def _check_value_type(self, first_char: str) -> None:
+        prop = self.properties.get(self._current_key or "")
+        if not isinstance(prop, dict):
+            return
+        allowed = _schema_types(prop)
+        if allowed is None:
+            return
+        if not (_value_types(first_char) & allowed):
+            self._fail(f"Value for {self._current_key!r} should be {'/'.join(sorted(allowed))}, got {first_char!r}")
+
+
+@dataclass(slots=True)
+class StreamMetrics:
+    provider: str
+    model: str
+    ttft_seconds: float | None
+    elapsed_seconds: float
+    chars: int
+    aborted: str | None = None
+
+
+class StreamConsumer:
+    """Accumulate streamed deltas, time the first token and run the optional validator."""
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        validator: IncrementalJSONValidator | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.provider = provider
+        self.model = model
+        self.validator = validator
+        self._clock = clock
+        self._started = clock()
+        self._first_token_at: float | None = None
+        self._parts: list[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def complete(self) -> bool:
+        return self.validator is not None and self.validator.complete
+
+    def feed(self, delta: str) -> None:
+        if not delta:
+            return
+        if self._first_token_at is None:
+            self._first_token_at = self._clock()
+        self._parts.append(delta)
+        if self.validator is not None:
+            self.validator.feed(delta)
+
+    def metrics(self, aborted: str | None = None) -> StreamMetrics:
+        now = self._clock()
+        return StreamMetrics(
+            provider=self.provider,
+            model=self.model,
+            ttft_seconds=None if self._first_token_at is None else round(self._first_token_at - self._started, 4),
+            elapsed_seconds=round(now - self._started, 4),
+            chars=sum(len(p) for p in self._parts),
+            aborted=aborted,
+        )
+
+
+SSE_DONE = "[DONE]"
+
+
+def sse_data(line: str) -> str | None:
+    """Return the payload of a server-sent events `data:` line, or None for other lines."""
+    if not line.startswith("data:"):
+        return None
+    return line[5:].strip()
+
+
+def openrouter_delta(data: str) -> str:
+    chunk = json.loads(data)
+    if chunk.get("error"):
+        raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+    choices = chunk.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def ollama_delta(line: str) -> tuple[str, bool]:
+    """Return `(text, done)` for one NDJSON line of an Ollama `/api/generate` or `/api/chat` stream."""
+    chunk = json.loads(line)
+    if chunk.get("error"):
+        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+    text = chunk.get("response") or (chunk.get("message") or {}).get("content") or ""
+    return text, bool(chunk.get("done"))
+
+
+def summarize_stream_metrics(metrics: Iterable[StreamMetrics]) -> dict[str, Any]:
+    rows = [asdict(m) for m in metrics]
+    ttfts = [r["ttft_seconds"] for r in rows if r["ttft_seconds"] is not None]
+    return {
+        "stream_count": len(rows),
+        "aborted_count": sum(1 for r in rows if r["aborted"]),
+        "ttft_p50_seconds": round(statistics.median(ttfts), 4) if ttfts else None,
+        "ttft_max_seconds": max(ttfts) if ttfts else None,
+    }
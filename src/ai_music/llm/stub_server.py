@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from ai_music.llm.tokens import count_tokens
+
+
+_TASK_RE = re.compile(r"^Task:\s*(.+)$", re.MULTILINE)
+_SCHEMA_MARKER_RE = re.compile(r"Schema[^\n:]*:\s*")
+
+
+def _resolve_ref(schema: dict[str, Any], root: dict[str, Any]) -> dict[str, Any]:
+    ref = schema.get("$ref")
+    if not isinstance(ref, str) or not ref.startswith("#/"):
+        return schema
+    node: Any = root
+    for part in ref[2:].split("/"):
+        node = node.get(part, {}) if isinstance(node, dict) else {}
+    return node if isinstance(node, dict) else {}
+
+
+def instance_from_schema(schema: dict[str, Any], name: str = "value", root: dict[str, Any] | None = None) -> Any:
+    """Build a deterministic instance that satisfies the common subset of JSON Schema we emit.
+
+    Defaults and enums win; objects fill every declared property (so `required` holds); arrays
+    honour `prefixItems`/`minItems`; numbers respect `minimum`; `anyOf`/`oneOf` use the first
+    non-null branch.
+    """
+    root = root if root is not None else schema
+    schema = _resolve_ref(schema, root)
+    if "default" in schema and schema["default"] is not None:
+        return schema["default"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf"):
+        if schema.get(key):
+            branches = [b for b in schema[key] if _resolve_ref(b, root).get("type") != "null"]
+            return instance_from_schema((branches or schema[key])[0], name, root)
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object" or (kind is None and "properties" in schema):
+        return {
+            key: instance_from_schema(sub, key, root) for key, sub in (schema.get("properties") or {}).items()
+        }
+    if kind == "array":
+        if schema.get("prefixItems"):
+            return [instance_from_schema(sub, f"{name}_{i}", root) for i, sub in enumerate(schema["prefixItems"])]
+        count = max(1, int(schema.get("minItems", 1)))
+        return [instance_from_schema(schema.get("items") or {}, f"{name}_{i + 1}", root) for i in range(count)]
+    if kind == "integer":
+        return int(schema.get("minimum", 1))
+    if kind == "number":
+        return float(schema.get("minimum", 1.0))
+    if kind == "boolean":
+        return False
+    if kind == "null":
+        return None
+    return f"stub {name.replace('_', ' ')}"
+
+
+def _schema_from_prompt(text: str) -> dict[str, Any] | None:
+    match = _SCHEMA_MARKER_RE.search(text)
+    if match is None:
+        return None
+    try:
+        schema, _ = json.JSONDecoder().raw_decode(text, match.end())
+    except ValueError:
+        return None
+    return schema if isinstance(schema, dict) else None
+
+
+@dataclass(slots=True)
+class StubLLMConfig:
+    latency_seconds: float = 0.0
+    jitter_seconds: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int = 0
+    # Task name -> canned JSON answer; other tasks get an instance generated from the schema.
+    canned: dict[str, Any] = field(default_factory=dict)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Concurrency benchmarks open many connections at once; the stdlib default backlog is 5.
+    request_queue_size = 256
+
+
+class StubLLMServer:
+    """Local stand-in for the OpenRouter chat-completions and Ollama chat/generate APIs.
+
+    Answers are deterministic: canned per task when configured, otherwise generated from the
+    request's JSON schema (native `response_format`/`format`, or the schema embedded in the
+    prompt). Latency, jitter and error injection are seeded so benchmark runs are repeatable.
+    """
+
+    def __init__(self, config: StubLLMConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubLLMConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors_injected": 0, "streams": 0}
+        self._httpd = _StubHTTPServer((host, port), _make_handler(self))
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openrouter_base_url(self) -> str:
+        return f"{self.url}/api/v1"
+
+    @property
+    def ollama_base_url(self) -> str:
+        return self.url
+
+    def start(self) -> StubLLMServer:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> StubLLMServer:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _plan(self, stream: bool) -> tuple[float, bool]:
+        """Draw this request's latency and whether to inject an error."""
+        with self._lock:
+            self._stats["requests"] += 1
+            if stream:
+                self._stats["streams"] += 1
+            jitter = self._rng.uniform(0, self.config.jitter_seconds) if self.config.jitter_seconds else 0.0
+            fail = self.config.error_rate > 0 and self._rng.random() < self.config.error_rate
+            if fail:
+                self._stats["errors_injected"] += 1
+        return self.config.latency_seconds + jitter, fail
+
+    def answer(self, system: str, user: str, schema: dict[str, Any] | None, task_name: str | None) -> str:
+        task = task_name or (m.group(1).strip() if (m := _TASK_RE.search(user)) else None)
+        if task and task in self.config.canned:
+            return json.dumps(self.config.canned[task], ensure_ascii=False)
+        schema = schema or _schema_from_prompt(user)
+        if schema is not None:
+            return json.dumps(instance_from_schema(schema), ensure_ascii=False)
+        if "json" in system.lower():
+            return "{}"
+        return "Stub response."
+
+
+def _chat_texts(messages: list[dict[str, Any]]) -> tuple[str, str]:
+    system = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") == "system")
+    user = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") != "system")
+    return system, user
+
+
+def _make_handler(stub: StubLLMServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return
+
+        def _send_json(self, status: int, body: dict[str, Any]) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, content_type: str, lines: list[str]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.end_headers()
+            for line in lines:
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.endswith("/api/tags"):
+                self._send_json(200, {"models": [{"name": "llama3.1:8b"}]})
+            elif self.path.endswith("/models"):
+                self._send_json(200, {"data": [{"id": "openai/gpt-4o-mini"}]})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "invalid json"})
+                return
+            stream = bool(payload.get("stream"))
+            delay, fail = stub._plan(stream)
+            if delay:
+                time.sleep(delay)
+            if fail:
+                self._send_json(stub.config.error_status, {"error": {"message": "injected stub error"}})
+                return
+            if self.path.endswith("/chat/completions"):
+                self._openrouter(payload, stream)
+            elif self.path.endswith("/api/chat") or self.path.endswith("/api/generate"):
+                self._ollama(payload, stream, chat=self.path.endswith("/api/chat"))
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def _openrouter(self, payload: dict[str, Any], stream: bool) -> None:
+            system, user = _chat_texts(payload.get("messages") or [])
+            json_schema = (payload.get("response_format") or {}).get("json_schema") or {}
+            text = stub.answer(system, user, json_schema.get("schema"), json_schema.get("name"))
+            model = payload.get("model") or "openai/gpt-4o-mini"
+            usage = {
+                "prompt_tokens": count_tokens(f"{system}\n{user}", model),
+                "completion_tokens": count_tokens(text, model),
+                "cost": 0.0,
+            }
+            if not stream:
+                self._send_json(
+                    200, {"model": model, "choices": [{"message": {"role": "assistant", "content": text}}], "usage": usage}
+                )
+                return
+            pieces = [text[i : i + 16] for i in range(0, len(text), 16)]
+            lines = [f"data: {json.dumps({'choices': [{'delta': {'content': p}}]})}\n\n" for p in pieces]
+            lines.append(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n")
+            lines.append("data: [DONE]\n\n")
+            self._send_stream("text/event-stream", lines)
+
+        def _ollama(self, payload: dict[str, Any], stream: bool, chat: bool) -> None:
+            model = payload.get("model") or "llama3.1:8b"
+            if chat:
+                messages = payload.get("messages") or []
+                if not messages:
+                    # Empty chat is Ollama's "load the model" call.
+                    self._send_json(200, {"model": model, "message": {"role": "assistant", "content": ""}, "done": True})
+                    return
+                system, user = _chat_texts(messages)
+            else:
+                system, user = "", str(payload.get("prompt") or "")
+            schema = payload.get("format") if isinstance(payload.get("format"), dict) else None
+            text = stub.answer(system, user, schema, None)
+            counts = {"prompt_eval_count": count_tokens(f"{system}\n{user}", model), "eval_count": count_tokens(text, model)}
+
+            def body(piece: str, done: bool) -> dict[str, Any]:
+                if chat:
+                    return {"model": model, "message": {"role": "assistant", "content": piece}, "done": done}
+                return {"model": model, "response": piece, "done": done}
+
+            if not stream:
+                self._send_json(200, {**body(text, True), **counts})
+                return
+            pieces = [text[i : i + 16] for i in range(0, len(text), 16)]
+            lines = [json.dumps(body(p, False)) + "\n" for p in pieces]
+            lines.append(json.dumps({**body("", True), **counts}) + "\n")
+            self._send_stream("application/x-ndjson", lines)
+
+    return Handler
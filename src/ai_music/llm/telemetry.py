@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from ai_music.io.files import append_jsonl
+from ai_music.llm.tokens import count_tokens
+
+
+@dataclass(slots=True)
+class LLMCallSpan:
+    """One logical LLM call (a structured task or a plain generate), across repair attempts."""
+
+    task_name: str
+    provider: str
+    model: str | None
+    started_at: float
+    latency_seconds: float | None = None
+    ttft_seconds: float | None = None
+    attempts: int = 0
+    requests: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float | None = None
+    usage_source: str = "none"
+    outcome: str = "ok"
+    error: str | None = None
+
+
+_CURRENT_SPAN: ContextVar[LLMCallSpan | None] = ContextVar("llm_call_span", default=None)
+_FINISHED_SPANS: ContextVar[list[LLMCallSpan] | None] = ContextVar("llm_finished_spans", default=None)
+
+
+def current_span() -> LLMCallSpan | None:
+    return _CURRENT_SPAN.get()
+
+
+def note_usage(
+    prompt_tokens: int | None,
+    completion_tokens: int | None,
+    cost_usd: float | None = None,
+    model: str | None = None,
+    estimated: bool = False,
+) -> None:
+    """Add one provider request's usage to the active span (no-op outside a span)."""
+    span = _CURRENT_SPAN.get()
+    if span is None:
+        return
+    span.requests += 1
+    span.prompt_tokens += int(prompt_tokens or 0)
+    span.completion_tokens += int(completion_tokens or 0)
+    if cost_usd is not None:
+        span.cost_usd = round((span.cost_usd or 0.0) + float(cost_usd), 8)
+    if model:
+        span.model = model
+    # Once any request is estimated the span total is only an estimate.
+    if estimated or span.usage_source == "estimate":
+        span.usage_source = "estimate"
+    else:
+        span.usage_source = "provider"
+
+
+def note_ttft(seconds: float | None) -> None:
+    span = _CURRENT_SPAN.get()
+    if span is not None and seconds is not None and span.ttft_seconds is None:
+        span.ttft_seconds = round(seconds, 4)
+
+
+def note_cache_hit() -> None:
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.cache_hits += 1
+
+
+def note_attempt() -> None:
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.attempts += 1
+
+
+def payload_prompt_text(payload: dict[str, Any]) -> str:
+    """Prompt text of a chat (`messages`) or completion (`prompt`) payload, for token estimates."""
+    if "messages" in payload:
+        return "\n".join(str(m.get("content") or "") for m in payload["messages"])
+    return str(payload.get("prompt") or "")
+
+
+def note_estimated_usage(payload: dict[str, Any], completion: str) -> None:
+    model = payload.get("model")
+    note_usage(
+        count_tokens(payload_prompt_text(payload), model),
+        count_tokens(completion, model),
+        estimated=True,
+    )
+
+
+class LLMTelemetry:
+    """Collect finished call spans in memory and append each one to a JSONL log."""
+
+    def __init__(self, log_path: Path | None = None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._spans: list[LLMCallSpan] = []
+
+    @property
+    def spans(self) -> list[LLMCallSpan]:
+        with self._lock:
+            return list(self._spans)
+
+    def record(self, span: LLMCallSpan) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if self.log_path is not None:
+                append_jsonl(self.log_path, asdict(span))
+
+    def summary(self) -> dict[str, Any]:
+        return summarize_spans(self.spans)
+
+
+@contextmanager
+def llm_span(
+    telemetry: LLMTelemetry | None, task_name: str, provider: str, model: str | None
+) -> Iterator[LLMCallSpan]:
+    """Open a call span; nested calls (e.g. `generate` inside `generate_structured`) join the outer one."""
+    outer = _CURRENT_SPAN.get()
+    if outer is not None:
+        yield outer
+        return
+    span = LLMCallSpan(task_name=task_name, provider=provider, model=model, started_at=round(time.time(), 3))
+    token = _CURRENT_SPAN.set(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as exc:
+        span.outcome = "cancelled" if isinstance(exc, asyncio.CancelledError) else "error"
+        span.error = (str(exc) or type(exc).__name__)[:300]
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        span.latency_seconds = round(time.perf_counter() - started, 4)
+        if telemetry is not None:
+            telemetry.record(span)
+        finished = _FINISHED_SPANS.get()
+        if finished is not None:
+            finished.append(span)
+
+
+@contextmanager
+def collect_spans() -> Iterator[list[LLMCallSpan]]:
+    """Gather the spans that finish inside the block, including those of router failovers and hedges."""
+    finished: list[LLMCallSpan] = []
+    token = _FINISHED_SPANS.set(finished)
+    try:
+        yield finished
+    finally:
+        _FINISHED_SPANS.reset(token)
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+def _aggregate(spans: list[LLMCallSpan]) -> dict[str, Any]:
+    latencies = [s.latency_seconds for s in spans if s.latency_seconds is not None]
+    ttfts = [s.ttft_seconds for s in spans if s.ttft_seconds is not None]
+    costs = [s.cost_usd for s in spans if s.cost_usd is not None]
+    return {
+        "calls": len(spans),
+        "errors": sum(1 for s in spans if s.outcome == "error"),
+        "attempts": sum(s.attempts for s in spans),
+        "requests": sum(s.requests for s in spans),
+        "cache_hits": sum(s.cache_hits for s in spans),
+        "prompt_tokens": sum(s.prompt_tokens for s in spans),
+        "completion_tokens": sum(s.completion_tokens for s in spans),
+        "cost_usd": round(sum(costs), 6) if costs else None,
+        "latency_p50_seconds": _percentile(latencies, 0.5),
+        "latency_p95_seconds": _percentile(latencies, 0.95),
+        "ttft_mean_seconds": round(sum(ttfts) / len(ttfts), 4) if ttfts else None,
+    }
+
+
+def summarize_spans(spans: Iterable[LLMCallSpan]) -> dict[str, Any]:
+    rows = list(spans)
+    by_task: dict[str, list[LLMCallSpan]] = {}
+    by_model: dict[str, list[LLMCallSpan]] = {}
+    for span in rows:
+        by_task.setdefault(span.task_name, []).append(span)
+        by_model.setdefault(f"{span.provider}:{span.model or 'default'}", []).append(span)
+    return {
+        "total": _aggregate(rows),
+        "by_task": {k: _aggregate(v) for k, v in sorted(by_task.items())},
+        "by_model": {k: _aggregate(v) for k, v in sorted(by_model.items())},
+    }
+
+
+def build_llm_telemetry(outputs_dir: Path) -> LLMTelemetry:
+    return LLMTelemetry(outputs_dir / "reports" / "llm_calls.jsonl")
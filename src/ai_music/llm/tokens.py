@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+
+# GPT-style pre-tokenizer: contractions, letter runs, digit runs (max 3), punctuation runs, whitespace.
+_PRETOKEN_RE = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+", re.UNICODE)
+
+
+def _encoding_name(model: str | None) -> str:
+    name = (model or "").lower()
+    if "gpt-4o" in name or "gpt-4.1" in name or "/o1" in name or "/o3" in name:
+        return "o200k_base"
+    return "cl100k_base"
+
+
+def _estimate_piece(piece: str) -> int:
+    stripped = piece.strip()
+    if not stripped:
+        return 1
+    if stripped[0].isalpha():
+        # Common words are a single BPE token; long or rare words split roughly every 6 chars.
+        return 1 + (len(stripped) - 1) // 6
+    return len(stripped) if not stripped.isdigit() else 1
+
+
+class TokenCounter:
+    """Count tokens with tiktoken when it is installed and its BPE vocab can be loaded.
+
+    tiktoken is an optional extra, and `get_encoding` downloads the BPE file on first use (then
+    caches it under `TIKTOKEN_CACHE_DIR`; pre-seed that directory for offline machines). When
+    either is missing, counts are estimates: a GPT-style pre-tokenizer plus a per-piece guess
+    that slightly over-counts English prose, which keeps packed prompts inside the budget.
+    `exact` and `backend` tell callers which one they got.
+    """
+
+    def __init__(self, model: str | None = None):
+        self.model = model
+        self._encoding: Any | None = None
+        self.backend = "estimate"
+        if tiktoken is not None:
+            name = _encoding_name(model)
+            try:
+                self._encoding = tiktoken.get_encoding(name)
+                self.backend = f"tiktoken:{name}"
+            except Exception:  # noqa: BLE001
+                self._encoding = None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return sum(_estimate_piece(p) for p in _PRETOKEN_RE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Return the longest prefix of `text` that fits in `max_tokens`."""
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self._encoding.decode(tokens[:max_tokens])
+        used = 0
+        end = 0
+        for match in _PRETOKEN_RE.finditer(text):
+            cost = _estimate_piece(match.group(0))
+            if used + cost > max_tokens:
+                break
+            used += cost
+            end = match.end()
+        return text[:end]
+
+
+@lru_cache(maxsize=16)
+def get_token_counter(model: str | None = None) -> TokenCounter:
+    return TokenCounter(model)
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    return get_token_counter(model).count(text)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from ai_music.io.files import ensure_parent, stable_hash
+
+
+def file_content_hash(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def fpcalc_options(max_length_seconds: int = 120) -> list[str]:
+    return ["-json", "-length", str(max_length_seconds)]
+
+
+def fingerprint_cache_path(cache_dir: Path, content_hash: str, max_length_seconds: int = 120) -> Path:
+    """Cache entry for one file's fingerprint under the fpcalc options that produced it."""
+    options = stable_hash(*fpcalc_options(max_length_seconds), length=8)
+    return cache_dir / "fingerprints" / content_hash[:2] / f"{content_hash}-{options}.json"
+
+
+def resolve_fpcalc(configured_path: str | None = None) -> str | None:
+    if configured_path:
+        return configured_path
+    return shutil.which("fpcalc")
+
+
+def run_fpcalc(path: Path, fpcalc: str, max_length_seconds: int = 120, timeout: float = 120.0) -> dict[str, Any]:
+    proc = subprocess.run(
+        [fpcalc, *fpcalc_options(max_length_seconds), str(path)],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"fpcalc failed ({proc.returncode}): {proc.stderr.strip()[:300]}")
+    data = json.loads(proc.stdout)
+    return {"duration": int(round(float(data["duration"]))), "fingerprint": str(data["fingerprint"])}
+
+
+def _fingerprint_one(job: tuple[str, str, str, int]) -> dict[str, Any]:
+    # Runs inside a worker process: hashing and fpcalc both happen off the main process.
+    path_str, cache_dir_str, fpcalc, max_length_seconds = job
+    path = Path(path_str)
+    result: dict[str, Any] = {"path": path_str, "content_hash": None, "cache_hit": False, "error": None}
+    try:
+        content_hash = file_content_hash(path)
+        result["content_hash"] = content_hash
+        cache_path = fingerprint_cache_path(Path(cache_dir_str), content_hash, max_length_seconds)
+        if cache_path.exists():
+            result.update(json.loads(cache_path.read_text(encoding="utf-8")))
+            result["cache_hit"] = True
+            return result
+        fp = run_fpcalc(path, fpcalc, max_length_seconds=max_length_seconds)
+        ensure_parent(cache_path)
+        cache_path.write_text(json.dumps(fp), encoding="utf-8")
+        result.update(fp)
+    except Exception as exc:  # noqa: BLE001
+        result["error"] = str(exc)
+    return result
+
+
+def fingerprint_media_files(
+    media_rows: list[dict[str, Any]],
+    cache_dir: Path,
+    fpcalc: str,
+    max_workers: int | None = None,
+    max_length_seconds: int = 120,
+) -> list[dict[str, Any]]:
+    workers = max(1, max_workers or min(4, os.cpu_count() or 1))
+    jobs = [(row["path"], str(cache_dir), fpcalc, max_length_seconds) for row in media_rows]
+    if workers == 1 or len(jobs) <= 1:
+        results = [_fingerprint_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fingerprint_one, jobs, chunksize=4))
+    out: list[dict[str, Any]] = []
+    for media, result in zip(media_rows, results, strict=True):
+        out.append(
+            {
+                "media_id": media["media_id"],
+                "relative_path": media.get("relative_path"),
+                "content_hash": result["content_hash"],
+                "duration": result.get("duration"),
+                "fingerprint": result.get("fingerprint"),
+                "cache_hit": result["cache_hit"],
+                "error": result["error"],
+            }
+        )
+    return out
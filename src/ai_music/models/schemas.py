@@ -5,32 +5,21 @@ from typing import Any, Literal
 
 from pydantic import BaseModel, Field, field_validator
 
+from ai_music.retrieval.keywords import keyword_tagger
+
 
 _PAREN_SEGMENT_RE = re.compile(r"\(([^()]*)\)")
 _FULL_PAREN_LINE_RE = re.compile(r"^\s*\(([^()]*)\)\s*$")
-_NONVERBAL_CUE_RE = re.compile(
-    r"\b("
-    r"drum|drums|snare|kick|hihat|hi-hat|percussion|beat|bass|sub\s*bass|bassline|"
-    r"synth|stabs?|pad|pads|fx|sfx|riser|risers|drop|build(?:-?up)?|instrumental|"
-    r"fade\s*out|roll(?:ing)?"
-    r")\b",
-    re.IGNORECASE,
-)
-_ADLIB_ONLY_RE = re.compile(
-    r"^[\s\W]*(?:yeah|uh|oh|ah|hey|woah|whoa|la|na|rewind|selecta|come on|let's go|"
-    r"one time|again|all right|alright)(?:[\s\W]+(?:yeah|uh|oh|ah|hey|woah|whoa|la|na|"
-    r"rewind|selecta|come on|let's go|one time|again|all right|alright))*[\s\W]*$",
-    re.IGNORECASE,
-)
 
 
 def _is_nonverbal_parenthetical(text: str) -> bool:
     content = text.strip()
     if not content:
         return False
-    if _ADLIB_ONLY_RE.match(content):
+    # Ad-lib-only asides ("(Rewind! Selecta!)") are sung; other asides naming a production cue are not.
+    if keyword_tagger("lyric_adlibs").covers_words(content):
         return False
-    return bool(_NONVERBAL_CUE_RE.search(content))
+    return bool(keyword_tagger("lyric_nonverbal_cues").tags(content))
 
 
 def _sanitize_suno_lyrics_parentheses(lyrics: str) -> str:
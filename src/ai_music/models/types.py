@@ -12,6 +12,10 @@ class GuideChunk:
     text: str
     tags: list[str]
     token_estimate: int
+    # Set on the parts of a heading section that was split to fit the chunk token limit.
+    parent_chunk_id: str | None = None
+    # Canonical chunk this one near-duplicates (MinHash/LSH pass in `docs index`).
+    duplicate_of: str | None = None
 
 
 @dataclass(slots=True)
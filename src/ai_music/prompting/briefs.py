@@ -5,6 +5,14 @@ from typing import Any
 from ai_music.io.files import stable_hash
 from ai_music.models.schemas import PromptBrief, SunoFragments
 from ai_music.models.types import GuideChunk
+from ai_music.retrieval.keywords import keyword_tagger
+
+
+# Genre tag from the `brief_genre` vocabulary -> (genre, subgenre, tempo range).
+_FALLBACK_GENRE_PRESETS: dict[str, tuple[str, str | None, tuple[int, int]]] = {
+    "drum and bass": ("drum and bass", "dancefloor", (170, 175)),
+    "progressive melodic house": ("electronic", "progressive melodic house", (118, 126)),
+}
 
 
 def _default_song_title(brief: PromptBrief) -> str:
@@ -114,26 +122,10 @@ def ensure_suno_fragments(brief: PromptBrief) -> PromptBrief:
 def build_fallback_brief_from_chunks(chunks: list[GuideChunk], intent: str = "prompt-pack") -> PromptBrief:
     all_text = "\n".join(chunk.text for chunk in chunks)
     lower = all_text.lower()
-    genre = "electronic"
-    subgenre = None
-    bpm = (120, 128)
-    if "drum and bass" in lower or "dnb" in lower:
-        genre = "drum and bass"
-        subgenre = "dancefloor"
-        bpm = (170, 175)
-    elif "progressive" in lower or "melodic house" in lower:
-        genre = "electronic"
-        subgenre = "progressive melodic house"
-        bpm = (118, 126)
-    mood_tags: list[str] = []
-    for tag in ["high-energy", "cinematic", "uplifting", "dark", "melancholic", "club-ready"]:
-        if tag.replace("-", " ") in lower or tag in lower:
-            mood_tags.append(tag)
-    if not mood_tags:
-        mood_tags = ["dynamic", "emotive"]
-    instrumentation = [kw for kw in ["drums", "bass", "synth", "pads", "piano", "strings"] if kw in lower]
-    if not instrumentation:
-        instrumentation = ["drums", "bass", "synth"]
+    genre_tag = keyword_tagger("brief_genre").first(lower)
+    genre, subgenre, bpm = _FALLBACK_GENRE_PRESETS.get(genre_tag or "", ("electronic", None, (120, 128)))
+    mood_tags = keyword_tagger("brief_moods").tags(lower) or ["dynamic", "emotive"]
+    instrumentation = keyword_tagger("brief_instrumentation").tags(lower) or ["drums", "bass", "synth"]
     arrangement_plan = ["intro", "build", "drop", "breakdown", "drop 2", "outro"]
     refs = sorted({chunk.heading_path[-1] for chunk in chunks if chunk.heading_path})
     brief_id = f"pb_{stable_hash(intent, genre, subgenre or '', ''.join(chunk.chunk_id for chunk in chunks))}"
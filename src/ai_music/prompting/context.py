@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+from pydantic import BaseModel, Field
+
+from ai_music.io.files import read_json
+from ai_music.llm.tokens import TokenCounter, get_token_counter
+from ai_music.models.types import GuideChunk
+
+if TYPE_CHECKING:
+    from ai_music.retrieval.bm25 import ChunkRetriever
+
+
+CONTEXT_BUDGETS_CONFIG = Path("configs/context_budgets.json")
+
+
+class TaskBudget(BaseModel):
+    max_input_tokens: int = 6000
+    per_chunk_max_tokens: int = 350
+    max_chunks: int = 24
+    min_chunk_tokens: int = 48
+    tag_weights: dict[str, float] = Field(default_factory=dict)
+    required_tags: list[str] = Field(default_factory=list)
+    # BM25 retrieval: 0 keeps tag-weight ranking of the caller's chunks. "corpus" scope searches
+    # every indexed guide; "group" ranks only the chunks passed to `pack`.
+    retrieval_top_k: int = 0
+    retrieval_query: str = ""
+    retrieval_scope: Literal["group", "corpus"] = "group"
+
+
+class ContextBudgetConfig(BaseModel):
+    default: dict[str, Any] = Field(default_factory=dict)
+    tasks: dict[str, dict[str, Any]] = Field(default_factory=dict)
+    model_max_input_tokens: dict[str, int] = Field(default_factory=dict)
+
+    def resolve(self, task_name: str, model: str | None = None) -> TaskBudget:
+        """Merge default and task settings, then cap the input budget by the model's limit."""
+        budget = TaskBudget.model_validate({**self.default, **self.tasks.get(task_name, {})})
+        cap = self.model_max_input_tokens.get(model or "")
+        if cap is not None:
+            budget.max_input_tokens = min(budget.max_input_tokens, cap)
+        return budget
+
+
+def load_context_budgets(path: Path | None) -> ContextBudgetConfig:
+    if path is None or not path.exists():
+        return ContextBudgetConfig()
+    return ContextBudgetConfig.model_validate(read_json(path))
+
+
+@dataclass(slots=True)
+class PackedContext:
+    task_name: str
+    model: str | None
+    budget_tokens: int
+    tokens_used: int
+    chunks: list[GuideChunk] = field(default_factory=list)
+    texts: list[str] = field(default_factory=list)
+    truncated_chunk_ids: list[str] = field(default_factory=list)
+    dropped_chunk_ids: list[str] = field(default_factory=list)
+    deduplicated_chunk_ids: list[str] = field(default_factory=list)
+    retrieval: dict[str, Any] | None = None
+
+    def summary(self) -> dict[str, Any]:
+        out = {
+            "task": self.task_name,
+            "model": self.model,
+            "budget_tokens": self.budget_tokens,
+            "context_tokens": self.tokens_used,
+            "chunks_packed": len(self.chunks),
+            "chunks_truncated": len(self.truncated_chunk_ids),
+            "chunks_dropped": len(self.dropped_chunk_ids),
+            "chunks_deduplicated": len(self.deduplicated_chunk_ids),
+            "chunk_ids": [c.chunk_id for c in self.chunks],
+        }
+        if self.retrieval is not None:
+            out["retrieval"] = self.retrieval
+        return out
+
+
+def _chunk_overhead(chunk: GuideChunk, counter: TokenCounter) -> int:
+    # Heading path, tags and JSON punctuation travel with every packed chunk.
+    return counter.count(" > ".join(chunk.heading_path)) + len(chunk.tags) + 8
+
+
+def pack_chunks(
+    chunks: list[GuideChunk],
+    budget: TaskBudget,
+    counter: TokenCounter,
+    task_name: str = "",
+    model: str | None = None,
+    scores: dict[str, float] | None = None,
+) -> PackedContext:
+    """Greedily pack the highest-value chunks into the task budget.
+
+    Chunks are ranked by retrieval `scores` when given, then by the task's tag weights (ties
+    keep document order). A chunk is skipped when a copy of the same canonical chunk (see
+    `GuideChunk.duplicate_of`) was already packed. Each chunk is clipped to
+    `per_chunk_max_tokens`; a chunk that does not fit is clipped to the remaining budget when at
+    least `min_chunk_tokens` are left, otherwise skipped. Packed chunks are returned in document
+    order so the model reads sections as written.
+    """
+    required = set(budget.required_tags)
+    candidates = [(i, c) for i, c in enumerate(chunks) if not required or required & set(c.tags)]
+    dropped = [c.chunk_id for c in chunks if required and not required & set(c.tags)]
+    scores = scores or {}
+    ranked = sorted(
+        candidates,
+        key=lambda item: (
+            -scores.get(item[1].chunk_id, 0.0),
+            -sum(budget.tag_weights.get(t, 0.0) for t in item[1].tags),
+            item[0],
+        ),
+    )
+    remaining = budget.max_input_tokens
+    picked: list[tuple[int, GuideChunk, str]] = []
+    truncated: list[str] = []
+    deduplicated: list[str] = []
+    canonical_ids: set[str] = set()
+    for index, chunk in ranked:
+        canonical = chunk.duplicate_of or chunk.chunk_id
+        if canonical in canonical_ids:
+            deduplicated.append(chunk.chunk_id)
+            continue
+        if len(picked) >= budget.max_chunks:
+            dropped.append(chunk.chunk_id)
+            continue
+        overhead = _chunk_overhead(chunk, counter)
+        text = counter.truncate(chunk.text, budget.per_chunk_max_tokens)
+        clipped = len(text) < len(chunk.text)
+        cost = counter.count(text) + overhead
+        if cost > remaining:
+            room = remaining - overhead
+            if room < budget.min_chunk_tokens:
+                dropped.append(chunk.chunk_id)
+                continue
+            text = counter.truncate(text, room)
+            clipped = True
+            cost = counter.count(text) + overhead
+        if clipped:
+            truncated.append(chunk.chunk_id)
+        picked.append((index, chunk, text))
+        canonical_ids.add(canonical)
+        remaining -= cost
+    picked.sort(key=lambda item: item[0])
+    return PackedContext(
+        task_name=task_name,
+        model=model,
+        budget_tokens=budget.max_input_tokens,
+        tokens_used=budget.max_input_tokens - remaining,
+        chunks=[c for _, c, _ in picked],
+        texts=[t for _, _, t in picked],
+        truncated_chunk_ids=truncated,
+        dropped_chunk_ids=dropped,
+        deduplicated_chunk_ids=deduplicated,
+    )
+
+
+def _retrieval_query(budget: TaskBudget, query: str | None) -> str:
+    return " ".join(part for part in [budget.retrieval_query, query or ""] if part.strip())
+
+
+class ContextPacker:
+    """Resolve per-task/per-model budgets and pack chunks with a model-matched token counter."""
+
+    def __init__(
+        self,
+        budgets: ContextBudgetConfig | None = None,
+        counter_factory: Callable[[str | None], TokenCounter] = get_token_counter,
+        retriever: ChunkRetriever | None = None,
+        default_model: str | None = None,
+    ):
+        self.budgets = budgets or ContextBudgetConfig()
+        self.counter_factory = counter_factory
+        self.retriever = retriever
+        # The model the provider falls back to when a call names none; budgets and token counts
+        # must follow it, or an unset `--model` would skip that model's input cap.
+        self.default_model = default_model
+
+    def counter(self, model: str | None) -> TokenCounter:
+        return self.counter_factory(model or self.default_model)
+
+    def corpus_chunk_keys(self, query: str | None = None) -> dict[str, list[str]]:
+        """Per corpus-scope task, the chunks it retrieves for `query`, best first.
+
+        Keys are chunk IDs (content hashes) plus any duplicate flag, so they change exactly when
+        that task's retrieved context can. Group-scope tasks only rank the caller's chunks and
+        are left out; `""` stands for tasks that fall back to the default budget.
+        """
+        if self.retriever is None:
+            return {}
+        out: dict[str, list[str]] = {}
+        for task_name in ["", *self.budgets.tasks]:
+            budget = self.budgets.resolve(task_name)
+            if budget.retrieval_top_k > 0 and budget.retrieval_scope == "corpus":
+                hits = self.retriever.select(_retrieval_query(budget, query), budget.retrieval_top_k)
+                ranked = sorted(hits, key=lambda hit: -hit[1])
+                out[task_name] = [f"{c.chunk_id}={c.duplicate_of}" if c.duplicate_of else c.chunk_id for c, _ in ranked]
+        return out
+
+    def pack(
+        self, task_name: str, chunks: list[GuideChunk], model: str | None = None, query: str | None = None
+    ) -> PackedContext:
+        model = model or self.default_model
+        budget = self.budgets.resolve(task_name, model)
+        scores: dict[str, float] | None = None
+        retrieval: dict[str, Any] | None = None
+        if self.retriever is not None and budget.retrieval_top_k > 0:
+            full_query = _retrieval_query(budget, query)
+            pool = None if budget.retrieval_scope == "corpus" else chunks
+            hits = self.retriever.select(full_query, budget.retrieval_top_k, pool)
+            retrieval = {"query": full_query, "scope": budget.retrieval_scope, "hits": len(hits)}
+            # A query with no matching terms keeps the caller's chunks and tag ranking.
+            if hits:
+                chunks = [c for c, _ in hits]
+                scores = {c.chunk_id: score for c, score in hits}
+        packed = pack_chunks(chunks, budget, self.counter(model), task_name=task_name, model=model, scores=scores)
+        packed.retrieval = retrieval
+        return packed
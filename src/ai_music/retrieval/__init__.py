@@ -0,0 +1 @@
+# Package marker for retrieval indexes and keyword matching over doc chunks and corpora.
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ai_music.io.files import read_json, stable_hash, write_json
+from ai_music.models.types import GuideChunk
+
+
+BM25_INDEX_VERSION = 1
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or so that the their then "
+    "there these this to was were will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_terms(chunk: GuideChunk, heading_boost: int = 2) -> Counter[str]:
+    """Term frequencies for a chunk; heading words count `heading_boost` times (a BM25F-style field weight)."""
+    terms = Counter(tokenize(chunk.text))
+    for term in tokenize(" ".join(chunk.heading_path)):
+        terms[term] += heading_boost
+    return terms
+
+
+def corpus_digest(chunk_ids: Iterable[str]) -> str:
+    return stable_hash(*chunk_ids, length=16)
+
+
+@dataclass(slots=True)
+class BM25Hit:
+    chunk_id: str
+    score: float
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring over `GuideChunk` text and heading paths.
+
+    Postings map each term to `(doc, tf)` pairs, so a query only touches the documents that
+    contain its terms. The index persists as JSON next to the chunk JSONL.
+    """
+
+    def __init__(
+        self,
+        chunk_ids: list[str],
+        doc_lengths: list[int],
+        postings: dict[str, list[list[int]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        heading_boost: int = 2,
+    ):
+        self.chunk_ids = chunk_ids
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self.heading_boost = heading_boost
+        self.digest = corpus_digest(chunk_ids)
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(chunk_ids)}
+        count = len(doc_lengths)
+        avgdl = (sum(doc_lengths) / count) if count else 0.0
+        # Per-document length normalisation is query-independent, so precompute it once.
+        self._norms = [k1 * (1 - b + b * (dl / avgdl)) if avgdl else k1 for dl in doc_lengths]
+        self._idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in postings.items()
+        }
+
+    @classmethod
+    def build(
+        cls, chunks: Iterable[GuideChunk], k1: float = 1.5, b: float = 0.75, heading_boost: int = 2
+    ) -> BM25Index:
+        chunk_ids: list[str] = []
+        doc_lengths: list[int] = []
+        postings: dict[str, list[list[int]]] = {}
+        for doc, chunk in enumerate(chunks):
+            terms = chunk_terms(chunk, heading_boost)
+            chunk_ids.append(chunk.chunk_id)
+            doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                postings.setdefault(term, []).append([doc, tf])
+        return cls(chunk_ids, doc_lengths, postings, k1=k1, b=b, heading_boost=heading_boost)
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": BM25_INDEX_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "heading_boost": self.heading_boost,
+            "corpus_digest": self.digest,
+            "chunk_ids": self.chunk_ids,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BM25Index:
+        if data.get("version") != BM25_INDEX_VERSION:
+            raise ValueError(f"Unsupported BM25 index version: {data.get('version')}")
+        return cls(
+            data["chunk_ids"],
+            data["doc_lengths"],
+            data["postings"],
+            k1=data["k1"],
+            b=data["b"],
+            heading_boost=data["heading_boost"],
+        )
+
+    def save(self, path: Path) -> None:
+        write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: Path) -> BM25Index:
+        return cls.from_dict(read_json(path))
+
+    def scores(self, query: str, allowed: set[str] | None = None) -> dict[int, float]:
+        allowed_docs = {self._positions[c] for c in allowed if c in self._positions} if allowed is not None else None
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                if allowed_docs is not None and doc not in allowed_docs:
+                    continue
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + self._norms[doc])
+        return scores
+
+    def search(self, query: str, top_k: int = 10, allowed: set[str] | None = None) -> list[BM25Hit]:
+        """Top-`top_k` chunks for `query`, best first (ties keep corpus order); `allowed` limits the pool."""
+        scores = self.scores(query, allowed)
+        best = heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [BM25Hit(self.chunk_ids[doc], round(score, 6)) for doc, score in best]
+
+
+def load_or_build_bm25(path: Path, chunks: list[GuideChunk], save: bool = False) -> BM25Index:
+    """Load the persisted index when it covers exactly `chunks`, otherwise rebuild it.
+
+    A rebuilt index is only held in memory unless `save` is set.
+    """
+    if path.exists():
+        try:
+            index = BM25Index.load(path)
+        except (ValueError, KeyError):
+            index = None
+        if index is not None and index.digest == corpus_digest(c.chunk_id for c in chunks):
+            return index
+    index = BM25Index.build(chunks)
+    if save:
+        index.save(path)
+    return index
+
+
+class ChunkRetriever:
+    """Resolve BM25 hits back to chunks, over the whole corpus or a caller-supplied pool."""
+
+    def __init__(self, index: BM25Index, chunks: list[GuideChunk]):
+        self.index = index
+        self._chunks = {c.chunk_id: c for c in chunks}
+        self._order = {c.chunk_id: i for i, c in enumerate(chunks)}
+
+    @property
+    def digest(self) -> str:
+        return self.index.digest
+
+    def select(
+        self, query: str, top_k: int, pool: list[GuideChunk] | None = None
+    ) -> list[tuple[GuideChunk, float]]:
+        """Top-`top_k` chunks for `query` with their scores, returned in corpus order."""
+        allowed = {c.chunk_id for c in pool} if pool is not None else None
+        hits = [h for h in self.index.search(query, top_k, allowed) if h.chunk_id in self._chunks]
+        hits.sort(key=lambda h: self._order[h.chunk_id])
+        return [(self._chunks[h.chunk_id], h.score) for h in hits]
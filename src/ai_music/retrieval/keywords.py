@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from collections.abc import Iterable, Iterator
+from functools import cache
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from ai_music.config import ROOT_DIR
+from ai_music.io.files import read_json, stable_hash
+
+
+KEYWORD_TAGS_CONFIG = Path("configs/keyword_tags.json")
+# Below this many patterns, one C-level `in` scan per pattern beats a Python-level automaton pass:
+# on 2-20 KB of text with no hits the two break even between 96 and 192 patterns, and `in` wins by
+# more when keywords do occur. Shipped substring vocabularies are smaller, so `found` uses `in`.
+AUTOMATON_MIN_PATTERNS = 96
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one left-to-right pass reports every occurrence of every pattern.
+
+    The trie's failure links are folded into a full transition table at build time, so the scan
+    is a single dict lookup per character no matter how many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        trie: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Aho-Corasick patterns must be non-empty.")
+            state = 0
+            for ch in pattern:
+                nxt = trie[state].get(ch)
+                if nxt is None:
+                    nxt = len(trie)
+                    trie.append({})
+                    out.append(())
+                    trie[state][ch] = nxt
+                state = nxt
+            out[state] += (index,)
+        fail = [0] * len(trie)
+        delta: list[dict[str, int]] = [{} for _ in trie]
+        delta[0] = dict(trie[0])
+        queue = deque(trie[0].values())
+        while queue:
+            state = queue.popleft()
+            if state:
+                # BFS order: the failure state is shallower, so its transitions are final.
+                delta[state] = {**delta[fail[state]], **trie[state]}
+            for ch, nxt in trie[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                out[nxt] += out[fail[nxt]]
+                queue.append(nxt)
+        self._delta = delta
+        self._out = out
+        self._steps = [transitions.get for transitions in delta]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def found(self, text: str) -> set[int]:
+        """Indices of the patterns that occur in `text`; cheaper than `iter_matches` when offsets do not matter."""
+        if len(self.patterns) < AUTOMATON_MIN_PATTERNS:
+            return {index for index, pattern in enumerate(self.patterns) if pattern in text}
+        steps, out = self._steps, self._out
+        hits: set[int] = set()
+        state = 0
+        for ch in text:
+            state = steps[state](ch, 0)
+            if out[state]:
+                hits.update(out[state])
+        return hits
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """Yield `(start, end, pattern_index)` for every occurrence, ordered by end offset."""
+        delta, out, patterns = self._delta, self._out, self.patterns
+        state = 0
+        for end, ch in enumerate(text, start=1):
+            state = delta[state].get(ch, 0)
+            for index in out[state]:
+                yield end - len(patterns[index]), end, index
+
+
+class KeywordRule(BaseModel):
+    tags: list[str]
+    keywords: list[str]
+
+
+class KeywordVocabulary(BaseModel):
+    # "word" matches keywords only at word boundaries and treats any whitespace run as one space;
+    # "substring" matches anywhere, like `keyword in text`.
+    match: Literal["substring", "word"] = "substring"
+    rules: list[KeywordRule] = Field(default_factory=list)
+
+    def tagger(self) -> KeywordTagger:
+        return KeywordTagger(self.rules, word_boundary=self.match == "word")
+
+
+class KeywordTagsConfig(BaseModel):
+    vocabularies: dict[str, KeywordVocabulary] = Field(default_factory=dict)
+
+
+class KeywordTagger:
+    """Tag text with every rule whose keywords occur in it, using one case-insensitive pass.
+
+    Rules keep their configured order: `tags` lists tags by rule order (first occurrence wins),
+    and `first` returns the first tag of the highest-priority matching rule.
+    """
+
+    def __init__(self, rules: Iterable[KeywordRule], word_boundary: bool = False):
+        self.rules = list(rules)
+        self.word_boundary = word_boundary
+        rules_by_keyword: dict[str, list[int]] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                key = self._normalize(keyword)
+                if key:
+                    rules_by_keyword.setdefault(key, []).append(index)
+        self._rules_by_keyword = list(rules_by_keyword.values())
+        self._automaton = AhoCorasick(rules_by_keyword)
+        self.digest = stable_hash(
+            "word" if word_boundary else "substring",
+            json.dumps([rule.model_dump() for rule in self.rules], sort_keys=True),
+            length=16,
+        )
+
+    def _normalize(self, text: str) -> str:
+        text = text.lower()
+        return " ".join(text.split()) if self.word_boundary else text
+
+    def _spans(self, text: str) -> Iterator[tuple[int, int, int]]:
+        for start, end, index in self._automaton.iter_matches(text):
+            if self.word_boundary and (
+                (start > 0 and _is_word_char(text[start - 1])) or (end < len(text) and _is_word_char(text[end]))
+            ):
+                continue
+            yield start, end, index
+
+    def matched_rules(self, text: str) -> set[int]:
+        text = self._normalize(text)
+        if self.word_boundary:
+            found = {index for _, _, index in self._spans(text)}
+        else:
+            found = self._automaton.found(text)
+        return {rule for index in found for rule in self._rules_by_keyword[index]}
+
+    def tags(self, text: str) -> list[str]:
+        seen: dict[str, None] = {}
+        for index in sorted(self.matched_rules(text)):
+            seen.update(dict.fromkeys(self.rules[index].tags))
+        return list(seen)
+
+    def first(self, text: str) -> str | None:
+        hits = self.matched_rules(text)
+        return self.rules[min(hits)].tags[0] if hits else None
+
+    def covers_words(self, text: str) -> bool:
+        """True when at least one keyword matched and matches account for every word character."""
+        normalized = self._normalize(text)
+        covered = [False] * len(normalized)
+        matched = False
+        for start, end, _ in self._spans(normalized):
+            matched = True
+            covered[start:end] = [True] * (end - start)
+        return matched and all(covered[i] or not _is_word_char(ch) for i, ch in enumerate(normalized))
+
+
+def load_keyword_tags(path: Path | None) -> KeywordTagsConfig:
+    if path is None or not path.exists():
+        return KeywordTagsConfig()
+    return KeywordTagsConfig.model_validate(read_json(path))
+
+
+@cache
+def keyword_tagger(name: str, path: Path | None = None) -> KeywordTagger:
+    """The named vocabulary from `configs/keyword_tags.json` (or `path`), built once per process.
+
+    A missing config file or vocabulary raises rather than silently tagging nothing.
+    """
+    path = path or ROOT_DIR / KEYWORD_TAGS_CONFIG
+    if not path.exists():
+        raise FileNotFoundError(f"Missing keyword tags config: {path}")
+    vocabularies = load_keyword_tags(path).vocabularies
+    if name not in vocabularies:
+        available = ", ".join(sorted(vocabularies)) or "none"
+        raise ValueError(f"Keyword vocabulary not found: {name}. Available: {available}")
+    return vocabularies[name].tagger()
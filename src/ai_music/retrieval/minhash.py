@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import random
+import zlib
+from collections.abc import Sequence
+
+from ai_music.retrieval.bm25 import TOKEN_RE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+# Mersenne prime for the universal hash family; with 32-bit shingle hashes `a * x + b` stays
+# below 2**63, so the numpy path can use uint64 without overflow.
+_PRIME = (1 << 31) - 1
+# Below this many shingles the pure-Python loop beats building numpy arrays.
+_NUMPY_MIN_SHINGLES = 32
+
+
+def shingles(text: str, size: int = 3) -> set[int]:
+    """CRC32 hashes of the word `size`-grams in `text` (the whole text when it is shorter)."""
+    words = TOKEN_RE.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i : i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def jaccard(left: set[int], right: set[int]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class MinHasher:
+    """MinHash signatures under `num_perm` seeded hash functions `(a * x + b) mod p`.
+
+    The share of equal signature slots between two sets estimates their Jaccard similarity.
+    Seeds are fixed, so signatures are comparable across runs and processes.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+        if np is not None:
+            self._a_np = np.array(self._a, dtype=np.uint64)
+            self._b_np = np.array(self._b, dtype=np.uint64)
+
+    def signature(self, hashes: set[int]) -> tuple[int, ...]:
+        if not hashes:
+            return ()
+        if np is not None and len(hashes) >= _NUMPY_MIN_SHINGLES:
+            x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            values = (np.outer(self._a_np, x) + self._b_np[:, None]) % _PRIME
+            return tuple(values.min(axis=1).tolist())
+        return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in zip(self._a, self._b, strict=True))
+
+
+def find_near_duplicates(
+    items: Sequence[tuple[str, str]],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 16,
+    shingle_size: int = 3,
+) -> dict[str, str]:
+    """Map each near-duplicate item ID to the ID of the earlier item it repeats.
+
+    Signatures are cut into `bands` bands; items sharing any band bucket become candidates,
+    and a candidate counts as a duplicate when the exact Jaccard similarity of their word
+    shingles reaches `threshold`. With 16 bands of 4 rows, a pair at 0.8 similarity is a
+    candidate with probability above 0.999. An item is only ever matched to a canonical
+    (non-duplicate) item earlier in `items`, so order decides which copy survives.
+    """
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+    buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+    shingle_sets: list[set[int]] = []
+    duplicates: dict[str, str] = {}
+    for position, (item_id, text) in enumerate(items):
+        grams = shingles(text, shingle_size)
+        shingle_sets.append(grams)
+        signature = hasher.signature(grams)
+        if not signature:
+            continue
+        keys = [(band, signature[band * rows : (band + 1) * rows]) for band in range(bands)]
+        candidates = sorted({other for key in keys for other in buckets.get(key, ())})
+        match = next((o for o in candidates if jaccard(grams, shingle_sets[o]) >= threshold), None)
+        if match is not None:
+            duplicates[item_id] = items[match][0]
+            continue
+        # Only canonical items are bucketed, so duplicates always point at a surviving copy.
+        for key in keys:
+            buckets.setdefault(key, []).append(position)
+    return duplicates
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import math
+import zlib
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ai_music.io.files import read_json, stable_hash, write_json
+from ai_music.retrieval.bm25 import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+VECTOR_INDEX_VERSION = 1
+DEFAULT_DIM = 2048
+# Below this many rows a brute-force scan is as fast as probing clusters.
+IVF_MIN_ROWS = 512
+
+
+def vector_digest(dim: int, ids: Sequence[str]) -> str:
+    return stable_hash(str(dim), *ids, length=16)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("Vector indexes need numpy: pip install 'ai-music[vectors]'.")
+
+
+@dataclass(slots=True)
+class HashingVectorizer:
+    """Map text to a fixed-width vector with the hashing trick; no vocabulary to fit or store.
+
+    Features are words, word bigrams and character n-grams of each word (so "basses" is close to
+    "bass"). Each feature hashes (CRC32, stable across runs) to a signed bucket; term counts are
+    log-scaled and rows L2-normalised, so a dot product is cosine similarity.
+    """
+
+    dim: int = DEFAULT_DIM
+    char_ngrams: tuple[int, int] = (3, 4)
+
+    def features(self, text: str) -> list[str]:
+        words = tokenize(text)
+        feats = [f"w:{w}" for w in words]
+        feats.extend(f"b:{a} {b}" for a, b in zip(words, words[1:], strict=False))
+        low, high = self.char_ngrams
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                feats.extend(f"c:{padded[i : i + n]}" for i in range(len(padded) - n + 1))
+        return feats
+
+    def buckets(self, text: str) -> dict[int, float]:
+        counts: dict[int, float] = {}
+        for feat in self.features(text):
+            h = zlib.crc32(feat.encode("utf-8"))
+            bucket = h % self.dim
+            counts[bucket] = counts.get(bucket, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        return {b: math.copysign(1 + math.log(abs(v)), v) for b, v in counts.items() if v}
+
+    def transform(self, texts: Sequence[str]) -> Any:
+        _require_numpy()
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = self.buckets(text)
+            if buckets:
+                matrix[row, list(buckets)] = list(buckets.values())
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+@dataclass(slots=True)
+class VectorHit:
+    item_id: str
+    score: float
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def _spherical_kmeans(matrix: Any, n_lists: int, iterations: int = 8, seed: int = 0) -> tuple[Any, Any]:
+    """Cluster unit rows by cosine; returns (centroids, assignment per row)."""
+    rng = np.random.default_rng(seed)
+    centroids = np.array(matrix[rng.choice(len(matrix), size=n_lists, replace=False)], dtype=np.float32)
+    assign = np.zeros(len(matrix), dtype=np.int64)
+    for _ in range(iterations):
+        assign = np.argmax(matrix @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = matrix[assign == c]
+            if len(members):
+                mean = members.sum(axis=0)
+                norm = np.linalg.norm(mean)
+                if norm > 0:
+                    centroids[c] = mean / norm
+    return centroids, np.argmax(matrix @ centroids.T, axis=1)
+
+
+class VectorIndex:
+    """Cosine top-k over a float32 matrix of hashed feature vectors, with an optional IVF layer.
+
+    Rows are stored as `.npy` and memory-mapped on load, so only the rows a query touches are
+    paged in. Large indexes are clustered with spherical k-means; a query scores the `nprobe`
+    nearest clusters' rows instead of the whole matrix.
+    """
+
+    def __init__(
+        self,
+        vectorizer: HashingVectorizer,
+        matrix: Any,
+        ids: list[str],
+        metadata: list[dict[str, Any]],
+        centroids: Any | None = None,
+        list_order: Any | None = None,
+        list_offsets: Any | None = None,
+    ):
+        _require_numpy()
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.ids = ids
+        self.metadata = metadata
+        self.centroids = centroids
+        self.list_order = list_order
+        self.list_offsets = list_offsets
+        self.digest = vector_digest(vectorizer.dim, ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_lists(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: list[str],
+        texts: list[str],
+        metadata: list[dict[str, Any]] | None = None,
+        vectorizer: HashingVectorizer | None = None,
+        n_lists: int | None = None,
+    ) -> VectorIndex:
+        vectorizer = vectorizer or HashingVectorizer()
+        matrix = vectorizer.transform(texts)
+        metadata = metadata or [{} for _ in ids]
+        if n_lists is None:
+            n_lists = int(math.sqrt(len(ids))) if len(ids) >= IVF_MIN_ROWS else 0
+        if n_lists <= 1:
+            return cls(vectorizer, matrix, ids, metadata)
+        centroids, assign = _spherical_kmeans(matrix, min(n_lists, len(ids)))
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        return cls(vectorizer, matrix, ids, metadata, centroids, order, offsets)
+
+    def save(self, directory: Path, name: str) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(self.matrix, dtype=np.float32))
+        if self.centroids is not None:
+            np.save(directory / f"{name}.centroids.npy", self.centroids)
+        write_json(
+            directory / f"{name}.meta.json",
+            {
+                "version": VECTOR_INDEX_VERSION,
+                "dim": self.vectorizer.dim,
+                "char_ngrams": list(self.vectorizer.char_ngrams),
+                "digest": self.digest,
+                "ids": self.ids,
+                "metadata": self.metadata,
+                "list_order": None if self.list_order is None else self.list_order.tolist(),
+                "list_offsets": None if self.list_offsets is None else self.list_offsets.tolist(),
+            },
+        )
+
+    @classmethod
+    def load(cls, directory: Path, name: str, mmap: bool = True) -> VectorIndex:
+        _require_numpy()
+        meta = read_json(directory / f"{name}.meta.json")
+        if meta.get("version") != VECTOR_INDEX_VERSION:
+            raise ValueError(f"Unsupported vector index version: {meta.get('version')}")
+        vectorizer = HashingVectorizer(dim=meta["dim"], char_ngrams=tuple(meta["char_ngrams"]))
+        matrix = np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+        centroids_path = directory / f"{name}.centroids.npy"
+        centroids = np.load(centroids_path) if meta["list_order"] is not None else None
+        return cls(
+            vectorizer,
+            matrix,
+            meta["ids"],
+            meta["metadata"],
+            centroids=centroids,
+            list_order=None if meta["list_order"] is None else np.asarray(meta["list_order"], dtype=np.int64),
+            list_offsets=None if meta["list_offsets"] is None else np.asarray(meta["list_offsets"], dtype=np.int64),
+        )
+
+    def _candidate_rows(self, query: Any, nprobe: int) -> Any | None:
+        if self.centroids is None:
+            return None
+        # Probe the nearest clusters that have rows; k-means can leave some clusters empty.
+        sizes = np.diff(self.list_offsets)
+        nearest = [c for c in np.argsort(-(self.centroids @ query), kind="stable") if sizes[c]][: max(1, nprobe)]
+        if not nearest:
+            return None
+        rows = [self.list_order[self.list_offsets[c] : self.list_offsets[c + 1]] for c in nearest]
+        return np.sort(np.concatenate(rows))
+
+    def search(self, text: str, top_k: int = 10, nprobe: int = 8, exact: bool = False) -> list[VectorHit]:
+        """Top-`top_k` rows by cosine similarity to `text`; `exact` skips the IVF probe."""
+        query = self.vectorizer.transform([text])[0]
+        if not len(self.ids) or not query.any() or top_k <= 0:
+            return []
+        rows = None if exact else self._candidate_rows(query, nprobe)
+        if rows is None:
+            rows = np.arange(len(self.ids))
+            scores = np.asarray(self.matrix @ query)
+        else:
+            scores = np.asarray(self.matrix[rows] @ query)
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Sort by score, then row, so ties are deterministic.
+        top = sorted(top.tolist(), key=lambda i: (-float(scores[i]), int(rows[i])))
+        return [
+            VectorHit(self.ids[int(rows[i])], round(float(scores[i]), 6), self.metadata[int(rows[i])])
+            for i in top
+        ]
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
+import queue
+import threading
+from collections.abc import Iterator
 from typing import Any
 
 import httpx
 
+from ai_music.io.ratelimit import AdaptiveRateLimiter, request_with_retry
+from ai_music.suno.mapping import count_page_songs, next_page_cursor
 from ai_music.suno.schemas import SunoMappingConfig
 
 
+_END_OF_PAGES = object()
+
+
 class SunoApiClient:
-    def __init__(self, api_key: str, timeout: float = 30.0):
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = 30.0,
+        limiter: AdaptiveRateLimiter | None = None,
+        max_retries: int = 4,
+    ):
         self.api_key = api_key
         self.timeout = timeout
+        self.limiter = limiter or AdaptiveRateLimiter(rate_per_second=2.0, burst=2)
+        self.max_retries = max_retries
 
     def _headers(self, mapping: SunoMappingConfig) -> dict[str, str]:
         headers: dict[str, str] = {}
@@ -24,7 +40,9 @@ class SunoApiClient:
         mapping: SunoMappingConfig,
         cursor: str | None = None,
         page_size: int | None = None,
+        http_client: httpx.Client | None = None,
     ) -> dict[str, Any]:
+        """Fetch one page; pass `http_client` to reuse its keep-alive connection across pages."""
         method = mapping.api.http_method.upper().strip()
         if method != "GET":
             raise ValueError(f"Unsupported http_method '{method}'. Only GET is supported.")
@@ -34,10 +52,83 @@ class SunoApiClient:
         if cursor:
             params[mapping.api.cursor_param] = cursor
 
-        with httpx.Client(timeout=self.timeout) as client:
-            response = client.get(url, params=params, headers=self._headers(mapping))
-            response.raise_for_status()
-            payload = response.json()
+        headers = self._headers(mapping)
+        if http_client is None:
+            with httpx.Client(timeout=self.timeout) as client:
+                return self.fetch_created_page(mapping, cursor, page_size, http_client=client)
+        response = request_with_retry(
+            self.limiter,
+            lambda: http_client.get(url, params=params, headers=headers),
+            max_retries=self.max_retries,
+        )
+        response.raise_for_status()
+        payload = response.json()
         if not isinstance(payload, dict):
             raise ValueError("Suno API page response must be a JSON object.")
         return payload
+
+    def iter_created_pages(
+        self,
+        mapping: SunoMappingConfig,
+        page_size: int | None = None,
+        max_pages: int = 100,
+        max_songs: int | None = None,
+        prefetch: int = 2,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield created-song pages in cursor order while a background thread fetches ahead.
+
+        Only the next cursor is read before the following request goes out, so the caller's
+        normalization of one page overlaps the request for the next; up to `prefetch` pages wait
+        in a bounded queue. Fetching stops after `max_pages`, at the end of the cursor chain (or
+        a repeated cursor), or once the pages fetched hold `max_songs` songs, so no request is
+        made that a sequential loop would not have made. Fetch errors are re-raised here.
+        """
+        pages: queue.Queue[Any] = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+
+        def put(item: Any) -> None:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce() -> None:
+            try:
+                with httpx.Client(timeout=self.timeout) as client:
+                    cursor: str | None = None
+                    seen_cursors: set[str] = set()
+                    song_count = 0
+                    for _ in range(max_pages):
+                        if stop.is_set():
+                            return
+                        page = self.fetch_created_page(mapping, cursor=cursor, page_size=page_size, http_client=client)
+                        put(page)
+                        song_count += count_page_songs(page, mapping)
+                        next_cursor = next_page_cursor(page, mapping)
+                        if max_songs is not None and song_count >= max_songs:
+                            return
+                        if not next_cursor or next_cursor in seen_cursors:
+                            return
+                        seen_cursors.add(next_cursor)
+                        cursor = next_cursor
+            except Exception as exc:  # noqa: BLE001
+                put(exc)
+            finally:
+                put(_END_OF_PAGES)
+
+        fetcher = threading.Thread(target=produce, name="suno-page-fetch", daemon=True)
+        fetcher.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _END_OF_PAGES:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Also reached when the caller stops early: release the fetcher and let it finish.
+            stop.set()
+            fetcher.join()
@@ -139,6 +139,19 @@ def normalize_song_payload(raw_song: dict[str, Any], mapping: SunoMappingConfig)
     )
 
 
+def next_page_cursor(page_payload: dict[str, Any], mapping: SunoMappingConfig) -> str | None:
+    next_cursor_raw = extract_path(page_payload, mapping.response.next_cursor_path)
+    return str(next_cursor_raw).strip() if next_cursor_raw not in (None, "") else None
+
+
+def count_page_songs(page_payload: dict[str, Any], mapping: SunoMappingConfig) -> int:
+    """Songs `normalize_page_payload` will return for this page, without normalizing them."""
+    songs_node = extract_path(page_payload, mapping.response.songs_path)
+    if not isinstance(songs_node, list):
+        return 0
+    return sum(1 for raw_song in songs_node if isinstance(raw_song, dict))
+
+
 def normalize_page_payload(
     page_payload: dict[str, Any],
     mapping: SunoMappingConfig,
@@ -147,10 +160,7 @@ def normalize_page_payload(
     if not isinstance(songs_node, list):
         raise ValueError(f"Mapped songs_path '{mapping.response.songs_path}' did not resolve to a list")
     songs = [normalize_song_payload(raw_song, mapping) for raw_song in songs_node if isinstance(raw_song, dict)]
-
-    next_cursor_raw = extract_path(page_payload, mapping.response.next_cursor_path)
-    next_cursor = str(next_cursor_raw).strip() if next_cursor_raw not in (None, "") else None
-    return songs, next_cursor
+    return songs, next_page_cursor(page_payload, mapping)
 
 
 def normalize_query_tokens(text: str) -> list[str]:
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from dataclasses import asdict
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any
 
 from ai_music.config import AppConfig
-from ai_music.io.files import read_json, stable_hash, write_json, write_jsonl, write_text
+from ai_music.io.files import read_json, read_jsonl, stable_hash, write_json, write_jsonl, write_text
 from ai_music.io.markdown import iter_doc_chunks
-from ai_music.llm.ollama_client import OllamaClient
-from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.base import agenerate_structured
+from ai_music.llm.router import LLMRouter, answered_by, build_llm_router, routing_scope
+from ai_music.llm.streaming import summarize_stream_metrics
+from ai_music.llm.telemetry import collect_spans
+from ai_music.media.fingerprint import file_content_hash
 from ai_music.models.schemas import PromptBrief, SunoFragments
 from ai_music.models.types import GuideChunk
 from ai_music.prompting.briefs import (
@@ -17,25 +23,166 @@ from ai_music.prompting.briefs import (
     build_suno_fragments_from_brief,
     coerce_prompt_brief,
 )
+from ai_music.prompting.context import (
+    CONTEXT_BUDGETS_CONFIG,
+    ContextPacker,
+    PackedContext,
+    load_context_budgets,
+)
 from ai_music.prompting.render_fal import render_fal_payload
 from ai_music.prompting.render_openrouter import render_openrouter_templates
 from ai_music.prompting.render_suno import render_suno_prompt
+from ai_music.retrieval.bm25 import ChunkRetriever, load_or_build_bm25
+from ai_music.retrieval.keywords import keyword_tagger
+from ai_music.retrieval.minhash import find_near_duplicates
+from ai_music.retrieval.vectors import DEFAULT_DIM, HashingVectorizer, VectorIndex, vector_digest
+from ai_music.suno.schemas import SunoSongRecord
 
 
 DOCS_CHUNKS_JSONL = Path("data/analysis/doc_chunks.jsonl")
 DOCS_CHUNKS_INDEX = Path("data/analysis/doc_chunks_index.json")
+DOCS_BM25_INDEX = Path("data/analysis/doc_chunks_bm25.json")
+DOCS_CHUNKS_MANIFEST = Path("data/analysis/doc_chunks_manifest.json")
+# Bump when chunking or tagging changes so cached chunks are rebuilt.
+DOCS_INDEX_VERSION = 1
+# Docs at least this large are chunked line by line instead of read whole.
+DOCS_STREAM_MIN_BYTES = 32 * 1024 * 1024
+# Sections longer than this are split into overlapping parts; it leaves headroom for the
+# heading/tag overhead under the default `per_chunk_max_tokens` of 350.
+DOCS_CHUNK_MAX_TOKENS = 320
+DOCS_CHUNK_OVERLAP_TOKENS = 40
+# Word-shingle Jaccard similarity at which a chunk is flagged as a near-duplicate of an earlier one.
+DOCS_DEDUPE_THRESHOLD = 0.8
+VECTOR_INDEX_DIR = Path("data/analysis/vectors")
+DOC_VECTORS = "doc_chunks"
+SUNO_STYLE_VECTORS = "suno_styles"
+# Similar past Suno style prompts offered to the fragments pass as references.
+STYLE_REFERENCE_TOP_K = 3
+STYLE_REFERENCE_MIN_SCORE = 0.15
+PIPELINE_STAGES = ("brief", "fragments", "structure")
+# Bump when prompts, task wiring or renderers change in ways that should invalidate reused briefs/renders.
+PROMPT_PIPELINE_VERSION = "1"
+
+
+def _doc_paths(cfg: AppConfig) -> dict[str, Path]:
+    """Markdown docs under the docs root, recursively, keyed by POSIX path relative to it."""
+    return {p.relative_to(cfg.docs_dir).as_posix(): p for p in sorted(cfg.docs_dir.rglob("*.md")) if p.is_file()}
+
+
+def _read_chunk_rows(path: Path) -> dict[str, list[GuideChunk]]:
+    by_source: dict[str, list[GuideChunk]] = {}
+    if path.exists():
+        for row in read_jsonl(path, skip_invalid=True):
+            chunk = GuideChunk(**row)
+            by_source.setdefault(chunk.source_file, []).append(chunk)
+    return by_source
+
+
+def index_docs(
+    cfg: AppConfig,
+    force: bool = False,
+    workers: int = 1,
+    stream_min_bytes: int = DOCS_STREAM_MIN_BYTES,
+    max_tokens: int | None = DOCS_CHUNK_MAX_TOKENS,
+    overlap_tokens: int = DOCS_CHUNK_OVERLAP_TOKENS,
+    dedupe_threshold: float | None = DOCS_DEDUPE_THRESHOLD,
+    collapse_duplicates: bool = False,
+) -> dict[str, Any]:
+    """Chunk every markdown doc under `docs/` (recursively) into `doc_chunks.jsonl`.
 
+    A manifest of per-file size, mtime and content hash lets reruns re-chunk only new or edited
+    docs; chunks of unchanged docs are spliced back in from the previous JSONL. A file whose
+    mtime moved but whose hash did not is treated as unchanged. `force` re-chunks everything.
+    Changed docs are chunked across `workers` processes, and docs of at least `stream_min_bytes`
+    are read line by line; both give the same chunks as a serial in-memory pass. Sections over
+    `max_tokens` are split into parts that overlap by up to `overlap_tokens` (`None` disables
+    splitting); changing either setting re-chunks every doc.
 
-def index_docs(cfg: AppConfig) -> dict[str, Any]:
-    doc_paths = sorted(cfg.docs_dir.glob("*.md"))
-    chunks = iter_doc_chunks(doc_paths)
-    rows = [asdict(c) for c in chunks]
-    write_jsonl(cfg.root_dir / DOCS_CHUNKS_JSONL, rows)
+    Chunks whose text near-duplicates an earlier chunk's (MinHash/LSH, `dedupe_threshold`) get
+    `duplicate_of` set to the canonical chunk ID. `collapse_duplicates` also leaves them out of
+    the BM25 index and of the chunks every retrieval and prompt workflow loads; the JSONL always
+    keeps them so incremental runs can re-evaluate them.
+    """
+    chunks_path = cfg.root_dir / DOCS_CHUNKS_JSONL
+    manifest_path = cfg.root_dir / DOCS_CHUNKS_MANIFEST
+    manifest: dict[str, Any] = read_json(manifest_path) if manifest_path.exists() else {}
+    previous_files: dict[str, dict[str, Any]] = manifest.get("files", {})
+    # Chunk tags come from the configured keyword vocabulary, so editing it re-tags every doc.
+    tag_vocabulary = keyword_tagger("doc_tags").digest
+    chunking = {"max_tokens": max_tokens, "overlap_tokens": overlap_tokens}
+    stale = (
+        manifest.get("version") != DOCS_INDEX_VERSION
+        or manifest.get("tag_vocabulary") != tag_vocabulary
+        or manifest.get("chunking") != chunking
+    )
+    if force or stale or not chunks_path.exists():
+        previous_files = {}
+    previous_chunks = _read_chunk_rows(chunks_path) if previous_files else {}
+    doc_paths = _doc_paths(cfg)
+
+    files: dict[str, dict[str, Any]] = {}
+    changed: list[str] = []
+    for rel, path in doc_paths.items():
+        stat = path.stat()
+        entry = previous_files.get(rel)
+        cached = previous_chunks.get(rel)
+        # Same size and mtime: trust the previous hash without reading the file.
+        if entry is not None and cached is not None and (entry["size"], entry["mtime_ns"]) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            content_hash = entry["content_hash"]
+        else:
+            content_hash = file_content_hash(path)
+        if entry is None or cached is None or entry["content_hash"] != content_hash:
+            changed.append(rel)
+        files[rel] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "content_hash": content_hash}
+    rechunked: dict[str, list[GuideChunk]] = {rel: [] for rel in changed}
+    for chunk in iter_doc_chunks(
+        [doc_paths[rel] for rel in changed],
+        changed,
+        workers=workers,
+        stream_min_bytes=stream_min_bytes,
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens,
+    ):
+        rechunked[chunk.source_file].append(chunk)
+    chunks: list[GuideChunk] = []
+    for rel in doc_paths:
+        doc_chunks = rechunked[rel] if rel in rechunked else previous_chunks[rel]
+        files[rel]["chunk_count"] = len(doc_chunks)
+        chunks.extend(doc_chunks)
+    removed = sorted(set(previous_files) - set(files))
+    # Re-run over the whole corpus: an edit in one doc can create or break a duplicate in another.
+    duplicates: dict[str, str] = {}
+    if dedupe_threshold:
+        duplicates = find_near_duplicates([(c.chunk_id, c.text) for c in chunks], dedupe_threshold)
+    flags_changed = any(c.duplicate_of != duplicates.get(c.chunk_id) for c in chunks)
+    for chunk in chunks:
+        chunk.duplicate_of = duplicates.get(chunk.chunk_id)
+    live_chunks = [c for c in chunks if not c.duplicate_of] if collapse_duplicates else chunks
+
+    if changed or removed or flags_changed or not chunks_path.exists():
+        write_jsonl(chunks_path, [asdict(c) for c in chunks])
+    # The BM25 index is keyed on the chunk-ID digest, so it is only rebuilt when chunks changed.
+    bm25 = load_or_build_bm25(cfg.root_dir / DOCS_BM25_INDEX, live_chunks, save=True)
+    write_json(
+        manifest_path,
+        {"version": DOCS_INDEX_VERSION, "tag_vocabulary": tag_vocabulary, "chunking": chunking, "files": files},
+    )
     index = {
         "doc_count": len(doc_paths),
         "chunk_count": len(chunks),
-        "docs": [p.name for p in doc_paths],
+        "docs": list(doc_paths),
         "tags": sorted({t for c in chunks for t in c.tags}),
+        "bm25_terms": len(bm25.postings),
+        "split_section_count": len({c.parent_chunk_id for c in chunks if c.parent_chunk_id}),
+        "duplicate_chunk_count": len(duplicates),
+        "duplicate_tokens": sum(c.token_estimate for c in chunks if c.duplicate_of),
+        "collapse_duplicates": collapse_duplicates,
+        "changed_docs": changed,
+        "removed_docs": removed,
+        "unchanged_doc_count": len(doc_paths) - len(changed),
     }
     write_json(cfg.root_dir / DOCS_CHUNKS_INDEX, index)
     report_lines = [
@@ -44,35 +191,156 @@ def index_docs(cfg: AppConfig) -> dict[str, Any]:
         f"- Documents: {index['doc_count']}",
         f"- Chunks: {index['chunk_count']}",
         f"- Tags: {', '.join(index['tags'])}",
+        f"- BM25 terms: {index['bm25_terms']}",
+        f"- Split sections: {index['split_section_count']} (max {max_tokens} tokens, overlap {overlap_tokens})",
+        f"- Near-duplicate chunks: {index['duplicate_chunk_count']} (~{index['duplicate_tokens']} tokens)"
+        + (", collapsed" if collapse_duplicates else ""),
+        f"- Re-chunked: {len(changed)}; unchanged: {index['unchanged_doc_count']}; removed: {len(removed)}",
         "",
         "## Files",
         "",
-        *[f"- `{name}`" for name in index["docs"]],
+        *[f"- `{name}`{' (re-chunked)' if name in changed else ''}" for name in index["docs"]],
     ]
+    if removed:
+        report_lines.extend(["", "## Removed", "", *[f"- `{name}`" for name in removed]])
     write_text(cfg.outputs_dir / "reports/docs_ingest_report.md", "\n".join(report_lines))
     return index
 
 
 def _load_chunks(cfg: AppConfig) -> list[GuideChunk]:
+    """Indexed chunks, minus flagged near-duplicates when the index was built to collapse them."""
     path = cfg.root_dir / DOCS_CHUNKS_JSONL
     if not path.exists():
         index_docs(cfg)
+    index_path = cfg.root_dir / DOCS_CHUNKS_INDEX
+    collapse = index_path.exists() and bool(read_json(index_path).get("collapse_duplicates"))
     chunks: list[GuideChunk] = []
     with path.open("r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            chunks.append(GuideChunk(**json.loads(line)))
+            chunk = GuideChunk(**json.loads(line))
+            if not (collapse and chunk.duplicate_of):
+                chunks.append(chunk)
     return chunks
 
 
-def _select_llm(cfg: AppConfig, prefer: str = "openrouter") -> tuple[Any | None, str]:
-    if prefer == "openrouter" and cfg.providers.openrouter_api_key:
-        return OpenRouterClient(cfg.providers.openrouter_api_key), "openrouter"
-    if cfg.providers.openrouter_api_key:
-        return OpenRouterClient(cfg.providers.openrouter_api_key), "openrouter"
-    return OllamaClient(cfg.providers.ollama_base_url), "ollama"
+def _load_retriever(cfg: AppConfig, chunks: list[GuideChunk]) -> ChunkRetriever:
+    return ChunkRetriever(load_or_build_bm25(cfg.root_dir / DOCS_BM25_INDEX, chunks), chunks)
+
+
+def search_docs(cfg: AppConfig, query: str, top_k: int = 10) -> dict[str, Any]:
+    """Rank indexed doc chunks against `query` with BM25."""
+    started = time.perf_counter()
+    chunks = _load_chunks(cfg)
+    retriever = _load_retriever(cfg, chunks)
+    loaded = time.perf_counter()
+    hits = retriever.index.search(query, top_k)
+    by_id = {c.chunk_id: c for c in chunks}
+    return {
+        "query": query,
+        "load_ms": round((loaded - started) * 1000, 2),
+        "search_ms": round((time.perf_counter() - loaded) * 1000, 2),
+        "hits": [
+            {
+                "chunk_id": hit.chunk_id,
+                "score": hit.score,
+                "source_file": by_id[hit.chunk_id].source_file,
+                "heading_path": by_id[hit.chunk_id].heading_path,
+                "tags": by_id[hit.chunk_id].tags,
+                "snippet": " ".join(by_id[hit.chunk_id].text.split())[:240],
+            }
+            for hit in hits
+        ],
+    }
+
+
+def _suno_songs_path(cfg: AppConfig) -> Path:
+    return cfg.data_dir / "normalized" / "suno_created.normalized.json"
+
+
+def build_vector_indexes(cfg: AppConfig, dim: int = DEFAULT_DIM, n_lists: int | None = None) -> dict[str, Any]:
+    """Build hashed n-gram vector indexes over doc chunks and, when fetched, Suno style prompts."""
+    vectorizer = HashingVectorizer(dim=dim)
+    out_dir = cfg.root_dir / VECTOR_INDEX_DIR
+    chunks = _load_chunks(cfg)
+    doc_index = VectorIndex.build(
+        [c.chunk_id for c in chunks],
+        [" > ".join(c.heading_path) + "\n" + c.text for c in chunks],
+        [{"source_file": c.source_file, "heading_path": c.heading_path} for c in chunks],
+        vectorizer=vectorizer,
+        n_lists=n_lists,
+    )
+    doc_index.save(out_dir, DOC_VECTORS)
+    summary: dict[str, Any] = {
+        "dim": dim,
+        DOC_VECTORS: {"rows": len(doc_index), "ivf_lists": doc_index.n_lists},
+        SUNO_STYLE_VECTORS: None,
+    }
+    songs_path = _suno_songs_path(cfg)
+    if songs_path.exists():
+        songs = [SunoSongRecord.model_validate(row) for row in read_json(songs_path)]
+        songs = [song for song in songs if song.style_prompt.strip()]
+        style_index = VectorIndex.build(
+            [song.song_id for song in songs],
+            [song.style_prompt for song in songs],
+            [{"title": song.title, "likes": song.likes, "style_prompt": song.style_prompt} for song in songs],
+            vectorizer=vectorizer,
+            n_lists=n_lists,
+        )
+        style_index.save(out_dir, SUNO_STYLE_VECTORS)
+        summary[SUNO_STYLE_VECTORS] = {"rows": len(style_index), "ivf_lists": style_index.n_lists}
+    return summary
+
+
+def _load_vector_index(cfg: AppConfig, name: str) -> VectorIndex | None:
+    directory = cfg.root_dir / VECTOR_INDEX_DIR
+    if not (directory / f"{name}.meta.json").exists():
+        return None
+    try:
+        return VectorIndex.load(directory, name)
+    except (RuntimeError, ValueError):
+        return None
+
+
+def search_similar(
+    cfg: AppConfig, text: str, kind: str = "all", top_k: int = 10, nprobe: int = 8, exact: bool = False
+) -> dict[str, Any]:
+    """Guide sections and/or Suno songs whose text is most similar to `text` (cosine, hashed n-grams)."""
+    names = {"docs": [DOC_VECTORS], "suno": [SUNO_STYLE_VECTORS], "all": [DOC_VECTORS, SUNO_STYLE_VECTORS]}
+    if kind not in names:
+        raise ValueError("kind must be one of: docs, suno, all")
+    started = time.perf_counter()
+    result: dict[str, Any] = {"query": text}
+    for name in names[kind]:
+        index = _load_vector_index(cfg, name)
+        if index is None:
+            raise ValueError(f"Vector index `{name}` is missing; run `docs vector-index` first.")
+        hits = index.search(text, top_k=top_k, nprobe=nprobe, exact=exact)
+        result[name] = [{"id": hit.item_id, "score": hit.score, **hit.metadata} for hit in hits]
+        if name == DOC_VECTORS:
+            current = vector_digest(index.vectorizer.dim, [c.chunk_id for c in _load_chunks(cfg)])
+            result["doc_chunks_stale"] = current != index.digest
+    result["search_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _brief_query(brief: PromptBrief) -> str:
+    """Retrieval query for the Suno passes: what the brief says the song is."""
+    return " ".join([brief.genre, brief.subgenre or "", *brief.mood_tags, *brief.instrumentation])
+
+
+def _select_llm(
+    cfg: AppConfig, prefer: str = "openrouter", use_cache: bool = True, stream: bool = False
+) -> tuple[Any | None, str]:
+    router = build_llm_router(cfg, prefer=prefer, use_cache=use_cache, stream=stream)
+    return router, router.provider_name
+
+
+def _group_query(group: list[GuideChunk]) -> str:
+    # The guide's own headings steer corpus retrieval toward it and its closest neighbours.
+    return " ".join(dict.fromkeys(h for c in group for h in c.heading_path))
 
 
 def _groups_by_source(chunks: list[GuideChunk]) -> list[list[GuideChunk]]:
@@ -82,17 +350,61 @@ def _groups_by_source(chunks: list[GuideChunk]) -> list[list[GuideChunk]]:
     return [grouped[k] for k in sorted(grouped)]
 
 
-def _generate_suno_fragments_with_llm(
+async def _structured_call(
+    llm: Any,
+    packed: PackedContext,
+    packer: ContextPacker,
+    task_name: str,
+    inputs: dict[str, Any],
+    schema: dict[str, Any],
+    model: str | None,
+    max_attempts: int,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Run one structured LLM call and report the tokens it spent alongside the packed context.
+
+    Token counts come from the provider's reported usage when every request made for the call
+    reported it; otherwise (cache hits, providers without usage) they are re-estimated with the
+    packer's counter and `usage_source` says so.
+    """
+    with collect_spans() as spans:
+        raw = await agenerate_structured(
+            llm, task_name=task_name, inputs=inputs, schema=schema, model=model, max_attempts=max_attempts
+        )
+    usage = packed.summary()
+    requested = [span for span in spans if span.requests]
+    if requested and all(span.usage_source == "provider" for span in requested):
+        usage["usage_source"] = "provider"
+        usage["input_tokens"] = sum(span.prompt_tokens for span in requested)
+        usage["output_tokens"] = sum(span.completion_tokens for span in requested)
+        return raw, usage
+    counter = packer.counter(model)
+    usage["usage_source"] = "estimate"
+    usage["tokenizer"] = counter.backend
+    usage["input_tokens"] = counter.count(json.dumps(inputs, ensure_ascii=False)) + counter.count(
+        json.dumps(schema, ensure_ascii=False)
+    )
+    usage["output_tokens"] = counter.count(json.dumps(raw, ensure_ascii=False))
+    return raw, usage
+
+
+async def _generate_suno_fragments_with_llm(
     llm: Any,
     llm_provider: str,
     brief: PromptBrief,
     group: list[GuideChunk],
     model: str | None = None,
     max_attempts: int = 2,
-) -> tuple[SunoFragments | None, str | None]:
+    packer: ContextPacker | None = None,
+    reference_styles: list[dict[str, Any]] | None = None,
+) -> tuple[SunoFragments | None, str | None, dict[str, Any] | None]:
+    packer = packer or ContextPacker()
     try:
         schema = SunoFragments.model_json_schema()
-        raw = llm.generate_structured(
+        packed = packer.pack("suno_style_lyrics_fragments", group, model, query=_brief_query(brief))
+        raw, usage = await _structured_call(
+            llm,
+            packed,
+            packer,
             task_name="suno_style_lyrics_fragments",
             inputs={
                 "brief": brief.model_dump(mode="json"),
@@ -135,23 +447,24 @@ def _generate_suno_fragments_with_llm(
                         "chunk_id": c.chunk_id,
                         "tags": c.tags,
                         "heading_path": c.heading_path,
-                        "text": c.text[:1000],
+                        "text": text,
                     }
-                    for c in group[:24]
+                    for c, text in zip(packed.chunks, packed.texts, strict=True)
                 ],
+                **({"reference_style_prompts": reference_styles} if reference_styles else {}),
             },
             schema=schema,
             model=model,
             max_attempts=max_attempts,
         )
         fragments = SunoFragments.model_validate(raw)
-        return fragments, None
+        return fragments, None, usage
     except Exception as exc:  # noqa: BLE001
         _ = llm_provider
-        return None, str(exc)
+        return None, str(exc), None
 
 
-def _enforce_suno_lyrics_phrase_structure_with_llm(
+async def _enforce_suno_lyrics_phrase_structure_with_llm(
     llm: Any,
     llm_provider: str,
     brief: PromptBrief,
@@ -159,7 +472,9 @@ def _enforce_suno_lyrics_phrase_structure_with_llm(
     group: list[GuideChunk],
     model: str | None = None,
     max_attempts: int = 2,
-) -> tuple[SunoFragments | None, str | None]:
+    packer: ContextPacker | None = None,
+) -> tuple[SunoFragments | None, str | None, dict[str, Any] | None]:
+    packer = packer or ContextPacker()
     try:
         schema: dict[str, Any] = {
             "type": "object",
@@ -191,7 +506,13 @@ def _enforce_suno_lyrics_phrase_structure_with_llm(
             ],
             "additionalProperties": False,
         }
-        raw = llm.generate_structured(
+        packed = packer.pack(
+            "suno_lyrics_phrase_structure_enforcement", group, model, query=_brief_query(brief)
+        )
+        raw, usage = await _structured_call(
+            llm,
+            packed,
+            packer,
             task_name="suno_lyrics_phrase_structure_enforcement",
             inputs={
                 "brief": brief.model_dump(mode="json"),
@@ -253,21 +574,362 @@ def _enforce_suno_lyrics_phrase_structure_with_llm(
                 "guide_context": [
                     {
                         "heading_path": c.heading_path,
-                        "text": c.text[:900],
+                        "text": text,
                     }
-                    for c in group
-                    if any(tag in c.tags for tag in ["arrangement", "lyrics"])
-                ][:12],
+                    for c, text in zip(packed.chunks, packed.texts, strict=True)
+                ],
             },
             schema=schema,
             model=model,
             max_attempts=max_attempts,
         )
         adjusted = SunoFragments.model_validate(raw)
-        return adjusted, None
+        return adjusted, None, usage
     except Exception as exc:  # noqa: BLE001
         _ = llm_provider
-        return None, str(exc)
+        return None, str(exc), None
+
+
+@dataclass(slots=True)
+class _BriefJob:
+    """One docs group travelling through the brief -> fragments -> structure stages."""
+
+    index: int
+    group: list[GuideChunk]
+    brief: PromptBrief | None = None
+    fragments: SunoFragments | None = None
+    used_fallback: bool = False
+    llm_error: str | None = None
+    routing: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def source_file(self) -> str:
+        return self.group[0].source_file
+
+    @property
+    def intent(self) -> str:
+        return f"prompt-pack:{self.source_file}"
+
+    @property
+    def query(self) -> str:
+        return _group_query(self.group)
+
+    def fall_back(self, reason: str) -> None:
+        self.used_fallback = True
+        self.fragments = None
+        self.brief = build_fallback_brief_from_chunks(self.group, intent=self.intent)
+        self.brief.provenance["fallback_reason"] = reason
+
+
+@dataclass(slots=True)
+class _BriefStages:
+    llm: Any
+    llm_provider: str
+    use_llm: bool
+    model: str | None
+    suno_model: str | None
+    max_attempts: int
+    packer: ContextPacker
+    style_index: VectorIndex | None = None
+
+    def _llm_ready(self, job: _BriefJob) -> bool:
+        return job.brief is not None and not job.used_fallback
+
+    def _reference_styles(self, brief: PromptBrief) -> list[dict[str, Any]]:
+        if self.style_index is None:
+            return []
+        hits = self.style_index.search(_brief_query(brief), top_k=STYLE_REFERENCE_TOP_K)
+        return [
+            {"song_id": hit.item_id, "similarity": hit.score, **hit.metadata}
+            for hit in hits
+            if hit.score >= STYLE_REFERENCE_MIN_SCORE
+        ]
+
+    async def brief(self, job: _BriefJob) -> None:
+        if not self.use_llm or self.llm is None:
+            job.fall_back("llm_disabled")
+            job.llm_error = None
+            return
+        group = job.group
+        schema = PromptBrief.model_json_schema()
+        packed = self.packer.pack("docs_to_prompt_brief", group, self.model, query=job.query)
+        raw, brief_usage = await _structured_call(
+            self.llm,
+            packed,
+            self.packer,
+            task_name="docs_to_prompt_brief",
+            inputs={
+                "intent": job.intent,
+                "source_file": job.source_file,
+                "chunk_ids": [c.chunk_id for c in packed.chunks],
+                "guide_sections": [
+                    {
+                        "heading_path": c.heading_path,
+                        "tags": c.tags,
+                        "text": text,
+                    }
+                    for c, text in zip(packed.chunks, packed.texts, strict=True)
+                ],
+            },
+            schema=schema,
+            model=self.model,
+            max_attempts=self.max_attempts,
+        )
+        raw.setdefault("provenance", {})
+        raw["provenance"].update(
+            {
+                "source": "llm",
+                "llm_provider": answered_by("docs_to_prompt_brief") or self.llm_provider,
+                "source_file": job.source_file,
+                # The chunks the model actually read, which retrieval and the budget may narrow.
+                "chunk_ids": [c.chunk_id for c in packed.chunks],
+                "prompt_version_hash": stable_hash(
+                    job.intent, self.llm_provider, json.dumps(schema, sort_keys=True)
+                ),
+            }
+        )
+        job.brief = coerce_prompt_brief(raw)
+        job.brief.provenance["context"] = {"docs_to_prompt_brief": brief_usage}
+
+    async def fragments(self, job: _BriefJob) -> None:
+        if not self._llm_ready(job):
+            return
+        brief = job.brief
+        references = self._reference_styles(brief)
+        if references:
+            brief.provenance["style_reference_song_ids"] = [r["song_id"] for r in references]
+        # Dedicated Suno style/lyrics pass can use a different model (e.g., Gemini via OpenRouter).
+        fragments, suno_frag_err, fragments_usage = await _generate_suno_fragments_with_llm(
+            llm=self.llm,
+            llm_provider=self.llm_provider,
+            brief=brief,
+            group=job.group,
+            model=self.suno_model or self.model,
+            max_attempts=self.max_attempts,
+            packer=self.packer,
+            reference_styles=references,
+        )
+        if fragments_usage is not None:
+            brief.provenance["context"]["suno_style_lyrics_fragments"] = fragments_usage
+        if fragments is None:
+            brief.suno_fragments = build_suno_fragments_from_brief(brief)
+            brief.provenance["suno_fragments"] = {
+                "source": "fallback-deterministic",
+                "llm_provider": self.llm_provider,
+                "model": self.suno_model or self.model,
+                "error": suno_frag_err,
+            }
+        job.fragments = fragments
+
+    async def structure(self, job: _BriefJob) -> None:
+        if not self._llm_ready(job) or job.fragments is None:
+            return
+        brief = job.brief
+        adjusted_fragments, structure_err, structure_usage = await _enforce_suno_lyrics_phrase_structure_with_llm(
+            llm=self.llm,
+            llm_provider=self.llm_provider,
+            brief=brief,
+            fragments=job.fragments,
+            group=job.group,
+            model=self.suno_model or self.model,
+            max_attempts=self.max_attempts,
+            packer=self.packer,
+        )
+        if structure_usage is not None:
+            brief.provenance["context"]["suno_lyrics_phrase_structure_enforcement"] = structure_usage
+        brief.suno_fragments = adjusted_fragments or job.fragments
+        # The fragments pass ran in the previous stage; its routing is already on the job.
+        brief.provenance["suno_fragments"] = {
+            "source": "llm",
+            "llm_provider": answered_by("suno_style_lyrics_fragments", job.routing) or self.llm_provider,
+            "model": self.suno_model or self.model,
+            "lyrics_structure_enforced_by_llm": adjusted_fragments is not None,
+            "lyrics_structure_enforcement_error": structure_err,
+        }
+
+
+StageFn = Callable[[_BriefJob], Awaitable[None]]
+
+
+async def _run_stage_pipeline(
+    jobs: list[_BriefJob],
+    stages: list[tuple[str, StageFn, int]],
+    queue_size: int | None = None,
+) -> None:
+    """Push jobs through `stages` with a worker pool per stage and bounded queues between them.
+
+    A job enters stage N+1 as soon as stage N finishes it, so later groups' brief calls overlap
+    earlier groups' fragment/structure calls. A stage error turns only that job into a fallback.
+    Queue bounds keep a fast stage from racing ahead of a slow one.
+    """
+    queues: list[asyncio.Queue[_BriefJob | None]] = [
+        asyncio.Queue(maxsize=queue_size or max(1, 2 * workers)) for _, _, workers in stages
+    ]
+
+    async def feed() -> None:
+        for job in jobs:
+            await queues[0].put(job)
+        for _ in range(stages[0][2]):
+            await queues[0].put(None)
+
+    async def work(index: int) -> None:
+        fn = stages[index][1]
+        while (job := await queues[index].get()) is not None:
+            with routing_scope() as routing:
+                try:
+                    await fn(job)
+                except Exception as exc:  # noqa: BLE001
+                    job.fall_back(str(exc))
+                    job.llm_error = str(exc)
+            job.routing.extend(routing)
+            if index + 1 < len(stages):
+                await queues[index + 1].put(job)
+
+    async def run_stage(index: int) -> None:
+        async with asyncio.TaskGroup() as workers:
+            for _ in range(stages[index][2]):
+                workers.create_task(work(index))
+        if index + 1 < len(stages):
+            for _ in range(stages[index + 1][2]):
+                await queues[index + 1].put(None)
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(feed())
+        for index in range(len(stages)):
+            tg.create_task(run_stage(index))
+
+
+async def _build_briefs_concurrently(
+    llm: Any,
+    llm_provider: str,
+    groups: list[list[GuideChunk]],
+    use_llm: bool,
+    model: str | None,
+    resolved_suno_model: str | None,
+    max_attempts: int,
+    concurrency: int,
+    packer: ContextPacker | None = None,
+    stage_concurrency: dict[str, int] | None = None,
+    queue_size: int | None = None,
+    style_index: VectorIndex | None = None,
+) -> list[tuple[PromptBrief, bool, str | None]]:
+    stages_impl = _BriefStages(
+        llm,
+        llm_provider,
+        use_llm,
+        model,
+        resolved_suno_model,
+        max_attempts,
+        packer or ContextPacker(),
+        style_index=style_index,
+    )
+    limits = {name: max(1, concurrency) for name in PIPELINE_STAGES}
+    limits.update({k: max(1, v) for k, v in (stage_concurrency or {}).items() if v})
+    jobs = [_BriefJob(index, group) for index, group in enumerate(groups)]
+    await _run_stage_pipeline(
+        jobs,
+        [
+            ("brief", stages_impl.brief, limits["brief"]),
+            ("fragments", stages_impl.fragments, limits["fragments"]),
+            ("structure", stages_impl.structure, limits["structure"]),
+        ],
+        queue_size=queue_size,
+    )
+    results: list[tuple[PromptBrief, bool, str | None]] = []
+    # Jobs finish out of order; results follow input order so reports and brief files stay deterministic.
+    for job in sorted(jobs, key=lambda j: j.index):
+        if job.routing:
+            job.brief.provenance["routing"] = job.routing
+        results.append((job.brief, job.used_fallback, job.llm_error))
+    return results
+
+
+def _answering_providers(brief: PromptBrief) -> list[str]:
+    """Providers whose answers went into `brief`; after a failover this is not the primary."""
+    providers = {e["provider"] for e in brief.provenance.get("routing") or [] if e["outcome"] == "ok"}
+    if not providers and brief.provenance.get("source") == "llm":
+        providers.add(brief.provenance.get("llm_provider") or "custom")
+    return sorted(providers)
+
+
+def _brief_manifest_path(cfg: AppConfig) -> Path:
+    # Kept outside briefs/ so `render_prompt_artifacts` does not mistake it for a brief.
+    return cfg.outputs_dir / "prompts" / "briefs_manifest.json"
+
+
+def _render_manifest_path(cfg: AppConfig) -> Path:
+    return cfg.outputs_dir / "prompts" / "providers" / "render_manifest.json"
+
+
+def _pipeline_fingerprint(
+    llm_provider: str,
+    use_llm: bool,
+    model: str | None,
+    suno_model: str | None,
+    packer: ContextPacker,
+    style_index: VectorIndex | None = None,
+) -> str:
+    """Hash of everything besides the chunks that shapes a brief: version, models, schemas, budgets.
+
+    The Suno style index that supplies reference prompts counts too. Chunks that corpus-scope
+    tasks retrieve are per group and go into `_group_input_hash` instead.
+    """
+    return stable_hash(
+        PROMPT_PIPELINE_VERSION,
+        llm_provider if use_llm else "fallback",
+        model or "",
+        suno_model or "",
+        json.dumps(PromptBrief.model_json_schema(), sort_keys=True),
+        json.dumps(SunoFragments.model_json_schema(), sort_keys=True),
+        packer.budgets.model_dump_json(),
+        style_index.digest if style_index is not None else "",
+        length=16,
+    )
+
+
+def _group_input_hash(group: list[GuideChunk], fingerprint: str, packer: ContextPacker) -> str:
+    # Chunk IDs are content hashes, so the sorted ID set changes whenever the source text does.
+    # Duplicate flags change what the packer keeps, so they count too. Corpus-scope tasks read
+    # whatever retrieval returns for this group, so an edit elsewhere only counts when it changes that.
+    keys = (f"{c.chunk_id}={c.duplicate_of}" if c.duplicate_of else c.chunk_id for c in group)
+    retrieved = packer.corpus_chunk_keys(_group_query(group))
+    return stable_hash(fingerprint, *sorted(keys), json.dumps(retrieved, sort_keys=True), length=16)
+
+
+def _remove_files(cfg: AppConfig, rel_paths: list[str]) -> None:
+    for rel in rel_paths:
+        path = cfg.root_dir / rel
+        if path.exists():
+            path.unlink()
+
+
+def _write_brief(cfg: AppConfig, brief: PromptBrief) -> Path:
+    brief_json = cfg.outputs_dir / "prompts" / "briefs" / f"{brief.brief_id}.json"
+    brief_md = cfg.outputs_dir / "prompts" / "briefs" / f"{brief.brief_id}.md"
+    write_json(brief_json, brief.model_dump(mode="json"))
+    write_text(
+        brief_md,
+        "\n".join(
+            [
+                f"# Prompt Brief `{brief.brief_id}`",
+                "",
+                f"- Intent: `{brief.intent}`",
+                f"- Genre: `{brief.genre}`",
+                f"- Subgenre: `{brief.subgenre}`",
+                f"- Energy: `{brief.energy}`",
+                f"- Tempo: `{brief.tempo_bpm_range[0]}-{brief.tempo_bpm_range[1]} BPM`",
+                f"- Moods: {', '.join(brief.mood_tags)}",
+                f"- References: {', '.join(brief.references[:10])}",
+                "",
+                "## Provenance",
+                "",
+                "```json",
+                json.dumps(brief.provenance, indent=2, ensure_ascii=False),
+                "```",
+            ]
+        ),
+    )
+    return brief_json
 
 
 def build_prompt_briefs_from_docs(
@@ -276,174 +938,263 @@ def build_prompt_briefs_from_docs(
     model: str | None = None,
     suno_model: str | None = None,
     max_attempts: int = 2,
+    concurrency: int = 1,
+    llm_client: Any | None = None,
+    llm_cache: bool = True,
+    stream: bool = False,
+    context_budgets_path: Path | None = None,
+    stage_concurrency: dict[str, int] | None = None,
+    pipeline_queue_size: int | None = None,
+    force: bool = False,
 ) -> dict[str, Any]:
+    """Generate one prompt brief per docs source file.
+
+    Groups flow through a staged pipeline (brief -> Suno fragments -> lyric structure); each
+    stage runs up to `concurrency` groups at once unless `stage_concurrency` overrides it
+    (keys: brief, fragments, structure). Briefs whose chunk set, models, schemas and budgets are
+    unchanged since the last run are reused from the manifest unless `force` is set; earlier LLM
+    fallbacks and briefs answered by a failover provider are always retried.
+    """
     chunks = _load_chunks(cfg)
-    llm, llm_provider = _select_llm(cfg)
+    if llm_client is not None:
+        llm, llm_provider = llm_client, getattr(llm_client, "provider_name", "custom")
+    else:
+        llm, llm_provider = _select_llm(cfg, use_cache=llm_cache, stream=stream)
+    packer = ContextPacker(
+        load_context_budgets(context_budgets_path or cfg.root_dir / CONTEXT_BUDGETS_CONFIG),
+        retriever=_load_retriever(cfg, chunks),
+        default_model=getattr(llm, "default_model", None),
+    )
     resolved_suno_model = suno_model
     if use_llm and resolved_suno_model is None and llm_provider == "openrouter":
         resolved_suno_model = "google/gemini-3-flash-preview"
+    groups = _groups_by_source(chunks)
+    style_index = _load_vector_index(cfg, SUNO_STYLE_VECTORS) if use_llm else None
+    fingerprint = _pipeline_fingerprint(llm_provider, use_llm, model, resolved_suno_model, packer, style_index)
+    manifest_path = _brief_manifest_path(cfg)
+    previous: dict[str, dict[str, Any]] = read_json(manifest_path).get("briefs", {}) if manifest_path.exists() else {}
+    input_hashes = [_group_input_hash(group, fingerprint, packer) for group in groups]
+    reused: dict[int, dict[str, Any]] = {}
+    for index, group in enumerate(groups):
+        entry = previous.get(group[0].source_file)
+        if (
+            not force
+            and entry is not None
+            and entry["input_hash"] == input_hashes[index]
+            and (cfg.root_dir / entry["brief_path"]).exists()
+            and not (use_llm and entry["details"]["used_fallback"])
+            # A brief a failover provider wrote is not what the primary would have answered.
+            and not (use_llm and entry["details"].get("answered_by") != [llm_provider])
+        ):
+            reused[index] = entry
+    pending = [index for index in range(len(groups)) if index not in reused]
+    warm_up = getattr(llm, "warm_up", None) if use_llm and pending else None
+    # Load the local model once up front; the three chained calls per group then hit a resident model.
+    warm_up_result = warm_up(model) if warm_up is not None else None
+    results = asyncio.run(
+        _build_briefs_concurrently(
+            llm,
+            llm_provider,
+            [groups[index] for index in pending],
+            use_llm=use_llm,
+            model=model,
+            resolved_suno_model=resolved_suno_model,
+            max_attempts=max_attempts,
+            concurrency=concurrency,
+            packer=packer,
+            stage_concurrency=stage_concurrency,
+            queue_size=pipeline_queue_size,
+            style_index=style_index,
+        )
+    )
+    fresh = dict(zip(pending, results, strict=True))
     brief_paths: list[str] = []
     details: list[dict[str, Any]] = []
-    for group in _groups_by_source(chunks):
+    entries: dict[str, dict[str, Any]] = {}
+    for index, group in enumerate(groups):
         source_file = group[0].source_file
-        intent = f"prompt-pack:{source_file}"
-        used_fallback = False
-        llm_error: str | None = None
-        if use_llm and llm is not None:
-            try:
-                schema = PromptBrief.model_json_schema()
-                raw = llm.generate_structured(
-                    task_name="docs_to_prompt_brief",
-                    inputs={
-                        "intent": intent,
-                        "source_file": source_file,
-                        "chunk_ids": [c.chunk_id for c in group],
-                        "guide_sections": [
-                            {
-                                "heading_path": c.heading_path,
-                                "tags": c.tags,
-                                "text": c.text[:1400],
-                            }
-                            for c in group
-                        ],
-                    },
-                    schema=schema,
-                    model=model,
-                    max_attempts=max_attempts,
-                )
-                raw.setdefault("provenance", {})
-                raw["provenance"].update(
-                    {
-                        "source": "llm",
-                        "llm_provider": llm_provider,
-                        "source_file": source_file,
-                        "chunk_ids": [c.chunk_id for c in group],
-                        "prompt_version_hash": stable_hash(intent, llm_provider, json.dumps(schema, sort_keys=True)),
-                    }
-                )
-                brief = coerce_prompt_brief(raw)
-                # Dedicated Suno style/lyrics pass can use a different model (e.g., Gemini via OpenRouter).
-                fragments, suno_frag_err = _generate_suno_fragments_with_llm(
-                    llm=llm,
-                    llm_provider=llm_provider,
-                    brief=brief,
-                    group=group,
-                    model=resolved_suno_model or model,
-                    max_attempts=max_attempts,
-                )
-                if fragments is not None:
-                    adjusted_fragments, structure_err = _enforce_suno_lyrics_phrase_structure_with_llm(
-                        llm=llm,
-                        llm_provider=llm_provider,
-                        brief=brief,
-                        fragments=fragments,
-                        group=group,
-                        model=resolved_suno_model or model,
-                        max_attempts=max_attempts,
-                    )
-                    brief.suno_fragments = adjusted_fragments or fragments
-                    brief.provenance["suno_fragments"] = {
-                        "source": "llm",
-                        "llm_provider": llm_provider,
-                        "model": resolved_suno_model or model,
-                        "lyrics_structure_enforced_by_llm": adjusted_fragments is not None,
-                        "lyrics_structure_enforcement_error": structure_err,
-                    }
-                else:
-                    brief.suno_fragments = build_suno_fragments_from_brief(brief)
-                    brief.provenance["suno_fragments"] = {
-                        "source": "fallback-deterministic",
-                        "llm_provider": llm_provider,
-                        "model": resolved_suno_model or model,
-                        "error": suno_frag_err,
-                    }
-            except Exception as exc:  # noqa: BLE001
-                used_fallback = True
-                llm_error = str(exc)
-                brief = build_fallback_brief_from_chunks(group, intent=intent)
-                brief.provenance["fallback_reason"] = llm_error
+        if index in reused:
+            entry = reused[index]
+            row = {**entry["details"], "reused": True}
         else:
-            used_fallback = True
-            brief = build_fallback_brief_from_chunks(group, intent=intent)
-            brief.provenance["fallback_reason"] = "llm_disabled"
-        brief_json = cfg.outputs_dir / "prompts" / "briefs" / f"{brief.brief_id}.json"
-        brief_md = cfg.outputs_dir / "prompts" / "briefs" / f"{brief.brief_id}.md"
-        write_json(brief_json, brief.model_dump(mode="json"))
-        write_text(
-            brief_md,
-            "\n".join(
-                [
-                    f"# Prompt Brief `{brief.brief_id}`",
-                    "",
-                    f"- Intent: `{brief.intent}`",
-                    f"- Genre: `{brief.genre}`",
-                    f"- Subgenre: `{brief.subgenre}`",
-                    f"- Energy: `{brief.energy}`",
-                    f"- Tempo: `{brief.tempo_bpm_range[0]}-{brief.tempo_bpm_range[1]} BPM`",
-                    f"- Moods: {', '.join(brief.mood_tags)}",
-                    f"- References: {', '.join(brief.references[:10])}",
-                    "",
-                    "## Provenance",
-                    "",
-                    "```json",
-                    json.dumps(brief.provenance, indent=2, ensure_ascii=False),
-                    "```",
-                ]
-            ),
-        )
-        brief_paths.append(str(brief_json.relative_to(cfg.root_dir)))
-        details.append(
-            {
+            brief, used_fallback, llm_error = fresh[index]
+            brief_json = _write_brief(cfg, brief)
+            row = {
                 "brief_id": brief.brief_id,
                 "source_file": source_file,
                 "llm_provider": brief.provenance.get("llm_provider", "fallback"),
+                "answered_by": _answering_providers(brief),
                 "used_fallback": used_fallback,
                 "chunk_count": len(group),
                 "llm_error": llm_error,
                 "suno_fragments_source": ((brief.provenance.get("suno_fragments") or {}).get("source")),
+                "context_tokens": sum(
+                    usage.get("input_tokens", 0) for usage in (brief.provenance.get("context") or {}).values()
+                ),
+                "reused": False,
             }
-        )
-    summary = {"brief_count": len(brief_paths), "brief_paths": brief_paths, "details": details}
+            entry = {
+                "input_hash": input_hashes[index],
+                "brief_id": brief.brief_id,
+                "brief_path": str(brief_json.relative_to(cfg.root_dir)),
+                "details": {k: v for k, v in row.items() if k != "reused"},
+            }
+        entries[source_file] = entry
+        brief_paths.append(entry["brief_path"])
+        details.append(row)
+    # Drop briefs whose source file disappeared or whose regenerated brief got a new id.
+    live_paths = set(brief_paths)
+    for entry in previous.values():
+        if entry["brief_path"] not in live_paths:
+            _remove_files(cfg, [entry["brief_path"], str(Path(entry["brief_path"]).with_suffix(".md"))])
+    write_json(manifest_path, {"version": PROMPT_PIPELINE_VERSION, "briefs": entries})
+    summary = {
+        "brief_count": len(brief_paths),
+        "generated_count": len(pending),
+        "reused_count": len(reused),
+        "brief_paths": brief_paths,
+        "details": details,
+    }
+    token_usage: dict[str, dict[str, int]] = {}
+    for brief, _, _ in results:
+        for task, usage in (brief.provenance.get("context") or {}).items():
+            row = token_usage.setdefault(
+                task, {"calls": 0, "estimated_calls": 0, "input_tokens": 0, "output_tokens": 0}
+            )
+            row["calls"] += 1
+            row["estimated_calls"] += int(usage.get("usage_source") != "provider")
+            row["input_tokens"] += int(usage.get("input_tokens", 0))
+            row["output_tokens"] += int(usage.get("output_tokens", 0))
+    if token_usage:
+        summary["token_usage"] = token_usage
+    cache = getattr(llm, "cache", None)
+    if cache is not None:
+        summary["llm_cache"] = cache.stats()
+    structured_stats = getattr(llm, "structured_stats", None)
+    if structured_stats is not None:
+        summary["llm_structured"] = structured_stats.as_dict()
+    if isinstance(llm, LLMRouter):
+        summary["llm_routing"] = llm.stats()
+    if warm_up_result is not None:
+        summary["llm_warm_up"] = warm_up_result
+    telemetry = getattr(llm, "telemetry", None)
+    if telemetry is not None and telemetry.spans:
+        summary["llm_telemetry"] = telemetry.summary()
+    stream_metrics = getattr(llm, "stream_metrics", None)
+    if stream_metrics:
+        summary["llm_streaming"] = summarize_stream_metrics(stream_metrics)
     write_json(cfg.outputs_dir / "reports/prompt_generation_report.json", summary)
-    report_md = ["# Prompt Generation Report", "", f"- Brief count: {summary['brief_count']}", "", "## Details", ""]
+    report_md = [
+        "# Prompt Generation Report",
+        "",
+        f"- Brief count: {summary['brief_count']} (generated={len(pending)}, reused={len(reused)})",
+        "",
+        "## Details",
+        "",
+    ]
     for row in details:
         report_md.append(
             f"- `{row['brief_id']}` from `{row['source_file']}` "
-            f"(provider={row['llm_provider']}, fallback={row['used_fallback']}, chunks={row['chunk_count']})"
+            f"(provider={row['llm_provider']}, fallback={row['used_fallback']}, chunks={row['chunk_count']}"
+            f"{', reused' if row['reused'] else ''})"
         )
         if row.get("suno_fragments_source"):
             report_md.append(f"  - Suno fragments: `{row['suno_fragments_source']}`")
         if row["llm_error"]:
             report_md.append(f"  - LLM error: `{row['llm_error']}`")
+    if summary.get("token_usage"):
+        report_md.extend(["", "## Token Usage", ""])
+        for task, usage in summary["token_usage"].items():
+            report_md.append(
+                f"- `{task}`: calls={usage['calls']}, input_tokens={usage['input_tokens']}, "
+                f"output_tokens={usage['output_tokens']}, estimated_calls={usage['estimated_calls']}"
+            )
+    if summary.get("llm_structured"):
+        report_md.extend(["", "## Structured Output", ""])
+        for task, counts in summary["llm_structured"].items():
+            report_md.append(
+                f"- `{task}`: calls={counts['calls']}, native={counts['native']}, "
+                f"repairs={counts['repairs']}, native_fallbacks={counts['native_fallbacks']}"
+            )
+    if summary.get("llm_telemetry"):
+        report_md.extend(["", "## LLM Calls", ""])
+        for task, row in summary["llm_telemetry"]["by_task"].items():
+            cost = f"${row['cost_usd']:.4f}" if row["cost_usd"] is not None else "n/a"
+            report_md.append(
+                f"- `{task}`: calls={row['calls']}, attempts={row['attempts']}, errors={row['errors']}, "
+                f"p50={row['latency_p50_seconds']}s, p95={row['latency_p95_seconds']}s, "
+                f"tokens={row['prompt_tokens']}+{row['completion_tokens']}, cost={cost}"
+            )
+    if summary.get("llm_routing"):
+        report_md.extend(["", "## Provider Routing", ""])
+        for provider, breaker in summary["llm_routing"].items():
+            report_md.append(
+                f"- `{provider}`: circuit={breaker['state']}, opened={breaker['opened_count']}, "
+                f"consecutive_failures={breaker['consecutive_failures']}"
+            )
     write_text(cfg.outputs_dir / "reports/prompt_generation_report.md", "\n".join(report_md))
     return summary
 
 
-def render_prompt_artifacts(cfg: AppConfig, provider: str | None = None) -> dict[str, Any]:
+def render_prompt_artifacts(cfg: AppConfig, provider: str | None = None, force: bool = False) -> dict[str, Any]:
+    """Render provider payloads for every brief, skipping briefs whose rendered files are current.
+
+    A render manifest records each brief's content hash per target; unchanged briefs keep their
+    existing files and renders of briefs that no longer exist are removed.
+    """
     targets = [provider] if provider else ["suno", "fal", "openrouter"]
+    for target in targets:
+        if target not in {"suno", "fal", "openrouter"}:
+            raise ValueError(f"Unsupported provider: {target}")
+    manifest_path = _render_manifest_path(cfg)
+    manifest: dict[str, dict[str, Any]] = read_json(manifest_path) if manifest_path.exists() else {}
     rendered_paths: list[str] = []
+    reused_count = 0
+    live: dict[str, set[str]] = {target: set() for target in targets}
     for brief_file in sorted((cfg.outputs_dir / "prompts" / "briefs").glob("*.json")):
-        brief = PromptBrief.model_validate(read_json(brief_file))
+        payload = read_json(brief_file)
+        brief = PromptBrief.model_validate(payload)
+        brief_hash = stable_hash(PROMPT_PIPELINE_VERSION, json.dumps(payload, sort_keys=True), length=16)
         for target in targets:
+            live[target].add(brief.brief_id)
+            entry = manifest.get(target, {}).get(brief.brief_id)
+            if (
+                not force
+                and entry is not None
+                and entry["brief_hash"] == brief_hash
+                and all((cfg.root_dir / rel).exists() for rel in entry["paths"])
+            ):
+                rendered_paths.extend(entry["paths"])
+                reused_count += 1
+                continue
             if target == "suno":
                 rendered = render_suno_prompt(brief)
                 ext = "md"
             elif target == "fal":
                 rendered = render_fal_payload(brief)
                 ext = "json"
-            elif target == "openrouter":
+            else:
                 rendered = render_openrouter_templates(brief)
                 ext = "json"
-            else:
-                raise ValueError(f"Unsupported provider: {target}")
             out_path = cfg.outputs_dir / "prompts" / "providers" / target / f"{brief.brief_id}.{ext}"
             if isinstance(rendered.payload, str):
                 write_text(out_path, rendered.payload)
             else:
                 write_json(out_path, rendered.payload)
-            rendered_paths.append(str(out_path.relative_to(cfg.root_dir)))
+            paths = [str(out_path.relative_to(cfg.root_dir))]
             if target == "suno" and brief.suno_fragments is not None:
                 suno_json_path = cfg.outputs_dir / "prompts" / "providers" / target / f"{brief.brief_id}.json"
                 write_json(suno_json_path, brief.suno_fragments.model_dump(mode="json"))
-                rendered_paths.append(str(suno_json_path.relative_to(cfg.root_dir)))
-    return {"providers": targets, "rendered_count": len(rendered_paths), "rendered_paths": rendered_paths}
+                paths.append(str(suno_json_path.relative_to(cfg.root_dir)))
+            manifest.setdefault(target, {})[brief.brief_id] = {"brief_hash": brief_hash, "paths": paths}
+            rendered_paths.extend(paths)
+    for target in targets:
+        for brief_id in sorted(set(manifest.get(target, {})) - live[target]):
+            _remove_files(cfg, manifest[target].pop(brief_id)["paths"])
+    write_json(manifest_path, manifest)
+    return {
+        "providers": targets,
+        "rendered_count": len(rendered_paths),
+        "reused_count": reused_count,
+        "rendered_paths": rendered_paths,
+    }
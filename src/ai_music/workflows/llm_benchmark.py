@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+from ai_music.config import AppConfig
+from ai_music.io.files import write_json, write_text
+from ai_music.llm.base import extract_json_object
+from ai_music.llm.stub_server import StubLLMConfig, StubLLMServer
+from ai_music.workflows.docs_to_prompts import build_prompt_briefs_from_docs
+from ai_music.workflows.suno_song_analysis import mine_suno_prompt_pack
+
+
+def _stub_cfg(cfg: AppConfig, server: StubLLMServer, provider: str, work_dir: Path) -> AppConfig:
+    """Point every LLM provider at the stub and keep benchmark artifacts out of the real outputs."""
+    providers = replace(
+        cfg.providers,
+        openrouter_api_key="stub-key" if provider == "openrouter" else None,
+        openrouter_base_url=server.openrouter_base_url,
+        ollama_base_url=server.ollama_base_url,
+        llm_providers=(provider,),
+        llm_hedge_after_seconds=None,
+    )
+    return replace(cfg, outputs_dir=work_dir / "outputs", cache_dir=work_dir / "cache", providers=providers)
+
+
+LevelRunner = Callable[[AppConfig, int], dict[str, Any]]
+
+
+def _run_concurrency_sweep(
+    cfg: AppConfig, levels: list[int], stub_config: StubLLMConfig, provider: str, unit: str, run_level: LevelRunner
+) -> list[dict[str, Any]]:
+    """Time `run_level(bench_cfg, level)` at each level against a fresh stub LLM server.
+
+    `run_level` returns the row's counts, including `unit` (what one level produces); the sweep
+    adds wall time, throughput, stub request counts, and speed-up relative to the first level.
+    """
+    rows: list[dict[str, Any]] = []
+    cfg.cache_dir.mkdir(parents=True, exist_ok=True)
+    # Scratch outputs live under the project root because report paths are stored root-relative.
+    with tempfile.TemporaryDirectory(prefix="bench-", dir=cfg.cache_dir) as tmp:
+        for level in levels:
+            # A fresh server per level resets the seeded latency/error sequence.
+            with StubLLMServer(stub_config) as server:
+                bench_cfg = _stub_cfg(cfg, server, provider, Path(tmp) / f"c{level}")
+                started = time.perf_counter()
+                counts = run_level(bench_cfg, level)
+                wall = time.perf_counter() - started
+                requests = server.stats()
+            rows.append(
+                {
+                    "concurrency": level,
+                    "wall_seconds": round(wall, 3),
+                    **counts,
+                    f"{unit}_per_second": round(counts[unit] / wall, 3) if wall else None,
+                    "llm_requests": requests["requests"],
+                    "llm_requests_per_second": round(requests["requests"] / wall, 3) if wall else None,
+                    "errors_injected": requests["errors_injected"],
+                }
+            )
+    baseline = rows[0]["wall_seconds"] if rows else 0.0
+    for row in rows:
+        speedup = baseline / row["wall_seconds"] if row["wall_seconds"] else None
+        row["speedup"] = round(speedup, 2) if speedup else None
+        row["efficiency"] = round(speedup / row["concurrency"], 2) if speedup else None
+    return rows
+
+
+def _write_sweep_report(
+    cfg: AppConfig, name: str, title: str, summary: dict[str, Any], unit: str, failures: str
+) -> None:
+    stub = summary["stub"]
+    write_json(cfg.outputs_dir / "reports" / f"llm_benchmark_{name}.json", summary)
+    md = [
+        f"# {title} Benchmark (stub LLM)",
+        "",
+        f"- Provider API: `{summary['provider']}`",
+        f"- Stub latency: {stub['latency_seconds']}s (+{stub['jitter_seconds']}s jitter), error rate {stub['error_rate']}",
+        "",
+        f"| concurrency | wall s | {unit}/s | LLM req/s | speed-up | efficiency | {failures.replace('_', ' ')} |",
+        "| --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    for row in summary["levels"]:
+        md.append(
+            f"| {row['concurrency']} | {row['wall_seconds']} | {row[f'{unit}_per_second']} | "
+            f"{row['llm_requests_per_second']} | {row['speedup']} | {row['efficiency']} | {row[failures]} |"
+        )
+    write_text(cfg.outputs_dir / "reports" / f"llm_benchmark_{name}.md", "\n".join(md))
+
+
+def run_prompt_pipeline_benchmark(
+    cfg: AppConfig,
+    concurrency_levels: list[int] | None = None,
+    provider: str = "openrouter",
+    latency_seconds: float = 0.2,
+    jitter_seconds: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    stream: bool = False,
+    model: str | None = None,
+) -> dict[str, Any]:
+    """Run `build_prompt_briefs_from_docs` against the local stub LLM at each concurrency level.
+
+    The response cache is bypassed so every level issues the same provider calls; throughput and
+    speed-up relative to the first level show how far concurrency hides provider latency.
+    """
+    if provider not in {"openrouter", "ollama"}:
+        raise ValueError("Benchmark provider must be `openrouter` or `ollama`.")
+    levels = sorted({max(1, level) for level in (concurrency_levels or [1, 2, 4, 8])})
+    stub_config = StubLLMConfig(
+        latency_seconds=latency_seconds, jitter_seconds=jitter_seconds, error_rate=error_rate, seed=seed
+    )
+
+    def run_level(bench_cfg: AppConfig, level: int) -> dict[str, Any]:
+        built = build_prompt_briefs_from_docs(
+            bench_cfg, use_llm=True, model=model, concurrency=level, llm_cache=False, stream=stream
+        )
+        return {
+            "briefs": built["brief_count"],
+            "fallback_briefs": sum(1 for d in built["details"] if d["used_fallback"]),
+            "latency_p50_seconds": ((built.get("llm_telemetry") or {}).get("total") or {}).get(
+                "latency_p50_seconds"
+            ),
+        }
+
+    summary = {
+        "benchmark": "prompt_pipeline",
+        "provider": provider,
+        "stub": {
+            "latency_seconds": latency_seconds,
+            "jitter_seconds": jitter_seconds,
+            "error_rate": error_rate,
+            "seed": seed,
+            "stream": stream,
+        },
+        "levels": _run_concurrency_sweep(cfg, levels, stub_config, provider, "briefs", run_level),
+    }
+    _write_sweep_report(cfg, "prompt_pipeline", "Prompt Pipeline", summary, "briefs", "fallback_briefs")
+    return summary
+
+
+def run_suno_mine_benchmark(
+    cfg: AppConfig,
+    fixture_pages: list[Path],
+    concurrency_levels: list[int] | None = None,
+    runs: int = 8,
+    style_query: str = "clinical dnb",
+    mapping_config_path: Path = Path("configs/suno_api_mapping.template.json"),
+    aliases_config_path: Path = Path("configs/suno_style_aliases.json"),
+    latency_seconds: float = 0.2,
+    jitter_seconds: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    model: str | None = None,
+) -> dict[str, Any]:
+    """Run `runs` offline `mine_suno_prompt_pack` jobs (one theme each) at each concurrency level.
+
+    Songs come from `fixture_pages`, so the adaptation call is the only provider request per
+    run; each run writes to its own scratch data/outputs directories so concurrent runs do not
+    share files. A run whose adaptation fails counts in `failed_runs`.
+    """
+    levels = sorted({max(1, level) for level in (concurrency_levels or [1, 2, 4, 8])})
+    stub_config = StubLLMConfig(
+        latency_seconds=latency_seconds, jitter_seconds=jitter_seconds, error_rate=error_rate, seed=seed
+    )
+
+    def run_level(bench_cfg: AppConfig, level: int) -> dict[str, Any]:
+        def mine(index: int) -> dict[str, Any] | None:
+            run_dir = bench_cfg.outputs_dir.parent / f"run{index}"
+            run_cfg = replace(bench_cfg, data_dir=run_dir / "data", outputs_dir=run_dir / "outputs")
+            try:
+                return mine_suno_prompt_pack(
+                    run_cfg,
+                    mapping_config_path=mapping_config_path,
+                    aliases_config_path=aliases_config_path,
+                    style_query=style_query,
+                    theme=f"benchmark theme {index}",
+                    fixture_pages=fixture_pages,
+                    model=model,
+                    llm_cache=False,
+                )
+            except Exception:  # noqa: BLE001
+                return None
+
+        with ThreadPoolExecutor(max_workers=level, thread_name_prefix="bench-mine") as pool:
+            results = list(pool.map(mine, range(runs)))
+        latencies = [
+            p50
+            for result in results
+            if result is not None
+            and (p50 := ((result["adapt"].get("llm_telemetry") or {}).get("total") or {}).get("latency_p50_seconds"))
+            is not None
+        ]
+        return {
+            "runs": runs,
+            "failed_runs": sum(1 for result in results if result is None),
+            "latency_p50_seconds": round(statistics.median(latencies), 4) if latencies else None,
+        }
+
+    summary = {
+        "benchmark": "suno_mine",
+        "provider": "openrouter",
+        "runs_per_level": runs,
+        "stub": {
+            "latency_seconds": latency_seconds,
+            "jitter_seconds": jitter_seconds,
+            "error_rate": error_rate,
+            "seed": seed,
+        },
+        "levels": _run_concurrency_sweep(cfg, levels, stub_config, "openrouter", "runs", run_level),
+    }
+    _write_sweep_report(cfg, "suno_mine", "Suno Mine", summary, "runs", "failed_runs")
+    return summary
+
+
+_LEGACY_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+
+
+def _legacy_extract_json_object(text: str) -> dict[str, Any]:
+    """The previous greedy-regex extractor, kept only as the benchmark baseline."""
+    text = text.strip()
+    match = _LEGACY_JSON_BLOCK_RE.search(text)
+    if match:
+        return json.loads(match.group(1))
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        return json.loads(text[start : end + 1])
+    return json.loads(text)
+
+
+def synthetic_llm_response(lines: int, fenced: bool = False) -> tuple[str, dict[str, Any]]:
+    """A long lyric answer wrapped in prose whose braces defeat first-`{`/last-`}` slicing."""
+    answer = {
+        "song_title": "Stub {Anthem}",
+        "style_prompt": "rolling dnb, \"airy\" pads, {half-time} breakdown",
+        "lyrics": "\n".join(f"[Verse {i}] line {i} {{echo}} \"quoted\" }}{{" for i in range(lines)),
+        "sections": [{"name": f"part_{i}", "bars": 8} for i in range(max(1, lines // 10))],
+    }
+    body = json.dumps(answer, ensure_ascii=False, indent=2 if fenced else None)
+    if fenced:
+        body = f"```json\n{body}\n```"
+    text = f"Here is the JSON you asked for:\n{body}\nNotes: swap {{chorus}} and {{verse}} if it drags."
+    return text, answer
+
+
+def _time_extract(extract: Any, text: str, expected: dict[str, Any], repeats: int) -> dict[str, Any]:
+    try:
+        ok = extract(text) == expected
+    except ValueError:
+        ok = False
+    started = time.perf_counter()
+    for _ in range(repeats):
+        try:
+            extract(text)
+        except ValueError:
+            pass
+    mean = (time.perf_counter() - started) / repeats
+    return {"ok": ok, "mean_ms": round(mean * 1000, 4)}
+
+
+def run_json_extract_benchmark(
+    cfg: AppConfig, sizes: list[int] | None = None, repeats: int = 20
+) -> dict[str, Any]:
+    """Time `extract_json_object` against the legacy regex extractor on large synthetic responses.
+
+    `ok` records whether each extractor recovered the embedded answer; a miss costs a repair
+    round-trip to the LLM in the structured-generation loop.
+    """
+    rows: list[dict[str, Any]] = []
+    for lines in sizes or [100, 1_000, 10_000]:
+        for fenced in (False, True):
+            text, expected = synthetic_llm_response(lines, fenced=fenced)
+            rows.append(
+                {
+                    "lines": lines,
+                    "fenced": fenced,
+                    "chars": len(text),
+                    "scanner": _time_extract(extract_json_object, text, expected, repeats),
+                    "legacy_regex": _time_extract(_legacy_extract_json_object, text, expected, repeats),
+                }
+            )
+    summary = {"benchmark": "json_extract", "repeats": repeats, "rows": rows}
+    write_json(cfg.outputs_dir / "reports" / "llm_benchmark_json_extract.json", summary)
+    md = [
+        "# JSON Extraction Benchmark",
+        "",
+        "| lines | fenced | chars | scanner ms | scanner ok | legacy ms | legacy ok |",
+        "| --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    for row in rows:
+        scanner, legacy = row["scanner"], row["legacy_regex"]
+        md.append(
+            f"| {row['lines']} | {row['fenced']} | {row['chars']} | {scanner['mean_ms']} | {scanner['ok']} | "
+            f"{legacy['mean_ms']} | {legacy['ok']} |"
+        )
+    write_text(cfg.outputs_dir / "reports" / "llm_benchmark_json_extract.md", "\n".join(md))
+    return summary
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any
+
+from ai_music.config import AppConfig
+from ai_music.enrich.lastfm import LastFMClient
+from ai_music.enrich.musicbrainz import MusicBrainzClient
+from ai_music.enrich.musicbrainz_local import LocalMusicBrainzIndex
+from ai_music.io.files import append_jsonl, normalize_loose, read_json, read_jsonl, write_json, write_text
+
+
+ENRICHMENT_JOURNAL = Path("enriched/track_enrichment.journal.jsonl")
+ENRICHMENT_OUTPUT = Path("enriched/track_enrichment.json")
+MUSICBRAINZ_LOCAL_INDEX = Path("enriched/musicbrainz_recordings.sqlite")
+
+
+def _load_canonical_tracks(cfg: AppConfig) -> list[dict[str, Any]]:
+    path = cfg.data_dir / "normalized" / "tracks.canonical.json"
+    if not path.exists():
+        raise FileNotFoundError("Missing canonical tracks. Run `playlists normalize` first.")
+    return read_json(path)
+
+
+def load_enrichment_journal(path: Path) -> dict[str, dict[str, Any]]:
+    """Return the latest journaled record per track_id (later lines win)."""
+    records: dict[str, dict[str, Any]] = {}
+    for row in read_jsonl(path, skip_invalid=True):
+        if isinstance(row, dict) and row.get("track_id"):
+            records[row["track_id"]] = row
+    return records
+
+
+def is_enrichment_complete(record: dict[str, Any]) -> bool:
+    """True when a journaled record came from an online run in which no provider lookup failed.
+
+    Offline records and records with a `*_error` provider entry are retried by `--resume`.
+    """
+    return bool(record.get("online")) and not any(key.endswith("_error") for key in record.get("providers") or {})
+
+
+def _credited_names(recording: dict[str, Any]) -> list[str]:
+    names: list[str] = []
+    for credit in recording.get("artist-credit") or []:
+        if isinstance(credit, dict):
+            name = credit.get("name") or (credit.get("artist") or {}).get("name")
+            if name:
+                names.append(name)
+    return names
+
+
+def rank_recordings(recordings: list[dict[str, Any]], title: str, artist: str | None) -> list[dict[str, Any]]:
+    """Score every returned recording against the track instead of trusting `recordings[0]`."""
+    title_key = normalize_loose(title)
+    artist_key = normalize_loose(artist) if artist else ""
+    ranked: list[dict[str, Any]] = []
+    for rec in recordings:
+        if not isinstance(rec, dict) or not rec.get("id"):
+            continue
+        names = _credited_names(rec)
+        title_sim = SequenceMatcher(None, title_key, normalize_loose(rec.get("title") or "")).ratio()
+        artist_sim = 0.5
+        if artist_key:
+            artist_sim = max((SequenceMatcher(None, artist_key, normalize_loose(n)).ratio() for n in names), default=0.0)
+        mb_score = rec.get("score")
+        mb_score = 100 if mb_score is None else int(mb_score)
+        ranked.append(
+            {
+                "mbid": rec["id"],
+                "title": rec.get("title"),
+                "artists": names,
+                "mb_score": mb_score,
+                "match_score": round(0.5 * title_sim + 0.3 * artist_sim + 0.2 * mb_score / 100, 4),
+                "recording": rec,
+            }
+        )
+    ranked.sort(key=lambda c: c["match_score"], reverse=True)
+    return ranked
+
+
+def _resolve_musicbrainz(
+    mb_client: Any | None,
+    mb_local: Any | None,
+    isrc: str | None,
+    title: str,
+    artist: str | None,
+    record: dict[str, Any],
+    stats: dict[str, Any],
+) -> str | None:
+    """Phase 1: resolve a recording MBID, preferring exact ISRC keys over fuzzy text search."""
+    try:
+        mb = None
+        resolution = "search"
+        if isrc:
+            if mb_local is not None:
+                mb = mb_local.lookup_isrc(isrc)
+                stats["musicbrainz_local_isrc_hits" if mb is not None else "musicbrainz_local_isrc_misses"] += 1
+            if mb is None and mb_client is not None:
+                mb = mb_client.lookup_isrc(isrc)
+                stats["musicbrainz_isrc_lookups"] += 1
+                if mb.get("cache_hit"):
+                    stats["musicbrainz_cache_hits"] += 1
+                if not mb["data"].get("recordings"):
+                    mb = None
+            if mb is not None:
+                resolution = "isrc"
+                stats["fuzzy_searches_skipped"] += 1
+        if mb is None and mb_local is not None:
+            mb = mb_local.search_recording(title, artist)
+        if mb is None and mb_client is not None:
+            query = f'recording:"{title}"'
+            if artist:
+                query += f' AND artist:"{artist}"'
+            mb = mb_client.search_recording(query)
+            stats["musicbrainz_queries"] += 1
+            if mb.get("cache_hit"):
+                stats["musicbrainz_cache_hits"] += 1
+        if mb_local is not None:
+            # One verdict per track: did the mirror resolve it, by ISRC or by text search?
+            local_hit = mb is not None and mb.get("source") == "local"
+            stats["musicbrainz_local_hits" if local_hit else "musicbrainz_local_misses"] += 1
+        if mb is None:
+            return None
+        data = mb["data"]
+        ranked = rank_recordings(data.get("recordings") or [], title, artist)
+        best = ranked[0] if ranked else None
+        record["providers"]["musicbrainz"] = {
+            "source": mb.get("source", "remote"),
+            "resolution": resolution,
+            "cache_hit": mb.get("cache_hit", False),
+            "mbid": best["mbid"] if best else None,
+            "top_match": best["recording"] if best else None,
+            "candidates": [{k: v for k, v in c.items() if k != "recording"} for c in ranked[:5]],
+            "count": len(data.get("recordings", [])),
+        }
+        return best["mbid"] if best else None
+    except Exception as exc:  # noqa: BLE001
+        record["providers"]["musicbrainz_error"] = str(exc)
+        return None
+
+
+def _enrich_lastfm(
+    lf_client: Any,
+    mbid: str | None,
+    title: str,
+    artist: str | None,
+    record: dict[str, Any],
+    stats: dict[str, Any],
+) -> None:
+    """Phase 2: MBID-keyed Last.fm lookup, falling back to artist/title only when no exact key resolves."""
+    try:
+        lf = None
+        lookup = "artist_title"
+        if mbid:
+            lf = lf_client.track_info_by_mbid(mbid)
+            stats["lastfm_mbid_lookups"] += 1
+            if lf.get("cache_hit"):
+                stats["lastfm_cache_hits"] += 1
+            if lf["data"].get("error") or not lf["data"].get("track"):
+                stats["lastfm_mbid_misses"] += 1
+                lf = None
+            else:
+                lookup = "mbid"
+        if lf is None:
+            if not (artist and title):
+                return
+            lf = lf_client.track_info(artist, title)
+            stats["lastfm_queries"] += 1
+            if lf.get("cache_hit"):
+                stats["lastfm_cache_hits"] += 1
+        top_tags = []
+        track_data = lf["data"].get("track", {})
+        tags = ((track_data.get("toptags") or {}).get("tag")) or []
+        for tag in tags[:10]:
+            if isinstance(tag, dict) and tag.get("name"):
+                top_tags.append(tag["name"])
+        record["providers"]["lastfm"] = {
+            "lookup": lookup,
+            "cache_hit": lf.get("cache_hit", False),
+            "name": track_data.get("name"),
+            "artist": ((track_data.get("artist") or {}) if isinstance(track_data.get("artist"), dict) else {"name": track_data.get("artist")}).get("name"),
+            "top_tags": top_tags,
+        }
+    except Exception as exc:  # noqa: BLE001
+        record["providers"]["lastfm_error"] = str(exc)
+
+
+def enrich_track_metadata(
+    cfg: AppConfig,
+    online: bool = False,
+    offset: int = 0,
+    limit: int | None = 50,
+    musicbrainz: bool = True,
+    lastfm: bool = True,
+    resume: bool = False,
+    musicbrainz_source: str = "remote",
+    musicbrainz_client: Any | None = None,
+    musicbrainz_index: Any | None = None,
+    lastfm_client: Any | None = None,
+) -> dict[str, Any]:
+    """Enrich the `offset`/`limit` window of canonical tracks, journaling each record as it completes.
+
+    The journal is never truncated: every run appends to it (later records win), so windows run
+    on different shards or days accumulate into one output. `resume` skips tracks whose latest
+    record is complete (see `is_enrichment_complete`); offline or failed records are redone.
+    Delete the journal to start from scratch.
+    """
+    if musicbrainz_source not in {"local", "remote"}:
+        raise ValueError("musicbrainz_source must be `local` or `remote`.")
+    all_tracks = _load_canonical_tracks(cfg)
+    track_order = {trk["track_id"]: idx for idx, trk in enumerate(all_tracks)}
+    window = all_tracks[offset:]
+    if limit:
+        window = window[:limit]
+
+    mb_client = musicbrainz_client
+    if mb_client is None and musicbrainz and online:
+        mb_client = MusicBrainzClient(cfg.providers.musicbrainz_user_agent, cfg.cache_dir)
+    lf_client = lastfm_client
+    if lf_client is None and lastfm and online and cfg.providers.lastfm_api_key:
+        lf_client = LastFMClient(cfg.providers.lastfm_api_key, cfg.cache_dir)
+
+    journal_path = cfg.data_dir / ENRICHMENT_JOURNAL
+    journaled = load_enrichment_journal(journal_path)
+    stats: dict[str, Any] = {
+        "track_count": len(window),
+        "offset": offset,
+        "limit": limit,
+        "resume": resume,
+        "skipped_already_enriched": 0,
+        "retried_incomplete": 0,
+        "enriched_this_run": 0,
+        "musicbrainz_source": musicbrainz_source,
+        "musicbrainz_queries": 0,
+        "musicbrainz_isrc_lookups": 0,
+        "fuzzy_searches_skipped": 0,
+        "musicbrainz_local_hits": 0,
+        "musicbrainz_local_misses": 0,
+        "musicbrainz_local_isrc_hits": 0,
+        "musicbrainz_local_isrc_misses": 0,
+        "lastfm_queries": 0,
+        "lastfm_mbid_lookups": 0,
+        "lastfm_mbid_misses": 0,
+        "musicbrainz_cache_hits": 0,
+        "lastfm_cache_hits": 0,
+        "lastfm_key_present": bool(cfg.providers.lastfm_api_key),
+        "online": online,
+    }
+    mb_local = musicbrainz_index
+    owned_index: LocalMusicBrainzIndex | None = None
+    if mb_local is None and musicbrainz and musicbrainz_source == "local":
+        mb_local = owned_index = LocalMusicBrainzIndex(cfg.data_dir / MUSICBRAINZ_LOCAL_INDEX)
+    try:
+        for trk in window:
+            previous = journaled.get(trk["track_id"])
+            if resume and previous is not None:
+                if is_enrichment_complete(previous):
+                    stats["skipped_already_enriched"] += 1
+                    continue
+                stats["retried_incomplete"] += 1
+            artist = (trk.get("canonical_artists") or [None])[0]
+            title = trk.get("canonical_title") or ""
+            isrc = (trk.get("isrc") or "").strip() or None
+            record: dict[str, Any] = {
+                "track_id": trk["track_id"],
+                "canonical_title": title,
+                "artist": artist,
+                "isrc": isrc,
+                "providers": {},
+            }
+            mbid = None
+            if mb_client is not None or mb_local is not None:
+                mbid = _resolve_musicbrainz(mb_client, mb_local, isrc, title, artist, record, stats)
+            record["mbid"] = mbid
+            if lf_client is not None and (mbid or (artist and title)):
+                _enrich_lastfm(lf_client, mbid, title, artist, record, stats)
+            record["online"] = online
+            record["providers_ok"] = sorted(k for k in record["providers"] if not k.endswith("_error"))
+            # Journal each record as soon as it completes so an interrupted run keeps its progress.
+            append_jsonl(journal_path, record)
+            journaled[record["track_id"]] = record
+            stats["enriched_this_run"] += 1
+    finally:
+        if owned_index is not None:
+            owned_index.close()
+
+    stats["rate_limits"] = {
+        name: client.limiter.stats()
+        for name, client in (("musicbrainz", mb_client), ("lastfm", lf_client))
+        if client is not None and hasattr(client, "limiter")
+    }
+    enriched = sorted(journaled.values(), key=lambda r: track_order.get(r["track_id"], len(track_order)))
+    stats["journal_record_count"] = len(enriched)
+    out_path = cfg.data_dir / ENRICHMENT_OUTPUT
+    write_json(out_path, {"records": enriched, "stats": stats})
+    coverage_lines = [
+        "# Metadata Coverage",
+        "",
+        f"- Tracks in window: {stats['track_count']} (offset {offset}, limit {limit})",
+        f"- Enriched this run: {stats['enriched_this_run']} (skipped via resume: {stats['skipped_already_enriched']}, "
+        f"retried offline/failed: {stats['retried_incomplete']})",
+        f"- Journaled records: {stats['journal_record_count']}",
+        f"- Online mode: {stats['online']}",
+        f"- MusicBrainz source: {musicbrainz_source} (local hits: {stats['musicbrainz_local_hits']}, misses: {stats['musicbrainz_local_misses']})",
+        f"- MusicBrainz ISRC lookups: {stats['musicbrainz_isrc_lookups']} remote, {stats['musicbrainz_local_isrc_hits']} local hits, "
+        f"{stats['musicbrainz_local_isrc_misses']} local misses (fuzzy searches skipped: {stats['fuzzy_searches_skipped']})",
+        f"- MusicBrainz queries: {stats['musicbrainz_queries']} (cache hits: {stats['musicbrainz_cache_hits']})",
+        f"- Last.fm MBID lookups: {stats['lastfm_mbid_lookups']} (misses: {stats['lastfm_mbid_misses']})",
+        f"- Last.fm artist/title queries: {stats['lastfm_queries']} (cache hits: {stats['lastfm_cache_hits']})",
+        f"- LASTFM_API_KEY present: {stats['lastfm_key_present']}",
+        *[
+            f"- {name} rate limiter: {rl['calls']} calls, {rl['throttled']} throttled, {rl['retried']} retried, "
+            f"{rl['waited_seconds']}s waited"
+            for name, rl in stats["rate_limits"].items()
+        ],
+    ]
+    write_text(cfg.outputs_dir / "reports" / "metadata_coverage.md", "\n".join(coverage_lines))
+    return {
+        "output_path": str(out_path.relative_to(cfg.root_dir)),
+        "journal_path": str(journal_path.relative_to(cfg.root_dir)),
+        "stats": stats,
+    }
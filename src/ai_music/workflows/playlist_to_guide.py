@@ -8,7 +8,9 @@ from ai_music.config import AppConfig
 from ai_music.io.files import read_json, slugify, write_text
 
 
-def build_guide_for_playlist(cfg: AppConfig, playlist_name: str, use_llm: bool = True) -> dict[str, Any]:
+def build_guide_for_playlist(
+    cfg: AppConfig, playlist_name: str, use_llm: bool = True, llm_cache: bool = True
+) -> dict[str, Any]:
     profiles_path = cfg.data_dir / "analysis" / "playlist_profiles.json"
     normalized_path = cfg.data_dir / "normalized" / "playlist_rows.normalized.json"
     if not profiles_path.exists():
@@ -27,7 +29,7 @@ def build_guide_for_playlist(cfg: AppConfig, playlist_name: str, use_llm: bool =
         available = ", ".join(sorted(p["playlist_name"] for p in profiles.get("profiles", [])))
         raise ValueError(f"Playlist not found: {playlist_name}. Available: {available}")
     sample_tracks = [r for r in normalized_rows if r["playlist_name"].lower() == playlist_name.lower()]
-    md = build_playlist_guide_markdown(cfg, selected, sample_tracks, use_llm=use_llm)
+    md = build_playlist_guide_markdown(cfg, selected, sample_tracks, use_llm=use_llm, llm_cache=llm_cache)
     out_path = cfg.outputs_dir / "guides" / f"{slugify(playlist_name)}.md"
     write_text(out_path, md)
     return {"playlist": playlist_name, "output_path": str(out_path.relative_to(cfg.root_dir))}
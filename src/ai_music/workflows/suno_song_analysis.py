@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Generator, Iterable
 from pathlib import Path
 from typing import Any
 
 from ai_music.config import AppConfig
 from ai_music.io.files import read_json, slugify, write_json, write_text
+from ai_music.llm.cache import build_llm_cache
 from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.telemetry import build_llm_telemetry
 from ai_music.suno.adaptation import adapt_baseline_prompt
 from ai_music.suno.analysis import build_prompt_baseline, filter_high_signal_originals
 from ai_music.suno.api_client import SunoApiClient
@@ -46,40 +49,44 @@ def fetch_suno_created_songs(
     page_size: int | None = None,
     max_pages: int = 100,
     fixture_pages: list[Path] | None = None,
+    prefetch: int = 2,
 ) -> dict[str, Any]:
     mapping_path = _resolve_path(cfg, mapping_config_path)
     mapping = load_mapping_config(mapping_path)
 
     raw_pages: list[dict[str, Any]] = []
     normalized_songs: list[SunoSongRecord] = []
+    rate_limit: dict[str, Any] | None = None
 
+    client: SunoApiClient | None = None
     if fixture_pages:
         resolved = [_resolve_path(cfg, p) for p in fixture_pages]
-        raw_pages = _load_fixture_pages(resolved)
-        for page in raw_pages:
-            page_songs, _ = normalize_page_payload(page, mapping)
-            normalized_songs.extend(page_songs)
-            if len(normalized_songs) >= window_size:
-                normalized_songs = normalized_songs[:window_size]
-                break
+        pages: Iterable[dict[str, Any]] = _load_fixture_pages(resolved)
+        # Fixture runs stage every page given, even ones past the window.
+        raw_pages = list(pages)
     else:
         if not cfg.providers.suno_api_key:
             raise ValueError("SUNO_API_KEY is required for live fetch mode.")
         client = SunoApiClient(cfg.providers.suno_api_key)
-        cursor: str | None = None
-        seen_cursors: set[str] = set()
-        for _ in range(max_pages):
-            page = client.fetch_created_page(mapping, cursor=cursor, page_size=page_size)
-            raw_pages.append(page)
-            page_songs, next_cursor = normalize_page_payload(page, mapping)
+        # Pages arrive from a background fetcher, so normalizing one page overlaps fetching the next.
+        pages = client.iter_created_pages(
+            mapping, page_size=page_size, max_pages=max_pages, max_songs=window_size, prefetch=prefetch
+        )
+    try:
+        for page in pages:
+            if client is not None:
+                raw_pages.append(page)
+            page_songs, _ = normalize_page_payload(page, mapping)
             normalized_songs.extend(page_songs)
             if len(normalized_songs) >= window_size:
                 normalized_songs = normalized_songs[:window_size]
                 break
-            if not next_cursor or next_cursor in seen_cursors:
-                break
-            seen_cursors.add(next_cursor)
-            cursor = next_cursor
+    finally:
+        if isinstance(pages, Generator):
+            # Stops the fetcher thread now rather than whenever the generator is collected.
+            pages.close()
+    if client is not None:
+        rate_limit = client.limiter.stats()
 
     raw_out = cfg.data_dir / "staging" / "suno_created.raw.json"
     normalized_out = cfg.data_dir / "normalized" / "suno_created.normalized.json"
@@ -96,6 +103,7 @@ def fetch_suno_created_songs(
         "fetched_song_count": len(normalized_songs),
         "raw_path": _relative_path(cfg, raw_out),
         "normalized_path": _relative_path(cfg, normalized_out),
+        "rate_limit": rate_limit,
     }
 
 
@@ -155,6 +163,7 @@ def adapt_suno_prompt_baseline(
     model: str | None = None,
     llm_client: Any | None = None,
     preserve_controls: bool = True,
+    llm_cache: bool = True,
 ) -> dict[str, Any]:
     resolved_baseline_path = _resolve_path(cfg, baseline_path)
     payload = read_json(resolved_baseline_path)
@@ -168,7 +177,12 @@ def adapt_suno_prompt_baseline(
     if client is None:
         if not cfg.providers.openrouter_api_key:
             raise ValueError("OPENROUTER_API_KEY is required for adaptation.")
-        client = OpenRouterClient(cfg.providers.openrouter_api_key)
+        client = OpenRouterClient(
+            cfg.providers.openrouter_api_key,
+            base_url=cfg.providers.openrouter_base_url,
+            cache=build_llm_cache(cfg.cache_dir, enabled=llm_cache),
+            telemetry=build_llm_telemetry(cfg.outputs_dir),
+        )
 
     adapted = adapt_baseline_prompt(
         baseline=baseline,
@@ -217,12 +231,16 @@ def adapt_suno_prompt_baseline(
         ]
     )
     write_text(md_out, md)
-    return {
+    result = {
         "json_path": _relative_path(cfg, json_out),
         "markdown_path": _relative_path(cfg, md_out),
         "theme": theme,
         "song_title": adapted.song_title,
     }
+    telemetry = getattr(client, "telemetry", None)
+    if telemetry is not None and telemetry.spans:
+        result["llm_telemetry"] = telemetry.summary()
+    return result
 
 
 def mine_suno_prompt_pack(
@@ -236,6 +254,7 @@ def mine_suno_prompt_pack(
     fixture_pages: list[Path] | None = None,
     model: str | None = None,
     llm_client: Any | None = None,
+    llm_cache: bool = True,
 ) -> dict[str, Any]:
     fetched = fetch_suno_created_songs(
         cfg=cfg,
@@ -256,6 +275,7 @@ def mine_suno_prompt_pack(
         theme=theme,
         model=model,
         llm_client=llm_client,
+        llm_cache=llm_cache,
     )
     summary_out = cfg.outputs_dir / "reports" / "suno_mine_summary.json"
     write_json(summary_out, {"fetch": fetched, "analyze": analyzed, "adapt": adapted})
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.models.types import GuideChunk
+from ai_music.prompting.context import ContextBudgetConfig, ContextPacker
+from ai_music.retrieval.bm25 import BM25Index, ChunkRetriever, load_or_build_bm25
+from ai_music.workflows.docs_to_prompts import DOCS_BM25_INDEX, index_docs, search_docs
+
+
+def _chunk(chunk_id: str, source: str, heading: str, text: str, tags: list[str] | None = None) -> GuideChunk:
+    return GuideChunk(
+        chunk_id=chunk_id,
+        source_file=source,
+        heading_path=[source, heading],
+        text=text,
+        tags=tags or ["general"],
+        token_estimate=len(text.split()),
+    )
+
+
+CHUNKS = [
+    _chunk("gc_a1", "a.md", "Intro", "Open with filtered pads and a sparse kick."),
+    _chunk("gc_a2", "a.md", "Drop", "The drop hits at bar 33 with a reese bass and rolling breaks."),
+    _chunk("gc_b1", "b.md", "Lyrics", "Write the chorus hook first; keep verse lines short."),
+    _chunk("gc_b2", "b.md", "Mixing", "Sidechain the bass under the kick and leave headroom."),
+    _chunk("gc_c1", "c.md", "Arrangement", "Phrase the drop in 16 bar blocks; the breakdown is 8 bars."),
+]
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def test_bm25_ranks_term_matches_and_round_trips(tmp_path: Path) -> None:
+    index = BM25Index.build(CHUNKS)
+    hits = index.search("drop bars", top_k=3)
+    assert [h.chunk_id for h in hits] == ["gc_c1", "gc_a2"]
+    assert hits[0].score > hits[1].score > 0
+    assert index.search("drop", top_k=5, allowed={"gc_a1", "gc_a2"})[0].chunk_id == "gc_a2"
+    assert index.search("nothing matches", top_k=5) == []
+
+    path = tmp_path / "bm25.json"
+    index.save(path)
+    loaded = load_or_build_bm25(path, CHUNKS)
+    assert loaded.search("drop bars", top_k=3) == hits
+    # A changed corpus invalidates the persisted index.
+    assert len(load_or_build_bm25(path, CHUNKS[:2])) == 2
+
+
+def test_packer_retrieves_across_the_corpus_for_a_task() -> None:
+    budgets = ContextBudgetConfig.model_validate(
+        {
+            "tasks": {
+                "structure": {"retrieval_top_k": 2, "retrieval_scope": "corpus", "retrieval_query": "drop bars"},
+                "local": {"retrieval_top_k": 1, "retrieval_query": "bass"},
+            }
+        }
+    )
+    packer = ContextPacker(budgets, retriever=ChunkRetriever(BM25Index.build(CHUNKS), CHUNKS))
+    packed = packer.pack("structure", CHUNKS[2:4])
+    assert [c.chunk_id for c in packed.chunks] == ["gc_a2", "gc_c1"]
+    assert packed.summary()["retrieval"] == {"query": "drop bars", "scope": "corpus", "hits": 2}
+    # Group scope only ranks the chunks it is given.
+    assert [c.chunk_id for c in packer.pack("local", CHUNKS[2:4]).chunks] == ["gc_b2"]
+    # Only corpus-scope tasks depend on chunks outside the caller's group; keys are best first.
+    assert packer.corpus_chunk_keys() == {"structure": ["gc_c1", "gc_a2"]}
+    assert ContextPacker(budgets).pack("structure", CHUNKS[2:4]).retrieval is None
+
+
+def test_docs_index_persists_bm25_and_search_uses_it(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    cfg.docs_dir.mkdir(parents=True, exist_ok=True)
+    (cfg.docs_dir / "dnb.md").write_text(
+        "# DnB\n\n## Drop\n\nReese bass drop with rolling breaks.\n\n## Lyrics\n\nShort chorus hook.\n",
+        encoding="utf-8",
+    )
+    assert index_docs(cfg)["bm25_terms"] > 0
+    assert (cfg.root_dir / DOCS_BM25_INDEX).exists()
+    result = search_docs(cfg, "reese bass", top_k=1)
+    [hit] = result["hits"]
+    assert hit["heading_path"][-1] == "Drop" and hit["source_file"] == "dnb.md"
+    assert "Reese" in hit["snippet"]
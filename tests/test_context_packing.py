@@ -0,0 +1,99 @@
+from pathlib import Path
+
+from ai_music.llm.ollama_client import OllamaClient
+from ai_music.llm.router import LLMRouter, ProviderRoute
+from ai_music.llm.tokens import TokenCounter
+from ai_music.models.types import GuideChunk
+from ai_music.prompting.context import (
+    ContextBudgetConfig,
+    ContextPacker,
+    TaskBudget,
+    load_context_budgets,
+    pack_chunks,
+)
+
+
+def _chunk(i: int, tags: list[str], words: int) -> GuideChunk:
+    text = " ".join(f"word{i}x{n}" for n in range(words))
+    return GuideChunk(
+        chunk_id=f"gc_{i}",
+        source_file="guide.md",
+        heading_path=["guide", f"Section {i}"],
+        text=text,
+        tags=tags,
+        token_estimate=words,
+    )
+
+
+def test_token_counter_counts_and_truncates_within_budget() -> None:
+    counter = TokenCounter()
+    text = "Rolling drum and bass with a rolling sub bass, 174 BPM, crisp breaks!"
+    total = counter.count(text)
+    assert total >= len(text.split())
+    clipped = counter.truncate(text, 5)
+    assert text.startswith(clipped)
+    assert 0 < counter.count(clipped) <= 5
+    assert counter.truncate(text, total + 10) == text
+
+
+def test_pack_prefers_weighted_tags_and_respects_budget() -> None:
+    counter = TokenCounter()
+    chunks = [
+        _chunk(0, ["general"], 40),
+        _chunk(1, ["prompting"], 40),
+        _chunk(2, ["mixing-mastering"], 40),
+        _chunk(3, ["prompting", "lyrics"], 40),
+    ]
+    per_chunk = counter.count(chunks[0].text) + 30
+    budget = TaskBudget(
+        max_input_tokens=per_chunk * 2,
+        per_chunk_max_tokens=1000,
+        min_chunk_tokens=per_chunk,
+        tag_weights={"prompting": 2, "lyrics": 1},
+    )
+    packed = pack_chunks(chunks, budget, counter)
+    assert [c.chunk_id for c in packed.chunks] == ["gc_1", "gc_3"]
+    assert packed.tokens_used <= budget.max_input_tokens
+    assert set(packed.dropped_chunk_ids) == {"gc_0", "gc_2"}
+
+
+def test_pack_truncates_long_chunks_and_filters_required_tags() -> None:
+    counter = TokenCounter()
+    chunks = [_chunk(0, ["arrangement"], 400), _chunk(1, ["general"], 10), _chunk(2, ["lyrics"], 10)]
+    budget = TaskBudget(max_input_tokens=2000, per_chunk_max_tokens=50, required_tags=["arrangement", "lyrics"])
+    packed = pack_chunks(chunks, budget, counter)
+    assert [c.chunk_id for c in packed.chunks] == ["gc_0", "gc_2"]
+    assert packed.truncated_chunk_ids == ["gc_0"]
+    assert counter.count(packed.texts[0]) <= 50
+    assert packed.dropped_chunk_ids == ["gc_1"]
+
+
+def test_model_cap_limits_task_budget() -> None:
+    config = ContextBudgetConfig(
+        default={"max_input_tokens": 6000},
+        tasks={"brief": {"max_input_tokens": 8000, "max_chunks": 5}},
+        model_max_input_tokens={"small-model": 1000},
+    )
+    assert config.resolve("brief").max_input_tokens == 8000
+    assert config.resolve("brief", "small-model").max_input_tokens == 1000
+    assert config.resolve("brief", "small-model").max_chunks == 5
+    assert config.resolve("other").max_input_tokens == 6000
+    assert ContextPacker(config).pack("brief", [], "small-model").budget_tokens == 1000
+
+
+def test_unset_model_packs_under_the_providers_default_model_cap() -> None:
+    config = load_context_budgets(Path("configs/context_budgets.json"))
+    router = LLMRouter([ProviderRoute("ollama", OllamaClient())])
+    seen: list[str | None] = []
+
+    def counter_factory(model: str | None) -> TokenCounter:
+        seen.append(model)
+        return TokenCounter()
+
+    packer = ContextPacker(config, counter_factory=counter_factory, default_model=router.default_model)
+    chunks = [_chunk(i, ["prompting"], 300) for i in range(40)]
+    packed = packer.pack("docs_to_prompt_brief", chunks)
+    assert packed.model == router.default_model == "llama3.1:8b"
+    assert packed.budget_tokens == 3000 and packed.tokens_used <= 3000
+    assert seen == ["llama3.1:8b"]
+    assert ContextPacker(config).pack("docs_to_prompt_brief", chunks).budget_tokens == 8000
@@ -0,0 +1,304 @@
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.io.files import read_json, read_jsonl
+from ai_music.io.markdown import iter_doc_chunks
+from ai_music.llm.router import LLMRouter, ProviderRoute
+from ai_music.llm.telemetry import llm_span, note_usage
+from ai_music.workflows.docs_to_prompts import (
+    DOCS_CHUNKS_JSONL,
+    build_prompt_briefs_from_docs,
+    index_docs,
+    render_prompt_artifacts,
+)
+
+
+class _FakeLLM:
+    provider_name = "fake"
+
+    def __init__(self) -> None:
+        self.in_flight: dict[str, int] = {}
+        self.max_in_flight: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generate(self, system: str, user: str, model: str | None = None, **kwargs) -> str:
+        raise NotImplementedError
+
+    def generate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        with self._lock:
+            self.in_flight[task_name] = self.in_flight.get(task_name, 0) + 1
+            self.max_in_flight[task_name] = max(self.max_in_flight.get(task_name, 0), self.in_flight[task_name])
+        try:
+            # Later docs answer faster so completion order differs from input order.
+            time.sleep(0.05 if "a_guide" in str(inputs) else 0.01)
+            if task_name == "docs_to_prompt_brief":
+                return {"intent": inputs["intent"], "genre": "dnb", "brief_id": f"pb_{inputs['source_file'][:6]}"}
+            raise ValueError("no fragments from fake")
+        finally:
+            with self._lock:
+                self.in_flight[task_name] -= 1
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def _write_docs(cfg: AppConfig) -> None:
+    cfg.docs_dir.mkdir(parents=True, exist_ok=True)
+    for name in ["a_guide", "b_guide", "c_guide", "d_guide"]:
+        (cfg.docs_dir / f"{name}.md").write_text(
+            f"# {name}\n\n## Arrangement\n\nIntro, drop, breakdown.\n\n## Lyrics\n\nHook lines for {name}.\n",
+            encoding="utf-8",
+        )
+
+
+def test_concurrent_brief_generation_matches_serial_output(tmp_path: Path) -> None:
+    results = []
+    for concurrency in [1, 4]:
+        cfg = _cfg(tmp_path / f"c{concurrency}")
+        _write_docs(cfg)
+        index_docs(cfg)
+        llm = _FakeLLM()
+        summary = build_prompt_briefs_from_docs(cfg, concurrency=concurrency, llm_client=llm)
+        report = read_json(cfg.outputs_dir / "reports" / "prompt_generation_report.json")
+        briefs = {p: read_json(cfg.root_dir / p) for p in summary["brief_paths"]}
+        results.append((summary, report, briefs, llm.max_in_flight))
+
+    (serial, serial_report, serial_briefs, serial_peak), (conc, conc_report, conc_briefs, conc_peak) = results
+    # Concurrency is per pipeline stage: one brief call at a time when serial, several when not.
+    assert serial_peak["docs_to_prompt_brief"] == 1
+    assert conc_peak["docs_to_prompt_brief"] > 1
+    assert [d["source_file"] for d in conc["details"]] == ["a_guide.md", "b_guide.md", "c_guide.md", "d_guide.md"]
+    assert conc == serial
+    assert conc_report == serial_report
+    assert conc_briefs == serial_briefs
+    assert all(d["suno_fragments_source"] == "fallback-deterministic" for d in conc["details"])
+    assert conc["token_usage"]["docs_to_prompt_brief"]["calls"] == 4
+    brief = next(iter(conc_briefs.values()))
+    usage = brief["provenance"]["context"]["docs_to_prompt_brief"]
+    assert usage["chunks_packed"] == 2 and usage["input_tokens"] > usage["context_tokens"] > 0
+    assert usage["usage_source"] == "estimate" and usage["tokenizer"]
+
+
+class _TimelineLLM:
+    """Answers every stage and records (task, source, start, end) for overlap checks."""
+
+    provider_name = "fake"
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def generate(self, system: str, user: str, model: str | None = None, **kwargs) -> str:
+        raise NotImplementedError
+
+    def generate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        started = time.perf_counter()
+        time.sleep(0.03)
+        if task_name == "docs_to_prompt_brief":
+            source = inputs["source_file"]
+            answer = {"intent": inputs["intent"], "genre": "dnb", "brief_id": f"pb_{source[:6]}"}
+        else:
+            source = inputs["brief"]["provenance"]["source_file"]
+            answer = {"style_prompt": f"rolling dnb for {source}", "lyrics": "[Verse]\nHook line", "song_title": source}
+        with self._lock:
+            self.calls.append((task_name, source, started, time.perf_counter()))
+        return answer
+
+
+def test_stages_overlap_across_groups_with_per_stage_limits(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_docs(cfg)
+    index_docs(cfg)
+    llm = _TimelineLLM()
+    summary = build_prompt_briefs_from_docs(
+        cfg, llm_client=llm, stage_concurrency={"brief": 1, "fragments": 1, "structure": 1}
+    )
+    assert all(d["suno_fragments_source"] == "llm" and not d["used_fallback"] for d in summary["details"])
+    by_task: dict[str, list[tuple[str, float, float]]] = {}
+    for task, source, start, end in llm.calls:
+        by_task.setdefault(task, []).append((source, start, end))
+    # Each stage is capped at one call at a time...
+    for rows in by_task.values():
+        rows.sort(key=lambda r: r[1])
+        assert all(prev[2] <= nxt[1] for prev, nxt in zip(rows, rows[1:], strict=False))
+    # ...yet the second group's brief runs while the first group's fragments are generated.
+    first_fragments = next(r for r in by_task["suno_style_lyrics_fragments"] if r[0] == "a_guide.md")
+    second_brief = next(r for r in by_task["docs_to_prompt_brief"] if r[0] == "b_guide.md")
+    assert second_brief[1] < first_fragments[2] and first_fragments[1] < second_brief[2]
+
+
+def test_unchanged_groups_reuse_briefs_and_renders(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_docs(cfg)
+    index_docs(cfg)
+    first_llm = _TimelineLLM()
+    first = build_prompt_briefs_from_docs(cfg, llm_client=first_llm)
+    briefs = {p: read_json(cfg.root_dir / p) for p in first["brief_paths"]}
+    assert (first["generated_count"], first["reused_count"]) == (4, 0)
+    assert render_prompt_artifacts(cfg)["reused_count"] == 0
+
+    idle_llm = _TimelineLLM()
+    second = build_prompt_briefs_from_docs(cfg, llm_client=idle_llm)
+    assert idle_llm.calls == []
+    assert (second["generated_count"], second["reused_count"]) == (0, 4)
+    assert {p: read_json(cfg.root_dir / p) for p in second["brief_paths"]} == briefs
+    assert render_prompt_artifacts(cfg)["reused_count"] == 12
+
+    (cfg.docs_dir / "c_guide.md").write_text("# c_guide\n\n## Lyrics\n\nNew hook lines.\n", encoding="utf-8")
+    index_docs(cfg)
+    third_llm = _TimelineLLM()
+    third = build_prompt_briefs_from_docs(cfg, llm_client=third_llm)
+    assert {source for _, source, _, _ in third_llm.calls} == {"c_guide.md"}
+    assert [d["source_file"] for d in third["details"] if not d["reused"]] == ["c_guide.md"]
+    assert render_prompt_artifacts(cfg)["reused_count"] == 9
+
+    forced = build_prompt_briefs_from_docs(cfg, llm_client=_TimelineLLM(), force=True)
+    assert forced["reused_count"] == 0
+
+
+def test_index_docs_rechunks_only_changed_files_and_recurses(tmp_path: Path, monkeypatch) -> None:
+    cfg = _cfg(tmp_path)
+    _write_docs(cfg)
+    nested = cfg.docs_dir / "reference" / "suno"
+    nested.mkdir(parents=True)
+    (nested / "a_guide.md").write_text("# Sliders\n\n## Weirdness\n\nKeep it near 40.\n", encoding="utf-8")
+    first = index_docs(cfg)
+    assert first["docs"] == ["a_guide.md", "b_guide.md", "c_guide.md", "d_guide.md", "reference/suno/a_guide.md"]
+    assert len(first["changed_docs"]) == 5
+    rows_before = read_json(cfg.root_dir / "data/analysis/doc_chunks_index.json")
+    assert rows_before["chunk_count"] == 9
+
+    chunked: list[str] = []
+
+    def counting_chunks(doc_paths, source_files=None, **kwargs):
+        chunked.extend(source_files)
+        return iter_doc_chunks(doc_paths, source_files, **kwargs)
+
+    monkeypatch.setattr("ai_music.workflows.docs_to_prompts.iter_doc_chunks", counting_chunks)
+    # Touching a file without changing it does not re-chunk it.
+    (cfg.docs_dir / "b_guide.md").touch()
+    (cfg.docs_dir / "c_guide.md").write_text("# c_guide\n\n## Drop\n\nHalf-time drop.\n", encoding="utf-8")
+    (cfg.docs_dir / "d_guide.md").unlink()
+    second = index_docs(cfg)
+    assert chunked == ["c_guide.md"]
+    assert second["changed_docs"] == ["c_guide.md"] and second["removed_docs"] == ["d_guide.md"]
+    assert second["chunk_count"] == 6
+    sources = [row["source_file"] for row in read_jsonl(cfg.root_dir / DOCS_CHUNKS_JSONL)]
+    assert sources == ["a_guide.md", "a_guide.md", "b_guide.md", "b_guide.md", "c_guide.md", "reference/suno/a_guide.md"]
+
+    chunked.clear()
+    assert index_docs(cfg, force=True)["chunk_count"] == 6
+    assert len(chunked) == 4
+
+
+def test_shipped_budgets_reuse_briefs_while_their_retrieved_context_is_unchanged(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_docs(cfg)
+    (cfg.docs_dir / "z_notes.md").write_text("# z_notes\n\n## Mixing\n\nSidechain compression tips.\n", encoding="utf-8")
+    index_docs(cfg)
+    budgets = Path("configs/context_budgets.json")
+    first = build_prompt_briefs_from_docs(cfg, llm_client=_TimelineLLM(), context_budgets_path=budgets)
+    brief = read_json(cfg.root_dir / first["brief_paths"][0])
+    context = brief["provenance"]["context"]
+    packed_ids = context["docs_to_prompt_brief"]["chunk_ids"]
+    assert packed_ids and brief["provenance"]["chunk_ids"] == packed_ids
+    rows = read_jsonl(cfg.root_dir / DOCS_CHUNKS_JSONL)
+    group_ids = {r["chunk_id"] for r in rows if r["source_file"] == "a_guide.md"}
+    # The brief reads across the corpus; the fragment and structure passes stay on the group.
+    assert context["docs_to_prompt_brief"]["retrieval"]["scope"] == "corpus"
+    assert not set(packed_ids) <= group_ids
+    assert set(context["suno_style_lyrics_fragments"]["chunk_ids"]) <= group_ids
+
+    # An edit that no other group's brief retrieves regenerates only that doc's brief.
+    (cfg.docs_dir / "z_notes.md").write_text("# z_notes\n\n## Mixing\n\nSidechain pump tips.\n", encoding="utf-8")
+    index_docs(cfg)
+    llm = _TimelineLLM()
+    build_prompt_briefs_from_docs(cfg, llm_client=llm, context_budgets_path=budgets)
+    assert {source for _, source, _, _ in llm.calls} == {"z_notes.md"}
+
+    # A doc the other briefs retrieved from regenerates them too, since their context changed.
+    (cfg.docs_dir / "c_guide.md").write_text("# c_guide\n\n## Lyrics\n\nNew hook lines.\n", encoding="utf-8")
+    index_docs(cfg)
+    llm = _TimelineLLM()
+    build_prompt_briefs_from_docs(cfg, llm_client=llm, context_budgets_path=budgets)
+    assert "c_guide.md" in {source for _, source, _, _ in llm.calls}
+    assert "a_guide.md" in {source for task, source, _, _ in llm.calls if task == "docs_to_prompt_brief"}
+
+
+class _DownProvider:
+    def generate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        raise httpx.ConnectError("connection refused")
+
+
+def test_provenance_credits_the_provider_that_answered(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_docs(cfg)
+    index_docs(cfg)
+    router = LLMRouter([ProviderRoute("openrouter", _DownProvider()), ProviderRoute("ollama", _TimelineLLM())])
+    summary = build_prompt_briefs_from_docs(cfg, llm_client=router)
+    assert {d["llm_provider"] for d in summary["details"]} == {"ollama"}
+    brief = read_json(cfg.root_dir / summary["brief_paths"][0])
+    assert brief["provenance"]["suno_fragments"]["llm_provider"] == "ollama"
+    assert {tuple(d["answered_by"]) for d in summary["details"]} == {("ollama",)}
+
+    # Once the primary is back, failover briefs are regenerated rather than reused as its answer.
+    router = LLMRouter([ProviderRoute("openrouter", _TimelineLLM()), ProviderRoute("ollama", _TimelineLLM())])
+    recovered = build_prompt_briefs_from_docs(cfg, llm_client=router)
+    assert (recovered["generated_count"], recovered["reused_count"]) == (4, 0)
+    assert {tuple(d["answered_by"]) for d in recovered["details"]} == {("openrouter",)}
+    assert build_prompt_briefs_from_docs(cfg, llm_client=router)["reused_count"] == 4
+
+
+class _UsageReportingLLM(_FakeLLM):
+    """Reports provider usage for every structured call, like a client inside its call span."""
+
+    def generate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        with llm_span(None, task_name, self.provider_name, model):
+            note_usage(1234, 56)
+            return super().generate_structured(task_name, inputs, schema, model, max_attempts)
+
+
+def test_token_usage_prefers_provider_reported_counts(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_docs(cfg)
+    index_docs(cfg)
+    summary = build_prompt_briefs_from_docs(cfg, llm_client=_UsageReportingLLM())
+    brief = read_json(cfg.root_dir / summary["brief_paths"][0])
+    usage = brief["provenance"]["context"]["docs_to_prompt_brief"]
+    assert (usage["usage_source"], usage["input_tokens"], usage["output_tokens"]) == ("provider", 1234, 56)
+    assert summary["token_usage"]["docs_to_prompt_brief"] == {
+        "calls": 4,
+        "estimated_calls": 0,
+        "input_tokens": 4 * 1234,
+        "output_tokens": 4 * 56,
+    }
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ai_music.analyze.playlist_profiles import _dominant_tags_from_name, infer_genre_family
+from ai_music.io.markdown import _tag_chunk
+from ai_music.retrieval.keywords import AhoCorasick, KeywordTagger, KeywordVocabulary, keyword_tagger
+
+
+def test_aho_corasick_reports_overlapping_matches_in_one_pass() -> None:
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    matches = sorted((start, end, automaton.patterns[i]) for start, end, i in automaton.iter_matches("ushers"))
+    assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+    assert list(AhoCorasick([]).iter_matches("anything")) == []
+    # Large vocabularies take the automaton path; small ones scan per pattern. Both agree.
+    patterns = [f"kw{i}x" for i in range(200)]
+    text = "kw7x and kw150x but not kw999"
+    assert AhoCorasick(patterns).found(text) == {7, 150}
+    assert AhoCorasick(patterns[:10]).found(text) == {7}
+
+
+def test_tagger_keeps_rule_order_and_word_boundaries() -> None:
+    vocabulary = KeywordVocabulary.model_validate(
+        {
+            "rules": [
+                {"tags": ["dnb", "breaks"], "keywords": ["jungle", "drum and bass"]},
+                {"tags": ["house"], "keywords": ["house"]},
+                {"tags": ["breaks"], "keywords": ["breakbeat"]},
+            ]
+        }
+    )
+    tagger = vocabulary.tagger()
+    assert tagger.tags("Deep HOUSE into Jungle breakbeat") == ["dnb", "breaks", "house"]
+    assert tagger.first("deep house and drum and bass") == "dnb"
+    assert tagger.first("ambient") is None
+    assert tagger.tags("warehouse") == ["house"]
+
+    words = KeywordTagger(vocabulary.rules, word_boundary=True)
+    assert words.tags("warehouse") == []
+    assert words.tags("drum   and\tbass, house!") == ["dnb", "breaks", "house"]
+    assert words.covers_words("House... jungle!") and not words.covers_words("house music")
+    assert not words.covers_words("...")
+    assert words.digest != tagger.digest
+
+
+def test_shipped_vocabularies_drive_chunk_playlist_and_lyric_tagging(tmp_path: Path) -> None:
+    assert _tag_chunk("Write the chorus before the drop.", ["guide", "Suno prompts"]) == [
+        "arrangement",
+        "lyrics",
+        "prompting",
+    ]
+    assert _tag_chunk("Nothing to see.", ["guide"]) == ["general"]
+    assert infer_genre_family("Liquid DnB Hits") == "dnb"
+    assert infer_genre_family("Ambient") == "electronic"
+    assert _dominant_tags_from_name("Chill Liquid") == ["electronic", "liquid", "melodic", "emotive", "chill", "deep"]
+
+    path = tmp_path / "keyword_tags.json"
+    path.write_text(
+        json.dumps({"vocabularies": {"doc_tags": {"rules": [{"tags": ["custom"], "keywords": ["reese"]}]}}}),
+        encoding="utf-8",
+    )
+    assert keyword_tagger("doc_tags", path).tags("Reese bass") == ["custom"]
+    with pytest.raises(ValueError, match="Keyword vocabulary not found: missing"):
+        keyword_tagger("missing", path)
+    with pytest.raises(FileNotFoundError):
+        keyword_tagger("doc_tags", tmp_path / "absent.json")
@@ -0,0 +1,93 @@
+import json
+import os
+from pathlib import Path
+
+import httpx
+
+from ai_music.llm.cache import LLMResponseCache
+from ai_music.llm.openrouter_client import OpenRouterClient
+
+
+def _mock_openrouter(monkeypatch, replies: list[str]) -> list[dict]:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        content = replies[min(len(requests), len(replies)) - 1]
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        "ai_music.llm.openrouter_client.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    return requests
+
+
+def test_client_reuses_cached_response_across_instances(monkeypatch, tmp_path: Path) -> None:
+    requests = _mock_openrouter(monkeypatch, ['{"genre": "dnb"}'])
+    schema = {"type": "object", "properties": {"genre": {"type": "string"}}}
+    for _ in range(2):
+        client = OpenRouterClient("key", cache=LLMResponseCache(tmp_path))
+        out = client.generate_structured("task", {"a": 1}, schema, model="m")
+        assert out == {"genre": "dnb"}
+    assert len(requests) == 1
+
+    client.generate("sys", "user", model="m", temperature=0.2)
+    client.generate("sys", "user", model="m", temperature=0.9)
+    client.generate("sys", "user", model="other", temperature=0.9)
+    client.generate("sys", "user", model="m", temperature=0.2)
+    assert len(requests) == 4
+
+
+def test_unparseable_structured_answer_is_not_replayed(monkeypatch, tmp_path: Path) -> None:
+    requests = _mock_openrouter(monkeypatch, ["not json", '{"ok": true}'])
+    client = OpenRouterClient("key", cache=LLMResponseCache(tmp_path))
+    assert client.generate_structured("task", {}, {"type": "object"}, model="m") == {"ok": True}
+    assert len(requests) == 2
+
+    again = OpenRouterClient("key", cache=LLMResponseCache(tmp_path))
+    assert again.generate_structured("task", {}, {"type": "object"}, model="m") == {"ok": True}
+    assert len(requests) == 3
+
+
+def test_cache_ttl_and_lru_eviction(tmp_path: Path) -> None:
+    now = [1000.0]
+    cache = LLMResponseCache(tmp_path, ttl_seconds=60, max_bytes=10_000, clock=lambda: now[0])
+    key = cache.make_key("openrouter", "m", "s", "u", 0.2, {"type": "object"})
+    assert key != cache.make_key("openrouter", "m", "s", "u", 0.2, None)
+    cache.set(key, "answer")
+    now[0] += 30
+    assert cache.get(key) == "answer"
+    now[0] += 61
+    assert cache.get(key) is None
+    assert not cache.path_for(key).exists()
+
+    small = LLMResponseCache(tmp_path / "small", ttl_seconds=None, max_bytes=900, clock=lambda: now[0])
+    keys = [small.make_key("p", "m", "s", f"u{i}") for i in range(3)]
+    for k in keys:
+        now[0] += 1
+        small.set(k, "x" * 200)
+    # Touch the oldest entry so the middle one becomes least recently used.
+    now[0] += 1
+    assert small.get(keys[0]) is not None
+    now[0] += 1
+    small.set(small.make_key("p", "m", "s", "u3"), "x" * 200)
+    assert small.get(keys[1]) is None
+    assert small.get(keys[0]) is not None
+    assert small.stats()["evictions"] >= 1
+    assert sum(os.path.getsize(p) for p in (tmp_path / "small" / "llm").glob("*/*.json")) <= 900
+
+
+def test_rewriting_a_key_tracks_size_without_early_eviction(tmp_path: Path) -> None:
+    cache = LLMResponseCache(tmp_path, ttl_seconds=None, max_bytes=1000)
+    evict_calls: list[int] = []
+    cache.evict = lambda: evict_calls.append(1) or 0
+    keys = [cache.make_key("p", "m", "s", f"u{i}") for i in range(2)]
+    for _ in range(5):
+        for k in keys:
+            cache.set(k, "x" * 300)
+    on_disk = sum(os.path.getsize(p) for p in (tmp_path / "llm").glob("*/*.json"))
+    assert on_disk < 1000
+    assert cache.stats()["size_bytes"] == on_disk
+    assert evict_calls == []
@@ -0,0 +1,208 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.llm.router import (
+    CircuitBreaker,
+    LLMRouter,
+    ProviderRoute,
+    answered_by,
+    build_llm_router,
+    routing_scope,
+)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _FakeProvider:
+    def __init__(self, answer: dict | None = None, fail: Exception | None = None, delay: float = 0.0):
+        self.answer = answer
+        self.fail = fail
+        self.delay = delay
+        self.models: list[str | None] = []
+        self.cancelled = False
+
+    def generate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        self.models.append(model)
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        return dict(self.answer or {})
+
+    async def agenerate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        self.models.append(model)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail is not None:
+            raise self.fail
+        return dict(self.answer or {})
+
+
+def _outage() -> Exception:
+    return httpx.ConnectError("connection refused")
+
+
+def test_circuit_breaker_opens_then_half_opens_after_reset() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    clock.now = 10.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # Only one probe is let through while half-open.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["opened_count"] == 1
+
+
+def test_router_fails_over_and_skips_open_circuit() -> None:
+    primary = _FakeProvider(fail=_outage())
+    backup = _FakeProvider(answer={"genre": "dnb"})
+    router = LLMRouter(
+        [ProviderRoute("openrouter", primary), ProviderRoute("ollama", backup)],
+        failure_threshold=2,
+        clock=_Clock(),
+    )
+    with routing_scope() as routing:
+        for _ in range(3):
+            assert router.generate_structured("brief", {}, {}, model="openai/gpt-4o-mini") == {"genre": "dnb"}
+    # The provider-specific model id only goes to the primary; the fallback uses its own default.
+    assert primary.models == ["openai/gpt-4o-mini", "openai/gpt-4o-mini"]
+    assert backup.models == [None, None, None]
+    assert [e["outcome"] for e in routing if e["provider"] == "openrouter"] == [
+        "error",
+        "error",
+        "skipped_open_circuit",
+    ]
+    assert router.stats()["openrouter"]["state"] == "open"
+    assert router.stats()["ollama"]["state"] == "closed"
+
+
+def test_bad_answers_do_not_trip_the_breaker() -> None:
+    primary = _FakeProvider(fail=RuntimeError("structured generation failed: not json"))
+    router = LLMRouter([ProviderRoute("openrouter", primary)], failure_threshold=1)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="All LLM providers failed"):
+            router.generate_structured("brief", {}, {})
+    assert router.stats()["openrouter"]["state"] == "closed"
+    assert len(primary.models) == 2
+
+
+def test_async_timeout_budget_fails_over() -> None:
+    slow = _FakeProvider(answer={"genre": "slow"}, delay=5.0)
+    fast = _FakeProvider(answer={"genre": "fast"})
+    router = LLMRouter([ProviderRoute("openrouter", slow, timeout=0.05), ProviderRoute("ollama", fast)])
+
+    async def go() -> dict:
+        with routing_scope() as routing:
+            result = await router.agenerate_structured("brief", {}, {})
+        assert [e["outcome"] for e in routing] == ["error", "ok"]
+        return result
+
+    assert asyncio.run(go()) == {"genre": "fast"}
+    assert router.stats()["openrouter"]["consecutive_failures"] == 1
+
+
+def test_sync_calls_share_the_timeout_budget_and_hedging() -> None:
+    slow = _FakeProvider(answer={"genre": "slow"}, delay=0.5)
+    fast = _FakeProvider(answer={"genre": "fast"})
+    router = LLMRouter([ProviderRoute("openrouter", slow, timeout=0.05), ProviderRoute("ollama", fast)])
+    started = time.monotonic()
+    with routing_scope() as routing:
+        assert router.generate_structured("brief", {}, {}) == {"genre": "fast"}
+    assert time.monotonic() - started < 0.4
+    assert [(e["provider"], e["outcome"]) for e in routing] == [("openrouter", "error"), ("ollama", "ok")]
+    assert router.stats()["openrouter"]["consecutive_failures"] == 1
+
+    router = LLMRouter([ProviderRoute("openrouter", slow), ProviderRoute("ollama", fast)], hedge_after=0.05)
+    with routing_scope() as routing:
+        assert router.generate_structured("brief", {}, {}) == {"genre": "fast"}
+    assert [(e["provider"], e["outcome"]) for e in routing] == [
+        ("openrouter", "hedged"),
+        ("ollama", "ok"),
+        ("openrouter", "cancelled"),
+    ]
+    assert router.stats()["openrouter"]["consecutive_failures"] == 0
+
+
+def test_hedged_request_uses_first_answer_and_cancels_the_other() -> None:
+    slow = _FakeProvider(answer={"genre": "slow"}, delay=5.0)
+    fast = _FakeProvider(answer={"genre": "fast"}, delay=0.01)
+    router = LLMRouter(
+        [ProviderRoute("openrouter", slow), ProviderRoute("ollama", fast)],
+        hedge_after=0.05,
+    )
+
+    async def go() -> tuple[dict, list[dict]]:
+        with routing_scope() as routing:
+            return await router.agenerate_structured("brief", {}, {}), routing
+
+    result, routing = asyncio.run(go())
+    assert result == {"genre": "fast"}
+    assert slow.cancelled
+    assert [(e["provider"], e["outcome"]) for e in routing] == [
+        ("openrouter", "hedged"),
+        ("ollama", "ok"),
+        ("openrouter", "cancelled"),
+    ]
+    # A cancelled hedge loser is not counted as a provider failure.
+    assert router.stats()["openrouter"]["consecutive_failures"] == 0
+
+
+def test_answered_by_names_the_fallback_and_llm_providers_sets_the_order(tmp_path) -> None:
+    router = LLMRouter(
+        [ProviderRoute("openrouter", _FakeProvider(fail=_outage())), ProviderRoute("ollama", _FakeProvider({}))]
+    )
+    with routing_scope() as routing:
+        router.generate_structured("brief", {}, {})
+        assert answered_by("brief") == "ollama"
+    assert answered_by("brief", routing) == "ollama" and answered_by("other", routing) is None
+    assert answered_by("brief") is None
+
+    providers = ProviderConfig(
+        openrouter_api_key="key",
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+        llm_providers=("ollama",),
+    )
+    cfg = AppConfig(
+        root_dir=tmp_path,
+        docs_dir=tmp_path / "docs",
+        playlists_dir=tmp_path / "playlists",
+        media_dir=tmp_path / "media",
+        data_dir=tmp_path / "data",
+        cache_dir=tmp_path / "cache",
+        outputs_dir=tmp_path / "outputs",
+        providers=providers,
+    )
+    assert [r.name for r in build_llm_router(cfg, prefer="openrouter").routes] == ["ollama"]
+    cfg.providers.llm_providers = ("ollama", "openrouter")
+    assert [r.name for r in build_llm_router(cfg).routes] == ["ollama", "openrouter"]
+    cfg.providers.llm_providers = ()
+    assert [r.name for r in build_llm_router(cfg, prefer="openrouter").routes] == ["openrouter"]
@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from ai_music.llm.ollama_client import OllamaClient
+from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.streaming import IncrementalJSONValidator, StreamValidationError
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "weirdness": {"type": "integer"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "audio": {"anyOf": [{"type": "integer"}, {"type": "null"}]},
+    },
+    "additionalProperties": False,
+}
+
+
+def _feed_all(validator: IncrementalJSONValidator, text: str, step: int = 3) -> None:
+    for i in range(0, len(text), step):
+        validator.feed(text[i : i + step])
+
+
+def test_validator_accepts_chunked_valid_objects() -> None:
+    for text in [
+        '{"title": "A \\"quoted\\" {title}", "weirdness": 40, "tags": ["x", "y"], "audio": null}',
+        '```json\n{"title": "x", "audio": 12}\n```',
+    ]:
+        validator = IncrementalJSONValidator(SCHEMA)
+        _feed_all(validator, text)
+        assert validator.complete
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ('{"title": "x", "bogus": 1}', "Unexpected key"),
+        ('{"weirdness": "high"}', "should be"),
+        ('{"audio": "loud"}', "should be"),
+        ('{"tags": ["a"}', "Mismatched"),
+        ("Sure! " * 50 + "{}", "No JSON object"),
+    ],
+)
+def test_validator_rejects_off_schema_prefixes(text: str, message: str) -> None:
+    validator = IncrementalJSONValidator(SCHEMA)
+    with pytest.raises(StreamValidationError, match=message):
+        _feed_all(validator, text)
+
+
+def _sse(text: str, step: int = 4) -> bytes:
+    events = [
+        f"data: {json.dumps({'choices': [{'delta': {'content': text[i : i + step]}}]})}\n\n"
+        for i in range(0, len(text), step)
+    ]
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+def test_openrouter_stream_aborts_off_schema_answer_and_retries(monkeypatch, tmp_path: Path) -> None:
+    answers = ['{"title": "x", "bogus": "' + "z" * 500 + '"}', '{"title": "ok", "weirdness": 10}']
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, content=_sse(answers[len(requests) - 1]))
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        "ai_music.llm.openrouter_client.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    client = OpenRouterClient("key", stream=True)
+    assert client.generate_structured("task", {}, SCHEMA, model="m") == {"title": "ok", "weirdness": 10}
+    assert all(r["stream"] for r in requests)
+    assert "Unexpected key 'bogus'" in requests[1]["messages"][1]["content"]
+    first, second = client.stream_metrics
+    assert first.aborted and first.chars < len(answers[0])
+    assert second.aborted is None and second.ttft_seconds is not None
+
+
+def test_ollama_stream_reads_ndjson(monkeypatch) -> None:
+    text = '{"title": "ok"}'
+    body = "".join(json.dumps({"message": {"content": ch}, "done": False}) + "\n" for ch in text)
+    body += json.dumps({"message": {"content": ""}, "done": True}) + "\n"
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        "ai_music.llm.ollama_client.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(lambda r: httpx.Response(200, content=body)), **kwargs),
+    )
+    client = OllamaClient(stream=True)
+    assert client.generate_structured("task", {}, SCHEMA) == {"title": "ok"}
+    assert client.stream_metrics[0].chars == len(text)
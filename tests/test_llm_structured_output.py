@@ -0,0 +1,132 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from ai_music.llm.base import extract_json_object, iter_json_object_spans
+from ai_music.llm.ollama_client import OllamaClient
+from ai_music.llm.openrouter_client import OpenRouterClient
+
+SCHEMA = {"type": "object", "properties": {"genre": {"type": "string"}}, "required": ["genre"]}
+
+
+def _patch_client(monkeypatch, module: str, handler) -> None:
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        f"ai_music.llm.{module}.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+
+
+def test_extract_json_object_ignores_braces_in_strings_and_commentary() -> None:
+    text = 'Sure {see below}:\n{"lyrics": "[Chorus] {echo} \\"hey\\" }", "bars": {"intro": 8}}\nSwap {a} and {b}.'
+    assert extract_json_object(text) == {"lyrics": '[Chorus] {echo} "hey" }', "bars": {"intro": 8}}
+    spans_text = 'x {} y {"}": {}} {'
+    assert [spans_text[s:e] for s, e in iter_json_object_spans(spans_text)] == ["{}", '{"}": {}}']
+
+
+def test_extract_json_object_prefers_fenced_block() -> None:
+    text = 'Schema: {"type": "object"}\n```json\n{"genre": "dnb"}\n```\nDone {}'
+    assert extract_json_object(text) == {"genre": "dnb"}
+    assert extract_json_object('{"genre": "house"}') == {"genre": "house"}
+
+
+def test_stray_open_brace_in_prose_does_not_hide_a_later_object() -> None:
+    text = 'Use {chorus tags like this, then:\n{"genre": "dnb", "bars": {"drop": 16}}'
+    assert extract_json_object(text) == {"genre": "dnb", "bars": {"drop": 16}}
+    prose = "a { b {} c {"
+    assert [prose[s:e] for s, e in iter_json_object_spans(prose)] == ["{}"]
+    truncated = 'x { y {"a": {"b": 1}, "c": '
+    assert list(iter_json_object_spans(truncated)) == []
+
+
+def test_many_stray_braces_are_scanned_in_linear_time() -> None:
+    text = "Use {chorus tag here, " * 6000 + '{"genre": "dnb"}'
+    assert len(text) > 128_000
+    started = time.perf_counter()
+    assert extract_json_object(text) == {"genre": "dnb"}
+    assert time.perf_counter() - started < 1.0
+
+
+@pytest.mark.parametrize(
+    "text", ["no json here", '{"genre": "dnb", "bpm": ', '{"genre": "dnb", "bars": {"drop": 16}, "bpm": ', "[1, 2]"]
+)
+def test_extract_json_object_rejects_missing_or_truncated_objects(text: str) -> None:
+    with pytest.raises(ValueError):
+        extract_json_object(text)
+
+
+def test_openrouter_payload_uses_json_schema_response_format() -> None:
+    client = OpenRouterClient("key")
+    payload = client._chat_payload("s", "u", model="m", response_schema=SCHEMA, task_name="docs to brief!")
+    assert payload["response_format"] == {
+        "type": "json_schema",
+        "json_schema": {"name": "docs_to_brief_", "strict": False, "schema": SCHEMA},
+    }
+    assert "response_format" not in client._chat_payload("s", "u", model="m")
+
+
+def test_ollama_payload_uses_format_schema() -> None:
+    client = OllamaClient()
+    assert client._generate_payload("s", "u", response_schema=SCHEMA)["format"] == SCHEMA
+    assert "format" not in client._generate_payload("s", "u")
+
+
+def test_openrouter_falls_back_to_prompt_mode_when_model_rejects_schema(monkeypatch) -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if "response_format" in body:
+            return httpx.Response(400, json={"error": {"message": "response_format not supported"}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": '{"genre": "dnb"}'}}]})
+
+    _patch_client(monkeypatch, "openrouter_client", handler)
+    client = OpenRouterClient("key")
+    for _ in range(2):
+        assert client.generate_structured("brief", {}, SCHEMA, model="old-model") == {"genre": "dnb"}
+    # Only the first call probes native mode; the model is then remembered as unsupported.
+    assert ["response_format" in r for r in requests] == [True, False, False]
+    # The schema rides in `response_format` natively and in the prompt only as a fallback.
+    assert ["Schema (JSON Schema" in r["messages"][1]["content"] for r in requests] == [False, True, True]
+    assert client.structured_stats.as_dict()["brief"] == {
+        "calls": 2,
+        "repairs": 0,
+        "native": 0,
+        "native_fallbacks": 1,
+    }
+
+
+def test_openrouter_keeps_native_mode_after_unrelated_bad_requests(monkeypatch) -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        if len(requests) == 1:
+            return httpx.Response(400, json={"error": {"message": "context length exceeded"}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": '{"genre": "dnb"}'}}]})
+
+    _patch_client(monkeypatch, "openrouter_client", handler)
+    client = OpenRouterClient("key")
+    with pytest.raises(RuntimeError, match="400 Bad Request"):
+        client.generate_structured("brief", {}, SCHEMA, model="m", max_attempts=1)
+    assert client.generate_structured("brief", {}, SCHEMA, model="m") == {"genre": "dnb"}
+    assert client.native_unsupported == set()
+    assert ["response_format" in r for r in requests] == [True, True]
+
+
+def test_repairs_are_counted_per_task(monkeypatch) -> None:
+    answers = iter(["not json", '{"genre": "dnb"}', '{"genre": "house"}'])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": next(answers)}, "done": True})
+
+    _patch_client(monkeypatch, "ollama_client", handler)
+    client = OllamaClient()
+    assert client.generate_structured("a", {}, SCHEMA) == {"genre": "dnb"}
+    assert client.generate_structured("b", {}, SCHEMA) == {"genre": "house"}
+    stats = client.structured_stats.as_dict()
+    assert stats["a"]["repairs"] == 1 and stats["a"]["native"] == 2
+    assert stats["b"]["repairs"] == 0 and stats["b"]["calls"] == 1
@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from ai_music.cli import app
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.io.files import read_json
+from ai_music.llm.ollama_client import OllamaClient
+from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.stub_server import StubLLMConfig, StubLLMServer, instance_from_schema
+from ai_music.models.schemas import PromptBrief, SunoFragments
+from ai_music.workflows.docs_to_prompts import index_docs
+from ai_music.workflows.llm_benchmark import run_prompt_pipeline_benchmark
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def test_instances_from_schema_validate_against_models() -> None:
+    brief = PromptBrief.model_validate(instance_from_schema(PromptBrief.model_json_schema()))
+    assert brief.genre == "stub genre" and tuple(brief.tempo_bpm_range) == (120, 128)
+    assert brief.suno_fragments is not None
+    SunoFragments.model_validate(instance_from_schema(SunoFragments.model_json_schema()))
+
+
+def test_stub_serves_openrouter_and_ollama_shapes() -> None:
+    schema = {"type": "object", "properties": {"genre": {"type": "string"}, "bpm": {"type": "integer", "minimum": 160}}}
+    config = StubLLMConfig(canned={"canned_task": {"genre": "dnb", "bpm": 174}})
+    with StubLLMServer(config) as server:
+        router = OpenRouterClient("key", base_url=server.openrouter_base_url)
+        assert router.generate_structured("brief", {}, schema) == {"genre": "stub genre", "bpm": 160}
+        assert router.generate_structured("canned_task", {}, schema) == {"genre": "dnb", "bpm": 174}
+        ollama = OllamaClient(server.ollama_base_url, stream=True, native_structured=False)
+        assert ollama.generate_structured("brief", {}, schema) == {"genre": "stub genre", "bpm": 160}
+        assert ollama.warm_up()["loaded"]
+        assert server.stats()["requests"] == 4 and server.stats()["streams"] == 1
+
+
+def test_stub_injects_errors() -> None:
+    with StubLLMServer(StubLLMConfig(error_rate=1.0)) as server:
+        client = OpenRouterClient("key", base_url=server.openrouter_base_url)
+        with pytest.raises(RuntimeError, match="503"):
+            client.generate_structured("brief", {}, {"type": "object"}, max_attempts=1)
+        assert server.stats()["errors_injected"] == 1
+
+
+def test_prompt_pipeline_benchmark_reports_each_level(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    cfg.docs_dir.mkdir(parents=True, exist_ok=True)
+    for name in ["a_guide", "b_guide", "c_guide"]:
+        (cfg.docs_dir / f"{name}.md").write_text(
+            f"# {name}\n\n## Arrangement\n\nIntro, drop, breakdown.\n\n## Lyrics\n\nHook lines for {name}.\n",
+            encoding="utf-8",
+        )
+    index_docs(cfg)
+    result = run_prompt_pipeline_benchmark(cfg, concurrency_levels=[1, 3], latency_seconds=0.01)
+    assert [row["concurrency"] for row in result["levels"]] == [1, 3]
+    for row in result["levels"]:
+        assert row["briefs"] == 3 and row["fallback_briefs"] == 0
+        assert row["llm_requests"] == result["levels"][0]["llm_requests"] > 0
+    assert read_json(cfg.outputs_dir / "reports" / "llm_benchmark_prompt_pipeline.json")["provider"] == "openrouter"
+    # Benchmark briefs go to a scratch directory, never to the real outputs.
+    assert not (cfg.outputs_dir / "prompts" / "briefs").exists() or not any(
+        (cfg.outputs_dir / "prompts" / "briefs").iterdir()
+    )
+
+
+def test_suno_mine_benchmark_sweeps_isolated_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg = _cfg(tmp_path)
+    monkeypatch.setattr("ai_music.cli._cfg", lambda: cfg)
+    fixture = str(Path("tests/fixtures/suno/api_created_page_01.synthetic.json").resolve())
+    result = CliRunner().invoke(
+        app,
+        [
+            "bench",
+            "suno-mine",
+            "--concurrency",
+            "1,3",
+            "--runs",
+            "3",
+            "--latency",
+            "0.01",
+            "--fixture-page",
+            fixture,
+            "--mapping-config",
+            str(Path("configs/suno_api_mapping.template.json").resolve()),
+            "--aliases-config",
+            str(Path("configs/suno_style_aliases.json").resolve()),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    levels = json.loads(result.stdout)["levels"]
+    assert [row["concurrency"] for row in levels] == [1, 3]
+    for row in levels:
+        # One adaptation request per run, and every run produced its pack.
+        assert (row["runs"], row["failed_runs"], row["llm_requests"]) == (3, 0, 3)
+    assert (cfg.outputs_dir / "reports" / "llm_benchmark_suno_mine.md").exists()
+    assert not (cfg.outputs_dir / "reports" / "suno_mine_summary.json").exists()
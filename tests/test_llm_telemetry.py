@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import httpx
+
+from ai_music.io.files import read_jsonl
+from ai_music.llm.cache import LLMResponseCache
+from ai_music.llm.ollama_client import OllamaClient
+from ai_music.llm.openrouter_client import OpenRouterClient
+from ai_music.llm.telemetry import LLMCallSpan, LLMTelemetry, summarize_spans
+
+SCHEMA = {"type": "object", "properties": {"genre": {"type": "string"}}, "required": ["genre"]}
+
+
+def _patch_client(monkeypatch, module: str, handler) -> None:
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        f"ai_music.llm.{module}.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+
+
+def test_structured_call_span_sums_usage_and_cost_across_repairs(monkeypatch, tmp_path: Path) -> None:
+    answers = iter(["not json", '{"genre": "dnb"}'])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["usage"] == {"include": True}
+        return httpx.Response(
+            200,
+            json={
+                "model": "openai/gpt-4o-mini-2024-07-18",
+                "choices": [{"message": {"content": next(answers)}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20, "cost": 0.0015},
+            },
+        )
+
+    _patch_client(monkeypatch, "openrouter_client", handler)
+    telemetry = LLMTelemetry(tmp_path / "llm_calls.jsonl")
+    client = OpenRouterClient("key", telemetry=telemetry)
+    assert client.generate_structured("brief", {}, SCHEMA) == {"genre": "dnb"}
+
+    [span] = telemetry.spans
+    assert span.task_name == "brief" and span.provider == "openrouter"
+    assert span.model == "openai/gpt-4o-mini-2024-07-18"
+    assert (span.attempts, span.requests) == (2, 2)
+    assert (span.prompt_tokens, span.completion_tokens) == (200, 40)
+    assert span.cost_usd == 0.003 and span.usage_source == "provider"
+    assert span.outcome == "ok" and span.latency_seconds is not None
+    [logged] = read_jsonl(tmp_path / "llm_calls.jsonl")
+    assert logged["attempts"] == 2 and logged["cost_usd"] == 0.003
+
+
+def test_ollama_span_records_eval_counts_and_cache_hits(monkeypatch, tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={"message": {"content": '{"genre": "house"}'}, "prompt_eval_count": 42, "eval_count": 7, "done": True},
+        )
+
+    _patch_client(monkeypatch, "ollama_client", handler)
+    telemetry = LLMTelemetry()
+    client = OllamaClient(cache=LLMResponseCache(tmp_path / "llm"), telemetry=telemetry)
+    for _ in range(2):
+        client.generate_structured("fragments", {}, SCHEMA)
+
+    first, second = telemetry.spans
+    assert (first.prompt_tokens, first.completion_tokens, first.cache_hits) == (42, 7, 0)
+    assert (second.requests, second.cache_hits) == (0, 1)
+    assert telemetry.summary()["by_task"]["fragments"]["cache_hits"] == 1
+
+
+def test_failed_call_is_recorded_as_error(monkeypatch) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={"error": "overloaded"})
+
+    _patch_client(monkeypatch, "ollama_client", handler)
+    telemetry = LLMTelemetry()
+    client = OllamaClient(telemetry=telemetry)
+    try:
+        client.generate_structured("brief", {}, SCHEMA)
+    except RuntimeError:
+        pass
+    [span] = telemetry.spans
+    assert span.outcome == "error" and span.attempts == 2
+    assert telemetry.summary()["total"]["errors"] == 1
+
+
+def test_summarize_spans_groups_by_task_and_model() -> None:
+    spans = [
+        LLMCallSpan("brief", "openrouter", "m1", 0.0, latency_seconds=float(i), cost_usd=0.01, attempts=1)
+        for i in range(1, 11)
+    ]
+    spans.append(LLMCallSpan("fragments", "ollama", None, 0.0, latency_seconds=0.5, attempts=1))
+    summary = summarize_spans(spans)
+    brief = summary["by_task"]["brief"]
+    assert brief["calls"] == 10 and brief["cost_usd"] == 0.1
+    assert brief["latency_p50_seconds"] == 6.0 and brief["latency_p95_seconds"] == 10.0
+    assert summary["by_model"]["ollama:default"]["cost_usd"] is None
+    assert summary["total"]["calls"] == 11
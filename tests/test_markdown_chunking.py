@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from ai_music.io.markdown import chunk_markdown
+from ai_music.io.markdown import chunk_markdown, iter_doc_chunks, iter_markdown_chunks, split_section
 
 
 def test_chunk_markdown_splits_by_headings(tmp_path: Path) -> None:
@@ -13,3 +13,47 @@ def test_chunk_markdown_splits_by_headings(tmp_path: Path) -> None:
     assert len(chunks) >= 2
     assert any("prompting" in c.tags for c in chunks)
     assert any("mixing-mastering" in c.tags for c in chunks)
+
+
+def test_parallel_and_streaming_chunking_match_serial(tmp_path: Path) -> None:
+    paths = []
+    for i in range(3):
+        md = tmp_path / f"doc{i}.md"
+        md.write_bytes(
+            f"# Doc {i}\r\nIntro\x0cpage two\r\n\r\n## Drop\rRolling bass {i}\n\n### Bars\n16 bars\n".encode()
+        )
+        paths.append(md)
+    serial = iter_doc_chunks(paths)
+    assert iter_doc_chunks(paths, workers=2) == serial
+    assert iter_doc_chunks(paths, stream_min_bytes=0) == serial
+    assert list(iter_markdown_chunks(paths[0])) == chunk_markdown(paths[0])
+    assert [c.source_file for c in iter_doc_chunks(paths[:1], ["ref/doc0.md"])] == ["ref/doc0.md"] * 3
+
+
+def test_long_sections_split_on_boundaries_with_overlap_and_derived_ids(tmp_path: Path) -> None:
+    md = tmp_path / "long.md"
+    paragraphs = [" ".join(f"Para {p} sentence {i} on reese bass." for i in range(3)) for p in range(12)]
+    md.write_text("# Long\n\n" + "\n\n".join(paragraphs) + "\n\n## Short\n\nOne line.\n", encoding="utf-8")
+    whole = chunk_markdown(md)
+    parts = chunk_markdown(md, max_tokens=60, overlap_tokens=15)
+
+    assert len(whole) == 2 and len(parts) > 3
+    *long_parts, short = parts
+    assert short == whole[1]
+    assert {c.parent_chunk_id for c in long_parts} == {whole[0].chunk_id}
+    assert all(c.chunk_id.startswith(whole[0].chunk_id + "_") for c in long_parts)
+    assert len({c.chunk_id for c in long_parts}) == len(long_parts)
+    assert all(c.token_estimate <= 60 for c in long_parts)
+    # Every part after the first opens with the closing sentence of the one before it.
+    for before, after in zip(long_parts, long_parts[1:], strict=False):
+        assert after.text.split("\n\n")[0] in before.text
+    assert all(p in "\n\n".join(c.text for c in long_parts) for p in paragraphs)
+    assert chunk_markdown(md, max_tokens=60, overlap_tokens=15) == parts
+    assert list(iter_markdown_chunks(md, max_tokens=60, overlap_tokens=15)) == parts
+
+
+def test_unpunctuated_runs_are_cut_at_token_limit() -> None:
+    text = " ".join(f"w{i}" for i in range(2000))
+    parts = split_section(text, 100, overlap_tokens=20)
+    assert len(parts) > 1
+    assert " ".join(parts) == text
@@ -0,0 +1,130 @@
+import json
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import httpx
+
+from ai_music.enrich.acoustid import AcoustIDClient, split_batch_response
+from ai_music.io.ratelimit import AdaptiveRateLimiter
+from ai_music.media.fingerprint import fingerprint_media_files
+
+
+def _fake_fpcalc(tmp_path: Path) -> Path:
+    log = tmp_path / "fpcalc_calls.log"
+    script = tmp_path / "fpcalc"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import json, sys\n"
+        f"open({str(log)!r}, 'a').write(sys.argv[-1] + '\\n')\n"
+        "data = open(sys.argv[-1], 'rb').read()\n"
+        "print(json.dumps({'duration': 181.4, 'fingerprint': 'FP' + str(len(data))}))\n",
+        encoding="utf-8",
+    )
+    script.chmod(0o755)
+    return script
+
+
+def test_fingerprint_media_files_caches_by_content_hash(tmp_path: Path) -> None:
+    fpcalc = _fake_fpcalc(tmp_path)
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    (media_dir / "a.mp3").write_bytes(b"same-bytes")
+    (media_dir / "b.mp3").write_bytes(b"other-bytes!")
+    rows = [
+        {"media_id": f"med_{p.stem}", "path": str(p), "relative_path": p.name}
+        for p in sorted(media_dir.glob("*.mp3"))
+    ]
+
+    first = fingerprint_media_files(rows, tmp_path / "cache", str(fpcalc), max_workers=2)
+    assert [r["fingerprint"] for r in first] == ["FP10", "FP12"]
+    assert all(r["duration"] == 181 and not r["cache_hit"] for r in first)
+
+    (media_dir / "copy.mp3").write_bytes(b"same-bytes")
+    rows.append({"media_id": "med_copy", "path": str(media_dir / "copy.mp3"), "relative_path": "copy.mp3"})
+    second = fingerprint_media_files(rows, tmp_path / "cache", str(fpcalc), max_workers=2)
+    assert all(r["cache_hit"] for r in second)
+    assert len((tmp_path / "fpcalc_calls.log").read_text(encoding="utf-8").splitlines()) == 2
+
+    # A different fpcalc length is a different fingerprint, not a cache hit.
+    shorter = fingerprint_media_files(rows, tmp_path / "cache", str(fpcalc), max_workers=1, max_length_seconds=30)
+    assert [r["cache_hit"] for r in shorter] == [False, False, True]
+    assert len((tmp_path / "fpcalc_calls.log").read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_split_batch_response_maps_indexes() -> None:
+    data = {
+        "status": "ok",
+        "fingerprints": [
+            {"index": "1", "results": [{"id": "b", "score": 0.9}]},
+            {"index": 0, "results": []},
+        ],
+    }
+    mapped = split_batch_response(data, [0, 1])
+    assert mapped[0]["results"] == []
+    assert mapped[1]["results"][0]["id"] == "b"
+
+
+def test_lookup_batch_posts_multiple_fingerprints_and_uses_cache(monkeypatch, tmp_path: Path) -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+        requests.append(form)
+        slots = sorted(int(k.split(".")[1]) for k in form if k.startswith("fingerprint."))
+        return httpx.Response(
+            200,
+            json={
+                "status": "ok",
+                "fingerprints": [
+                    {"index": slot, "results": [{"id": form[f"fingerprint.{slot}"], "score": 1.0}]}
+                    for slot in slots
+                ],
+            },
+        )
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        "ai_music.enrich.acoustid.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    client = AcoustIDClient("key", tmp_path, limiter=AdaptiveRateLimiter(rate_per_second=1000.0))
+    items = [(f"fp{i}", 200 + i) for i in range(5)]
+    results = client.lookup_batch(items, batch_size=2)
+    assert len(requests) == 3 == client.batch_requests
+    assert [r["data"]["results"][0]["id"] for r in results] == [f"fp{i}" for i in range(5)]
+
+    again = client.lookup_batch(items, batch_size=2)
+    assert len(requests) == 3
+    assert all(r["cache_hit"] for r in again)
+    assert json.dumps(client.lookup("fp3", 203)["data"]) == json.dumps(results[3]["data"])
+
+
+def test_lookup_batch_retries_slots_missing_from_a_partial_response(monkeypatch, tmp_path: Path) -> None:
+    posts: list[dict] = []
+    singles: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            fingerprint = request.url.params["fingerprint"]
+            singles.append(fingerprint)
+            return httpx.Response(200, json={"status": "ok", "results": [{"id": fingerprint, "score": 1.0}]})
+        form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+        posts.append(form)
+        # The batch answer leaves out slot 1.
+        return httpx.Response(
+            200, json={"status": "ok", "fingerprints": [{"index": 0, "results": [{"id": form["fingerprint.0"]}]}]}
+        )
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        "ai_music.enrich.acoustid.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    client = AcoustIDClient("key", tmp_path, limiter=AdaptiveRateLimiter(rate_per_second=1000.0))
+    results = client.lookup_batch([("fp0", 200), ("fp1", 201)])
+    assert len(posts) == 1 and singles == ["fp1"]
+    assert (client.batch_requests, client.single_requests) == (1, 1)
+    assert [r["data"]["results"][0]["id"] for r in results] == ["fp0", "fp1"]
+    # The retried slot is cached from its own answer, never as an empty "no match".
+    assert client.lookup_batch([("fp1", 201)])[0] == {"cache_hit": True, "data": results[1]["data"]}
@@ -0,0 +1,285 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from ai_music.cli import app
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.io.files import read_json, read_jsonl, write_json
+from ai_music.workflows.metadata_enrich import enrich_track_metadata, load_enrichment_journal
+
+
+class _FakeMusicBrainz:
+    def __init__(self, fail_on: str | None = None):
+        self.queries: list[str] = []
+        self.fail_on = fail_on
+
+    def search_recording(self, query: str) -> dict:
+        if self.fail_on and self.fail_on in query:
+            raise KeyboardInterrupt
+        self.queries.append(query)
+        return {"cache_hit": False, "data": {"recordings": [{"id": f"mbid-{len(self.queries)}"}]}}
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def _write_tracks(cfg: AppConfig, count: int) -> None:
+    tracks = [
+        {"track_id": f"trk_{i:03d}", "canonical_title": f"Song {i}", "canonical_artists": [f"Artist {i}"]}
+        for i in range(count)
+    ]
+    write_json(cfg.data_dir / "normalized" / "tracks.canonical.json", tracks)
+
+
+def test_enrich_journals_records_and_resume_skips_completed(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_tracks(cfg, 5)
+
+    interrupted = _FakeMusicBrainz(fail_on="Song 3")
+    try:
+        enrich_track_metadata(cfg, online=True, limit=None, lastfm=False, musicbrainz_client=interrupted)
+    except KeyboardInterrupt:
+        pass
+    journal_path = cfg.data_dir / "enriched" / "track_enrichment.journal.jsonl"
+    assert [r["track_id"] for r in read_jsonl(journal_path)] == ["trk_000", "trk_001", "trk_002"]
+
+    resumed = _FakeMusicBrainz()
+    result = enrich_track_metadata(
+        cfg, online=True, limit=None, lastfm=False, resume=True, musicbrainz_client=resumed
+    )
+    assert len(resumed.queries) == 2
+    assert result["stats"]["skipped_already_enriched"] == 3
+    output = read_json(cfg.root_dir / result["output_path"])
+    assert [r["track_id"] for r in output["records"]] == [f"trk_{i:03d}" for i in range(5)]
+
+
+def test_enrich_offset_limit_window_shards_tracks(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_tracks(cfg, 6)
+    client = _FakeMusicBrainz()
+    result = enrich_track_metadata(
+        cfg, online=True, offset=2, limit=3, lastfm=False, musicbrainz_client=client
+    )
+    assert result["stats"]["enriched_this_run"] == 3
+    assert [q.split('"')[1] for q in client.queries] == ["Song 2", "Song 3", "Song 4"]
+
+
+def test_load_enrichment_journal_ignores_truncated_trailing_line(tmp_path: Path) -> None:
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text('{"track_id": "trk_a", "providers": {}}\n{"track_id": "trk_b", "prov', encoding="utf-8")
+    records = load_enrichment_journal(journal)
+    assert list(records) == ["trk_a"]
+
+
+class _FakeLocalIndex:
+    def search_recording(self, title: str, artist: str | None = None) -> dict | None:
+        if title == "Song 0":
+            return {"cache_hit": False, "source": "local", "data": {"recordings": [{"id": "local-0"}]}}
+        return None
+
+
+def test_enrich_local_musicbrainz_source_falls_back_to_remote_for_misses(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_tracks(cfg, 2)
+    remote = _FakeMusicBrainz()
+    result = enrich_track_metadata(
+        cfg,
+        online=True,
+        lastfm=False,
+        musicbrainz_source="local",
+        musicbrainz_client=remote,
+        musicbrainz_index=_FakeLocalIndex(),
+    )
+    assert result["stats"]["musicbrainz_local_hits"] == 1
+    assert len(remote.queries) == 1
+    records = read_json(cfg.root_dir / result["output_path"])["records"]
+    assert records[0]["providers"]["musicbrainz"]["source"] == "local"
+    assert records[1]["providers"]["musicbrainz"]["source"] == "remote"
+
+
+class _FakeExactKeyMusicBrainz(_FakeMusicBrainz):
+    def __init__(self):
+        super().__init__()
+        self.isrcs: list[str] = []
+
+    def lookup_isrc(self, isrc: str) -> dict:
+        self.isrcs.append(isrc)
+        recordings = [{"id": "mbid-isrc", "title": "Song 0", "artist-credit": [{"name": "Artist 0"}]}]
+        return {"cache_hit": False, "data": {"recordings": recordings if isrc == "ISRC0" else []}}
+
+    def search_recording(self, query: str) -> dict:
+        self.queries.append(query)
+        return {
+            "cache_hit": False,
+            "data": {
+                "recordings": [
+                    {"id": "wrong", "score": 100, "title": "Song 1 (Karaoke)", "artist-credit": [{"name": "Cover Band"}]},
+                    {"id": "right", "score": 95, "title": "Song 1", "artist-credit": [{"name": "Artist 1"}]},
+                ]
+            },
+        }
+
+
+class _FakeLastFM:
+    def __init__(self):
+        self.mbids: list[str] = []
+        self.text_queries: list[tuple[str, str]] = []
+
+    def track_info_by_mbid(self, mbid: str) -> dict:
+        self.mbids.append(mbid)
+        if mbid == "mbid-isrc":
+            return {"cache_hit": False, "data": {"track": {"name": "Song 0", "toptags": {"tag": [{"name": "dnb"}]}}}}
+        return {"cache_hit": False, "data": {"error": 6, "message": "Track not found"}}
+
+    def track_info(self, artist: str, track: str) -> dict:
+        self.text_queries.append((artist, track))
+        return {"cache_hit": False, "data": {"track": {"name": track}}}
+
+
+def test_enrich_prefers_isrc_and_mbid_keys_over_fuzzy_search(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    tracks = [
+        {"track_id": "trk_0", "canonical_title": "Song 0", "canonical_artists": ["Artist 0"], "isrc": "ISRC0"},
+        {"track_id": "trk_1", "canonical_title": "Song 1", "canonical_artists": ["Artist 1"], "isrc": None},
+    ]
+    write_json(cfg.data_dir / "normalized" / "tracks.canonical.json", tracks)
+    mb = _FakeExactKeyMusicBrainz()
+    lf = _FakeLastFM()
+    result = enrich_track_metadata(cfg, online=True, musicbrainz_client=mb, lastfm_client=lf)
+
+    assert mb.isrcs == ["ISRC0"]
+    assert len(mb.queries) == 1 and "Song 1" in mb.queries[0]
+    assert result["stats"]["fuzzy_searches_skipped"] == 1
+    records = read_json(cfg.root_dir / result["output_path"])["records"]
+    assert records[0]["mbid"] == "mbid-isrc"
+    assert records[0]["providers"]["musicbrainz"]["resolution"] == "isrc"
+    assert records[0]["providers"]["lastfm"]["lookup"] == "mbid"
+    assert records[1]["mbid"] == "right"
+    assert records[1]["providers"]["lastfm"]["lookup"] == "artist_title"
+    assert lf.text_queries == [("Artist 1", "Song 1")]
+    assert result["stats"]["lastfm_mbid_misses"] == 1
+
+
+def test_resume_after_truncated_journal_tail_keeps_new_records(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_tracks(cfg, 3)
+    journal_path = cfg.data_dir / "enriched" / "track_enrichment.journal.jsonl"
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+    # The previous run died while writing trk_001's record.
+    journal_path.write_text(
+        '{"track_id": "trk_000", "online": true, "providers": {}}\n{"track_id": "trk_001", "prov', encoding="utf-8"
+    )
+
+    for _ in range(2):
+        enrich_track_metadata(cfg, online=True, lastfm=False, resume=True, musicbrainz_client=_FakeMusicBrainz())
+    assert [r["track_id"] for r in read_jsonl(journal_path, skip_invalid=True)] == ["trk_000", "trk_001", "trk_002"]
+
+
+def test_cli_rejects_unknown_musicbrainz_source_and_local_index_is_closed(monkeypatch, tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_tracks(cfg, 2)
+    monkeypatch.setattr("ai_music.cli._cfg", lambda: cfg)
+    rejected = CliRunner().invoke(app, ["metadata", "enrich", "--musicbrainz-source", "mirror"])
+    assert rejected.exit_code == 2
+    assert "--musicbrainz-source must be" in rejected.output
+
+    opened: list[_FakeLocalIndex] = []
+
+    class _ClosableIndex(_FakeLocalIndex):
+        def __init__(self, index_path: Path):
+            self.closed = False
+            opened.append(self)
+
+        def close(self) -> None:
+            self.closed = True
+
+    monkeypatch.setattr("ai_music.workflows.metadata_enrich.LocalMusicBrainzIndex", _ClosableIndex)
+    result = CliRunner().invoke(app, ["metadata", "enrich", "--musicbrainz-source", "LOCAL", "--no-lastfm"])
+    assert result.exit_code == 0, result.output
+    assert len(opened) == 1 and opened[0].closed
+
+
+class _FakeLocalIsrcIndex(_FakeLocalIndex):
+    def lookup_isrc(self, isrc: str) -> dict | None:
+        if isrc == "ISRC0":
+            recordings = [{"id": "local-isrc", "title": "Song 0", "artist-credit": [{"name": "Artist 0"}]}]
+            return {"cache_hit": False, "source": "local", "data": {"recordings": recordings}}
+        return None
+
+
+def test_local_isrc_resolutions_count_as_local_hits(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    tracks = [
+        {"track_id": f"trk_{i}", "canonical_title": f"Song {i}", "canonical_artists": [f"Artist {i}"], "isrc": f"ISRC{i}"}
+        for i in range(3)
+    ]
+    write_json(cfg.data_dir / "normalized" / "tracks.canonical.json", tracks)
+    mb = _FakeExactKeyMusicBrainz()
+    result = enrich_track_metadata(
+        cfg, online=True, lastfm=False, musicbrainz_source="local", musicbrainz_client=mb, musicbrainz_index=_FakeLocalIsrcIndex()
+    )
+    stats = result["stats"]
+    assert (stats["musicbrainz_local_isrc_hits"], stats["musicbrainz_local_isrc_misses"]) == (1, 2)
+    # trk_0 resolves from the mirror by ISRC; trk_1 and trk_2 miss it and go remote.
+    assert (stats["musicbrainz_local_hits"], stats["musicbrainz_local_misses"]) == (1, 2)
+    assert mb.isrcs == ["ISRC1", "ISRC2"] and stats["musicbrainz_isrc_lookups"] == 2
+    records = read_json(cfg.root_dir / result["output_path"])["records"]
+    assert records[0]["providers"]["musicbrainz"]["resolution"] == "isrc"
+    assert records[0]["providers"]["musicbrainz"]["source"] == "local"
+
+
+class _FlakyMusicBrainz(_FakeMusicBrainz):
+    def __init__(self, down_for: str):
+        super().__init__()
+        self.down_for = down_for
+
+    def search_recording(self, query: str) -> dict:
+        if self.down_for in query:
+            raise RuntimeError("503 Service Unavailable")
+        return super().search_recording(query)
+
+
+def test_resume_retries_offline_and_failed_records(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    _write_tracks(cfg, 3)
+    offline = enrich_track_metadata(cfg, online=False, lastfm=False)
+    assert offline["stats"]["enriched_this_run"] == 3
+
+    first = enrich_track_metadata(
+        cfg, online=True, lastfm=False, resume=True, musicbrainz_client=_FlakyMusicBrainz(down_for="Song 1")
+    )
+    assert first["stats"]["retried_incomplete"] == 3 and first["stats"]["skipped_already_enriched"] == 0
+    journaled = load_enrichment_journal(cfg.data_dir / "enriched" / "track_enrichment.journal.jsonl")
+    assert journaled["trk_000"]["online"] and journaled["trk_000"]["providers_ok"] == ["musicbrainz"]
+    assert "musicbrainz_error" in journaled["trk_001"]["providers"]
+
+    again = _FakeMusicBrainz()
+    second = enrich_track_metadata(cfg, online=True, lastfm=False, resume=True, musicbrainz_client=again)
+    assert [q.split('"')[1] for q in again.queries] == ["Song 1"]
+    assert second["stats"]["skipped_already_enriched"] == 2
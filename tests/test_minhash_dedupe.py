@@ -0,0 +1,110 @@
+from pathlib import Path
+
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.io.files import read_jsonl
+from ai_music.llm.tokens import get_token_counter
+from ai_music.models.types import GuideChunk
+from ai_music.prompting.context import TaskBudget, pack_chunks
+from ai_music.retrieval.minhash import MinHasher, find_near_duplicates, jaccard, shingles
+from ai_music.workflows.docs_to_prompts import DOCS_CHUNKS_JSONL, _load_chunks, index_docs, search_docs
+
+PASSAGE = (
+    "Set weirdness low for a faithful cover and raise style influence when the genre must hold. "
+    "Audio influence controls how closely the upload is followed; start near sixty and adjust by ear. "
+    "Keep the style prompt short, lead with genre and tempo, then add two or three texture words."
+)
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def test_minhash_estimates_jaccard_and_flags_only_close_copies() -> None:
+    left = shingles(PASSAGE)
+    right = shingles(PASSAGE.replace("sixty", "seventy"))
+    hasher = MinHasher(num_perm=256)
+    a, b = hasher.signature(left), hasher.signature(right)
+    estimate = sum(x == y for x, y in zip(a, b, strict=True)) / len(a)
+    assert abs(estimate - jaccard(left, right)) < 0.1
+    assert hasher.signature(set()) == ()
+
+    items = [
+        ("c1", PASSAGE),
+        ("c2", "Layer a reese bass under rolling breaks and sidechain it to the kick."),
+        ("c3", PASSAGE.replace("sixty", "seventy")),
+        ("c4", PASSAGE.upper()),
+        ("c5", "Audio influence controls how closely the upload is followed."),
+    ]
+    assert find_near_duplicates(items) == {"c3": "c1", "c4": "c1"}
+    assert find_near_duplicates(items, threshold=1.0) == {"c4": "c1"}
+
+
+def test_docs_index_flags_duplicates_and_collapse_keeps_them_out_of_context(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    (cfg.docs_dir / "reference").mkdir(parents=True, exist_ok=True)
+    (cfg.docs_dir / "guide.md").write_text(f"# Guide\n\n## Sliders\n\n{PASSAGE}\n", encoding="utf-8")
+    (cfg.docs_dir / "reference" / "sliders.md").write_text(
+        f"# Reference\n\n## Slider notes\n\n{PASSAGE} Checked in 2026.\n\n## Bass\n\nReese bass layering.\n",
+        encoding="utf-8",
+    )
+    flagged = index_docs(cfg)
+    assert flagged["duplicate_chunk_count"] == 1 and flagged["duplicate_tokens"] > 0
+    rows = read_jsonl(cfg.root_dir / DOCS_CHUNKS_JSONL)
+    canonical = next(r["chunk_id"] for r in rows if r["source_file"] == "guide.md")
+    assert [r["duplicate_of"] for r in rows] == [None, canonical, None]
+    chunks = _load_chunks(cfg)
+    assert len(chunks) == 3
+    packed = pack_chunks(chunks, TaskBudget(), get_token_counter())
+    assert [c.chunk_id for c in packed.chunks] == [chunks[0].chunk_id, chunks[2].chunk_id]
+    assert packed.summary()["chunks_deduplicated"] == 1
+
+    collapsed = index_docs(cfg, collapse_duplicates=True)
+    assert collapsed["changed_docs"] == [] and collapsed["collapse_duplicates"] is True
+    assert len(read_jsonl(cfg.root_dir / DOCS_CHUNKS_JSONL)) == 3
+    assert [c.duplicate_of for c in _load_chunks(cfg)] == [None, None]
+    assert [h["source_file"] for h in search_docs(cfg, "audio influence upload", top_k=5)["hits"]] == ["guide.md"]
+
+    # Editing the canonical copy away re-evaluates the unchanged duplicate.
+    (cfg.docs_dir / "guide.md").write_text("# Guide\n\n## Drums\n\nRolling breaks.\n", encoding="utf-8")
+    assert index_docs(cfg)["duplicate_chunk_count"] == 0
+    assert all(r["duplicate_of"] is None for r in read_jsonl(cfg.root_dir / DOCS_CHUNKS_JSONL))
+
+
+def test_packer_keeps_one_copy_per_canonical_chunk() -> None:
+    def chunk(chunk_id: str, duplicate_of: str | None = None) -> GuideChunk:
+        return GuideChunk(chunk_id, "a.md", ["a"], PASSAGE, ["general"], 60, duplicate_of=duplicate_of)
+
+    packed = pack_chunks(
+        [chunk("dup", "canon"), chunk("canon"), chunk("other")],
+        TaskBudget(),
+        get_token_counter(),
+        scores={"dup": 2.0, "canon": 1.0},
+    )
+    # The higher-ranked copy wins even when it is the flagged one.
+    assert [c.chunk_id for c in packed.chunks] == ["dup", "other"]
+    assert packed.deduplicated_chunk_ids == ["canon"]
@@ -0,0 +1,47 @@
+import gzip
+import json
+from pathlib import Path
+
+from ai_music.enrich.musicbrainz_local import LocalMusicBrainzIndex, build_musicbrainz_index
+
+
+def _write_dump(path: Path) -> None:
+    docs = [
+        {
+            "id": "rec-decade",
+            "title": "Decade",
+            "length": 401000,
+            "artist-credit": [
+                {"name": "Ben Böhmer", "joinphrase": " & ", "artist": {"id": "a1", "name": "Ben Böhmer"}},
+                {"name": "Jan Blomqvist", "joinphrase": "", "artist": {"id": "a2", "name": "Jan Blomqvist"}},
+            ],
+            "isrcs": ["DEXX12345678"],
+        },
+        {
+            "id": "rec-other",
+            "title": "Other Song!",
+            "artist-credit": [{"name": "Someone", "artist": {"id": "a3", "name": "Someone"}}],
+        },
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc) + "\n")
+        f.write("{truncated\n")
+
+
+def test_local_index_answers_normalized_title_artist_lookups(tmp_path: Path) -> None:
+    dump = tmp_path / "recording.jsonl.gz"
+    _write_dump(dump)
+    stats = build_musicbrainz_index(dump, tmp_path / "mb.sqlite")
+    assert stats["recording_count"] == 2
+
+    index = LocalMusicBrainzIndex(tmp_path / "mb.sqlite")
+    hit = index.search_recording("DECADE", "jan blomqvist")
+    assert hit is not None
+    assert hit["source"] == "local"
+    assert hit["data"]["recordings"][0]["id"] == "rec-decade"
+    assert index.search_recording("Decade", "Ben Böhmer & Jan Blomqvist") is not None
+    assert index.search_recording("other song", None)["data"]["recordings"][0]["id"] == "rec-other"
+    assert index.search_recording("Decade", "Unknown Artist") is None
+    assert index.lookup_isrc("dexx12345678")["data"]["recordings"][0]["id"] == "rec-decade"
+    assert index.lookup_isrc("UNKNOWN") is None
@@ -0,0 +1,90 @@
+import json
+
+import httpx
+
+from ai_music.llm.ollama_client import STRUCTURED_SYSTEM_PROMPT, OllamaClient
+
+SCHEMA = {"type": "object", "properties": {"genre": {"type": "string"}}, "required": ["genre"]}
+
+
+def _patch_client(monkeypatch, handler) -> None:
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        "ai_music.llm.ollama_client.httpx.Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+
+
+def test_chat_calls_share_system_prefix_and_pin_residency(monkeypatch) -> None:
+    requests: list[tuple[str, dict]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": '{"genre": "dnb"}'}})
+
+    _patch_client(monkeypatch, handler)
+    client = OllamaClient(keep_alive="1h", num_ctx=4096)
+    for task in ["docs_to_prompt_brief", "suno_style_lyrics_fragments"]:
+        assert client.generate_structured(task, {"task": task}, SCHEMA) == {"genre": "dnb"}
+    assert {path for path, _ in requests} == {"/api/chat"}
+    for _, body in requests:
+        assert body["messages"][0] == {"role": "system", "content": STRUCTURED_SYSTEM_PROMPT}
+        assert body["keep_alive"] == "1h"
+        assert body["options"]["num_ctx"] == 4096
+
+
+def test_guide_context_leads_the_prompt_ahead_of_task_text(monkeypatch) -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": '{"genre": "dnb"}'}})
+
+    _patch_client(monkeypatch, handler)
+    client = OllamaClient()
+    section = {"heading_path": ["Guide", "Drops"], "text": "Drops land on bar 33."}
+    client.generate_structured("brief", {"intent": "x", "guide_sections": [{**section, "tags": ["arrangement"]}]}, SCHEMA)
+    client.generate_structured("fragments", {"brief": {}, "source_chunks": [{"chunk_id": "gc_1", **section}]}, SCHEMA)
+    systems = [body["messages"][0]["content"] for body in requests]
+    assert systems[0] == systems[1]
+    assert systems[0].startswith(STRUCTURED_SYSTEM_PROMPT) and "## Guide > Drops\nDrops land on bar 33." in systems[0]
+    users = [body["messages"][1]["content"] for body in requests]
+    assert users[0].startswith("Task: brief") and "Drops land" not in users[0] and '"intent": "x"' in users[0]
+
+
+def test_warm_up_loads_model_with_matching_options(monkeypatch) -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": ""}, "done": True})
+
+    _patch_client(monkeypatch, handler)
+    result = OllamaClient(num_ctx=4096).warm_up("qwen2.5:7b")
+    assert result["loaded"] and result["model"] == "qwen2.5:7b"
+    assert requests == [
+        {"model": "qwen2.5:7b", "stream": False, "options": {"num_ctx": 4096}, "messages": [], "keep_alive": "30m"}
+    ]
+
+
+def test_warm_up_reports_unreachable_server(monkeypatch) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    _patch_client(monkeypatch, handler)
+    result = OllamaClient().warm_up()
+    assert result["loaded"] is False and "connection refused" in result["error"]
+
+
+def test_legacy_generate_endpoint_is_still_available(monkeypatch) -> None:
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        assert "prompt" in json.loads(request.content)
+        return httpx.Response(200, json={"response": '{"genre": "house"}', "done": True})
+
+    _patch_client(monkeypatch, handler)
+    client = OllamaClient(use_chat=False)
+    assert client.generate_structured("brief", {}, SCHEMA) == {"genre": "house"}
+    assert paths == ["/api/generate"]
@@ -0,0 +1,65 @@
+import random
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from ai_music.io.ratelimit import AdaptiveRateLimiter, parse_retry_after, request_with_retry
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock: _FakeClock, **kwargs) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(clock=clock, sleep=clock.sleep, rng=random.Random(0), jitter=0.0, **kwargs)
+
+
+def test_limiter_spaces_calls_by_rate_and_allows_burst() -> None:
+    clock = _FakeClock()
+    limiter = _limiter(clock, rate_per_second=2.0, burst=2)
+    waits = [limiter.acquire() for _ in range(4)]
+    assert waits == [0.0, 0.0, 0.5, 0.5]
+    assert limiter.stats()["calls"] == 4
+
+
+def test_parse_retry_after_seconds_and_http_date() -> None:
+    assert parse_retry_after("7") == 7.0
+    now = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("Thu, 01 Jan 2026 12:00:30 GMT", now=now) == 30.0
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after(None) is None
+
+
+def test_request_with_retry_honors_retry_after_and_counts() -> None:
+    clock = _FakeClock()
+    limiter = _limiter(clock, rate_per_second=10.0)
+    responses = [
+        httpx.Response(503, headers={"Retry-After": "5"}),
+        httpx.Response(429),
+        httpx.Response(200, json={"ok": True}),
+    ]
+    result = request_with_retry(limiter, lambda: responses.pop(0))
+    assert result.status_code == 200
+    stats = limiter.stats()
+    assert stats["throttled"] == 2
+    assert stats["retried"] == 2
+    assert clock.sleeps[0] == pytest.approx(5.0)
+    assert stats["current_rate_per_second"] < 10.0
+
+
+def test_request_with_retry_gives_up_after_max_retries() -> None:
+    clock = _FakeClock()
+    limiter = _limiter(clock, rate_per_second=10.0)
+    result = request_with_retry(limiter, lambda: httpx.Response(503), max_retries=2)
+    assert result.status_code == 503
+    assert limiter.stats()["retried"] == 2
@@ -0,0 +1,117 @@
+import copy
+import threading
+from pathlib import Path
+
+import pytest
+
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.io.files import read_json
+from ai_music.suno.api_client import SunoApiClient
+from ai_music.suno.mapping import load_mapping_config
+from ai_music.workflows.suno_song_analysis import fetch_suno_created_songs
+
+MAPPING_PATH = Path("configs/suno_api_mapping.template.json")
+FIXTURE_PAGE = Path("tests/fixtures/suno/api_created_page_01.synthetic.json")
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key="test-suno-key",
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def _fake_pages(monkeypatch: pytest.MonkeyPatch, next_cursor=lambda n: f"c{n}", fail_on: int | None = None):
+    """Serve synthetic 3-song pages; page `n` links to `next_cursor(n)`. Returns the cursors requested."""
+    template = read_json(FIXTURE_PAGE)["result"]["items"][0]
+    requested: list[str | None] = []
+
+    def fetch_created_page(self, mapping, cursor=None, page_size=None, http_client=None):
+        n = len(requested)
+        requested.append(cursor)
+        if n == fail_on:
+            raise RuntimeError("page fetch failed")
+        items = [{**copy.deepcopy(template), "id": f"song-{n}-{i}"} for i in range(3)]
+        return {"result": {"items": items, "paging": {"nextCursor": next_cursor(n)}}}
+
+    monkeypatch.setattr(SunoApiClient, "fetch_created_page", fetch_created_page)
+    return requested
+
+
+def test_live_fetch_keeps_page_order_and_never_fetches_past_the_window(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cfg = _cfg(tmp_path)
+    requested = _fake_pages(monkeypatch)
+    result = fetch_suno_created_songs(cfg, MAPPING_PATH, window_size=5, prefetch=4)
+    assert requested == [None, "c0"]
+    assert (result["page_count"], result["fetched_song_count"]) == (2, 5)
+    songs = read_json(cfg.root_dir / result["normalized_path"])
+    assert [s["song_id"] for s in songs] == ["song-0-0", "song-0-1", "song-0-2", "song-1-0", "song-1-1"]
+
+    requested = _fake_pages(monkeypatch)
+    assert fetch_suno_created_songs(cfg, MAPPING_PATH, window_size=500, max_pages=3)["page_count"] == 3
+    assert requested == [None, "c0", "c1"]
+
+    requested = _fake_pages(monkeypatch, next_cursor=lambda n: "loop")
+    assert fetch_suno_created_songs(cfg, MAPPING_PATH, window_size=500)["page_count"] == 2
+    assert requested == [None, "loop"]
+
+
+def test_fetch_errors_surface_after_the_pages_before_them(monkeypatch: pytest.MonkeyPatch) -> None:
+    _fake_pages(monkeypatch, fail_on=2)
+    pages = SunoApiClient("key").iter_created_pages(load_mapping_config(MAPPING_PATH))
+    assert next(pages)["result"]["items"][0]["id"] == "song-0-0"
+    assert next(pages)["result"]["items"][0]["id"] == "song-1-0"
+    with pytest.raises(RuntimeError, match="page fetch failed"):
+        next(pages)
+
+
+def test_next_page_is_fetched_while_the_caller_holds_the_current_one(monkeypatch: pytest.MonkeyPatch) -> None:
+    requested = _fake_pages(monkeypatch)
+    second_fetched = threading.Event()
+    fetch = SunoApiClient.fetch_created_page
+
+    def tracking_fetch(self, *args, **kwargs):
+        page = fetch(self, *args, **kwargs)
+        if len(requested) == 2:
+            second_fetched.set()
+        return page
+
+    monkeypatch.setattr(SunoApiClient, "fetch_created_page", tracking_fetch)
+    pages = SunoApiClient("key").iter_created_pages(load_mapping_config(MAPPING_PATH), prefetch=2)
+    next(pages)
+    assert second_fetched.wait(timeout=5)
+    pages.close()
+    # The bounded queue holds the fetcher to `prefetch` pages ahead, and closing stops it.
+    assert len(requested) <= 4
+    assert not any(t.name == "suno-page-fetch" for t in threading.enumerate())
+
+
+def test_fixture_runs_still_stage_every_page(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    result = fetch_suno_created_songs(cfg, MAPPING_PATH, window_size=2, fixture_pages=[FIXTURE_PAGE, FIXTURE_PAGE])
+    assert (result["page_count"], result["fetched_song_count"]) == (2, 2)
+    assert len(read_json(cfg.root_dir / result["raw_path"])["pages"]) == 2
@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import pytest
+
+from ai_music.config import AppConfig, ProviderConfig
+from ai_music.io.files import read_json, write_json
+from ai_music.retrieval.vectors import HashingVectorizer, VectorIndex
+from ai_music.workflows.docs_to_prompts import (
+    build_prompt_briefs_from_docs,
+    build_vector_indexes,
+    index_docs,
+    search_similar,
+)
+
+np = pytest.importorskip("numpy")
+
+STYLES = [
+    "rolling liquid drum and bass, warm reese bass, airy female vocal",
+    "dark neurofunk drum and bass, growling basses, metallic snares",
+    "sunny tropical house, marimba plucks, breezy male vocal",
+    "deep techno, hypnotic rumble kick, dub chords",
+]
+
+
+def _cfg(root: Path) -> AppConfig:
+    providers = ProviderConfig(
+        openrouter_api_key=None,
+        fal_api_key=None,
+        suno_api_key=None,
+        leonardo_api_key=None,
+        gemini_api_key=None,
+        lastfm_api_key=None,
+        acoustid_api_key=None,
+        musicbrainz_user_agent="ai-music-test/0.1.0",
+        ollama_base_url="http://localhost:11434",
+        ffmpeg_path=None,
+        uvr_executable_path=None,
+        uvr_workflow_path=None,
+    )
+    cfg = AppConfig(
+        root_dir=root,
+        docs_dir=root / "docs",
+        playlists_dir=root / "playlists",
+        media_dir=root / "media",
+        data_dir=root / "data",
+        cache_dir=root / "cache",
+        outputs_dir=root / "outputs",
+        providers=providers,
+    )
+    cfg.ensure_runtime_dirs()
+    return cfg
+
+
+def test_hashed_vectors_are_unit_length_and_match_morphology() -> None:
+    vectorizer = HashingVectorizer(dim=1024)
+    matrix = vectorizer.transform(["reese bass", "reese basses", "marimba plucks", ""])
+    assert matrix.shape == (4, 1024) and matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix[:3], axis=1), 1.0)
+    assert not matrix[3].any()
+    assert matrix[0] @ matrix[1] > 0.5 > matrix[0] @ matrix[2]
+
+
+def test_ivf_search_agrees_with_exact_scan_and_loads_memory_mapped(tmp_path: Path) -> None:
+    ids = [f"s{i}" for i in range(400)]
+    texts = [f"{STYLES[i % 4]} variation {i}" for i in range(400)]
+    index = VectorIndex.build(ids, texts, [{"n": i} for i in range(400)], HashingVectorizer(dim=512), n_lists=8)
+    assert index.n_lists == 8
+    exact = index.search("liquid drum and bass with reese bass", top_k=5, exact=True)
+    probed = index.search("liquid drum and bass with reese bass", top_k=5, nprobe=8)
+    assert [h.item_id for h in probed] == [h.item_id for h in exact]
+    assert all(int(h.item_id[1:]) % 4 == 0 for h in exact)
+
+    index.save(tmp_path, "styles")
+    loaded = VectorIndex.load(tmp_path, "styles")
+    assert isinstance(loaded.matrix, np.memmap)
+    assert loaded.search("liquid drum and bass with reese bass", top_k=5, nprobe=8) == probed
+    assert loaded.digest == index.digest
+
+
+def test_ivf_search_skips_empty_clusters() -> None:
+    vectorizer = HashingVectorizer(dim=512)
+    ids = [f"s{i}" for i in range(6)]
+    matrix = vectorizer.transform([f"{STYLES[i % 2]} variation {i}" for i in range(6)])
+    # Every row sits in the last list; the centroid nearest the query owns no rows at all.
+    centroids = vectorizer.transform(["liquid drum and bass reese", STYLES[0], STYLES[1]])
+    index = VectorIndex(
+        vectorizer,
+        matrix,
+        ids,
+        [{} for _ in ids],
+        centroids=centroids,
+        list_order=np.arange(6),
+        list_offsets=np.array([0, 0, 0, 6]),
+    )
+    exact = index.search("liquid drum and bass reese", top_k=3, exact=True)
+    assert index.search("liquid drum and bass reese", top_k=3, nprobe=1) == exact
+    assert len(exact) == 3
+    assert index.search("liquid drum and bass reese", top_k=0) == []
+
+
+class _RecordingLLM:
+    provider_name = "fake"
+
+    def __init__(self) -> None:
+        self.inputs: dict[str, dict] = {}
+
+    def generate(self, system: str, user: str, model: str | None = None, **kwargs) -> str:
+        raise NotImplementedError
+
+    def generate_structured(self, task_name, inputs, schema, model=None, max_attempts=2) -> dict:
+        self.inputs[task_name] = inputs
+        if task_name == "docs_to_prompt_brief":
+            return {"intent": inputs["intent"], "genre": "drum and bass", "mood_tags": ["liquid"], "brief_id": "pb_x"}
+        return {"style_prompt": "liquid dnb", "lyrics": "[Verse]\nHook", "song_title": "X"}
+
+
+def test_vector_indexes_cover_docs_and_suno_styles_and_feed_fragments(tmp_path: Path) -> None:
+    cfg = _cfg(tmp_path)
+    cfg.docs_dir.mkdir(parents=True, exist_ok=True)
+    (cfg.docs_dir / "dnb.md").write_text(
+        "# DnB\n\n## Bass\n\nLayer a reese bass under rolling breaks.\n\n## Lyrics\n\nShort chorus hook.\n",
+        encoding="utf-8",
+    )
+    index_docs(cfg)
+    songs = [
+        {"song_id": f"song_{i}", "title": f"T{i}", "likes": i, "style_prompt": style} for i, style in enumerate(STYLES)
+    ]
+    write_json(cfg.data_dir / "normalized" / "suno_created.normalized.json", songs)
+    summary = build_vector_indexes(cfg, dim=512)
+    assert summary["doc_chunks"]["rows"] == 2 and summary["suno_styles"]["rows"] == 4
+
+    result = search_similar(cfg, "liquid drum and bass with a reese bass", top_k=2)
+    assert result["suno_styles"][0]["id"] == "song_0"
+    assert result["doc_chunks"][0]["heading_path"][-1] == "Bass"
+    assert result["doc_chunks_stale"] is False
+
+    llm = _RecordingLLM()
+    built = build_prompt_briefs_from_docs(cfg, llm_client=llm)
+    references = llm.inputs["suno_style_lyrics_fragments"]["reference_style_prompts"]
+    assert references[0]["song_id"] == "song_0"
+    brief = read_json(cfg.root_dir / built["brief_paths"][0])
+    assert brief["provenance"]["style_reference_song_ids"][0] == "song_0"